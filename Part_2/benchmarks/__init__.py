@@ -0,0 +1 @@
+"""Microbenchmarks for the Lord of the Pings hot paths (see benchmarks.runner)."""
@@ -0,0 +1,54 @@
+"""Run the microbenchmark suite.
+
+Usage (from Part_2):
+    python -m benchmarks --output before.json
+    ... change the code ...
+    python -m benchmarks --compare before.json
+
+With --compare the exit status is 1 when a case got slower than
+--threshold percent, so the suite can gate a deploy. Compare runs from
+the same machine and Python version only.
+"""
+
+import argparse
+import sys
+
+from benchmarks import bench_fanout, bench_game, bench_wire
+from benchmarks.runner import cases, compare, load, run, save
+
+# Benchmark modules run by default, in report order
+SUITES = (bench_wire, bench_fanout, bench_game)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+                                     description="Lord of the Pings microbenchmarks")
+    parser.add_argument("-k", "--filter", metavar="TEXT",
+                        help="only run cases whose name contains TEXT")
+    parser.add_argument("--min-time", type=float, default=0.2,
+                        help="minimum seconds per timing round (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="timing rounds per case (default: %(default)s)")
+    parser.add_argument("--output", metavar="PATH", help="write the results as JSON")
+    parser.add_argument("--compare", metavar="PATH", help="baseline results to compare with")
+    parser.add_argument("--threshold", type=float, default=10,
+                        help="slowdown in percent counted as a regression (default: %(default)s)")
+    parser.add_argument("--list", action="store_true", help="list the cases and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for case, _func, _kwargs in cases(args.filter, SUITES):
+            print(case)
+        return 0
+
+    baseline = load(args.compare) if args.compare else None
+    document = run(args.filter, args.min_time, args.repeat, suites=SUITES)
+    if args.output:
+        save(args.output, document)
+    if baseline is not None and compare(baseline, document, args.threshold):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""Outbound path benchmarks: send_json_message and broadcast_json.
+
+Clients are real logged-in ClientConnections on socketpairs, registered in
+server.core.state the way complete_login() does it, so the timed calls run
+the server's own encoding, queueing and write-coalescing code. Nothing
+reads the other end: the outboxes are cleared every few hundred calls, so
+OUTBOUND_QUEUE_MAX_BYTES and the slow-consumer checks never trigger. 1000
+clients need about 1000 file descriptors.
+"""
+
+import socket
+
+from benchmarks.bench_wire import CODECS, chat_data
+from benchmarks.runner import benchmark
+from server.config import OUTBOUND_QUEUE_MAX_BYTES, SLOW_CONSUMER_MAX_BYTES
+from server.core import state
+from server.core.connection import ClientConnection
+from server.core.protocol import broadcast_json, send_json_message
+
+# Codecs spread over the clients: everyone on JSON, or a mix that makes
+# broadcast_json encode once per wire format
+CODEC_MIXES = {"json": ["json"], "mixed": ["json", "binary", "binary+zlib"]}
+
+
+class Audience:
+    """A set of logged-in fake clients and their outbox housekeeping."""
+
+    def __init__(self, count, codecs, payload_size):
+        """Register `count` clients.
+
+        Args:
+            count: Number of clients
+            codecs: Codec names assigned round-robin
+            payload_size: Encoded size of one message, to pace queue clearing
+        """
+        self.conns = []
+        for index in range(count):
+            sock, peer = socket.socketpair()
+            peer.close()
+            sock.setblocking(False)
+            conn = ClientConnection(sock, ("benchmark", index))
+            conn.username = f"user{index}"
+            conn.use_codec(CODECS[codecs[index % len(codecs)]])
+            state.connections[sock] = conn
+            state.register_client(sock, conn.username)
+            self.conns.append(conn)
+        # Clear before a queue is full or big enough to count as a slow consumer
+        limit = min(OUTBOUND_QUEUE_MAX_BYTES, SLOW_CONSUMER_MAX_BYTES)
+        self.clear_every = max(1, limit // max(payload_size, 1) - 1)
+        self.calls = 0
+
+    def tick(self):
+        """Count one timed call and clear the outboxes when due."""
+        self.calls += 1
+        if self.calls >= self.clear_every:
+            self.calls = 0
+            for conn in self.conns:
+                conn.outbox.clear()
+                conn.queued_bytes = 0
+
+    def close(self):
+        for conn in self.conns:
+            state.unregister_client(conn.sock)
+            state.connections.pop(conn.sock, None)
+            state.loop.cancel_timer(conn.flush_timer)
+            state.loop.unregister(conn.sock)
+            conn.sock.close()
+
+
+@benchmark(size=["small", "large"])
+def send_json_message_one(size):
+    """Encode and queue one message for a single client."""
+    data = chat_data(size)
+    audience = Audience(1, ["json"], len(CODECS["json"].encode("CHAT", data)))
+    sock = audience.conns[0].sock
+
+    def send():
+        send_json_message(sock, "CHAT", data)
+        audience.tick()
+
+    try:
+        yield send
+    finally:
+        audience.close()
+
+
+@benchmark(clients=[10, 100, 1000], size=["small", "large"], codecs=list(CODEC_MIXES))
+def broadcast(clients, size, codecs):
+    """Fan one general chat message out to every logged-in client."""
+    data = chat_data(size)
+    audience = Audience(clients, CODEC_MIXES[codecs], len(CODECS["json"].encode("CHAT", data)))
+
+    def fan_out():
+        broadcast_json("CHAT", data)
+        audience.tick()
+
+    try:
+        yield fan_out
+    finally:
+        audience.close()
+
+
+@benchmark(members=[10, 100], clients=[1000])
+def broadcast_room(members, clients):
+    """Fan a room message out to its members only, out of all connected clients."""
+    data = chat_data("small")
+    audience = Audience(clients, ["json"], len(CODECS["json"].encode("CHAT", data)))
+    members = [conn.sock for conn in audience.conns[:members]]
+
+    def fan_out():
+        broadcast_json("CHAT", data, recipients=members)
+        audience.tick()
+
+    try:
+        yield fan_out
+    finally:
+        audience.close()
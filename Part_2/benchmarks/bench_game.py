@@ -0,0 +1,38 @@
+"""Tic-Tac-Toe rule and session benchmarks."""
+
+from benchmarks.runner import benchmark
+from common.tictactoe import TicTacToeGame
+from server.core.games import GameSession
+
+X, O = "X", "O"
+
+BOARDS = {
+    "empty": [None] * 9,
+    "midgame": [X, None, O, None, X, None, None, O, None],
+    "x_wins": [X, O, O, None, X, None, None, None, X],
+    "draw": [X, O, X, X, O, O, O, X, X],
+}
+
+# Moves of a full game ending in a draw, alternating X and O
+DRAW_GAME = (0, 1, 2, 4, 3, 5, 7, 6, 8)
+
+
+@benchmark(board=list(BOARDS))
+def get_winner(board):
+    game = TicTacToeGame()
+    game.board = list(BOARDS[board])
+    yield game.get_winner
+
+
+@benchmark()
+def session_full_game():
+    """Nine validated moves through GameSession.play(), as the server applies them."""
+    session = GameSession("frodo", X, "sam")
+    players = ("frodo", "sam")
+
+    def play():
+        session.assign("frodo", X, "sam")
+        for turn, cell in enumerate(DRAW_GAME):
+            session.play(players[turn % 2], cell)
+
+    yield play
@@ -0,0 +1,66 @@
+"""Message encoding, parsing and framing benchmarks."""
+
+from benchmarks.runner import benchmark
+from common.framing import FrameDecoder
+from common.wire import BINARY_CODEC, COMPRESSED_BINARY_CODEC, JSON_CODEC
+from server.core import protocol
+
+CODECS = {"json": JSON_CODEC, "binary": BINARY_CODEC, "binary+zlib": COMPRESSED_BINARY_CODEC}
+
+# Chat text length per message size fixture
+MESSAGE_SIZES = {"small": 32, "medium": 1024, "large": 16 * 1024}
+
+SAMPLE_TEXT = "One ring to rule them all, one ring to find them. "
+
+
+def chat_data(size):
+    """CHAT payload whose text is MESSAGE_SIZES[size] characters long."""
+    length = MESSAGE_SIZES[size]
+    text = (SAMPLE_TEXT * (length // len(SAMPLE_TEXT) + 1))[:length]
+    return {"sender": "frodo", "recipient": "general", "text": text, "seq": 123456}
+
+
+def frame_bodies(codec, payload):
+    """Split encoded bytes into frame bodies the way a receiver sees them."""
+    decoder = FrameDecoder(1 << 24)
+    decoder.set_length_prefixed(codec.length_prefixed)
+    decoder.feed(payload)
+    return [bytes(frame) for frame in decoder.frames()]
+
+
+@benchmark(codec=list(CODECS), size=list(MESSAGE_SIZES))
+def encode(codec, size):
+    encode = CODECS[codec].encode
+    data = chat_data(size)
+    yield lambda: encode("CHAT", data)
+
+
+@benchmark(codec=list(CODECS), size=list(MESSAGE_SIZES))
+def decode(codec, size):
+    codec = CODECS[codec]
+    (body,) = frame_bodies(codec, codec.encode("CHAT", chat_data(size)))
+    decode = codec.decode
+    yield lambda: decode(body)
+
+
+@benchmark(size=list(MESSAGE_SIZES))
+def parse_json_message(size):
+    raw = JSON_CODEC.encode("CHAT", chat_data(size)).strip()
+    parse = protocol.parse_json_message
+    yield lambda: parse(raw)
+
+
+@benchmark(codec=["json", "binary"], size=["small", "medium"], batch=[1, 64])
+def framing(codec, size, batch):
+    """Split one received buffer holding `batch` frames (one read's worth)."""
+    codec = CODECS[codec]
+    buffer = codec.encode("CHAT", chat_data(size)) * batch
+    decoder = FrameDecoder()
+    decoder.set_length_prefixed(codec.length_prefixed)
+
+    def split():
+        decoder.feed(buffer)
+        for _ in decoder.frames():
+            pass
+
+    yield split
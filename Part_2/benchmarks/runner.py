@@ -0,0 +1,188 @@
+"""Benchmark registry, timing and result comparison (stdlib timeit only).
+
+A benchmark is a generator function registered with @benchmark. Like a
+pytest fixture it sets up its inputs, yields the zero-argument callable to
+time, and tears down after the yield. Keyword lists passed to @benchmark
+form a parameter grid, and every combination is timed as its own case,
+named "module.function[key=value,...]" so results line up across commits.
+
+Each case is calibrated with timeit.Timer.autorange() to run for at least
+--min-time seconds per round, then timed for --repeat rounds; the fastest
+round is reported (the least disturbed by the rest of the machine) next to
+the median.
+
+Cases run inside a server EventLoop with state.loop set, so fan-out code
+sees the same single-threaded loop it runs on in the server.
+"""
+
+import itertools
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import timeit
+from datetime import datetime, timezone
+
+from server.core import state
+from server.core.event_loop import EventLoop
+
+# Registered benchmarks: (module.function, generator function, parameter grid)
+REGISTRY = []
+
+
+def benchmark(**params):
+    """Register a generator function as a benchmark over a parameter grid.
+
+    Args:
+        **params: Parameter name -> list of values to combine
+    """
+    def register(func):
+        group = func.__module__.rsplit(".", 1)[-1].removeprefix("bench_")
+        REGISTRY.append((f"{group}.{func.__name__}", func, params))
+        return func
+    return register
+
+
+def cases(pattern=None, suites=None):
+    """Yield (case name, function, kwargs) for every registered combination.
+
+    Args:
+        pattern: Only yield cases whose name contains this text
+        suites: Benchmark modules to take cases from, in order (default: all)
+    """
+    if suites is None:
+        registered = REGISTRY
+    else:
+        registered = [entry for suite in suites for entry in REGISTRY
+                      if entry[1].__module__ == suite.__name__]
+    for name, func, params in registered:
+        keys = list(params)
+        for values in itertools.product(*(params[key] for key in keys)):
+            kwargs = dict(zip(keys, values))
+            label = ",".join(f"{key}={value}" for key, value in kwargs.items())
+            case = f"{name}[{label}]" if label else name
+            if pattern is None or pattern in case:
+                yield case, func, kwargs
+
+
+def measure(func, kwargs, min_time, repeat):
+    """Set up one case, time it and tear it down.
+
+    Returns:
+        Result dictionary with per-call times in microseconds
+    """
+    fixture = func(**kwargs)
+    target = next(fixture)
+    try:
+        timer = timeit.Timer(target)
+        number, elapsed = timer.autorange()
+        if elapsed < min_time:
+            number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+        rounds = timer.repeat(repeat=repeat, number=number)
+    finally:
+        next(fixture, None)
+    per_call = [seconds / number * 1e6 for seconds in rounds]
+    best = min(per_call)
+    return {
+        "us_per_call": round(best, 4),
+        "median_us": round(statistics.median(per_call), 4),
+        "calls_per_s": round(1e6 / best, 1) if best else None,
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(pattern=None, min_time=0.2, repeat=5, report=print, suites=None):
+    """Run every matching case of the given suites on a server EventLoop.
+
+    Returns:
+        Results document: {"meta": {...}, "results": {case: result}}
+    """
+    results = {}
+
+    def run_all():
+        try:
+            for case, func, kwargs in cases(pattern, suites):
+                try:
+                    result = results[case] = measure(func, kwargs, min_time, repeat)
+                except Exception as exc:
+                    # One broken case (e.g. out of file descriptors) skips, not aborts
+                    results[case] = {"error": f"{type(exc).__name__}: {exc}"}
+                    report(f"{case:<60} {'ERROR':>12}  {exc}")
+                    continue
+                report(f"{case:<60} {result['us_per_call']:>12.3f} us"
+                       f"  (median {result['median_us']:.3f})")
+        finally:
+            state.loop.stop()
+
+    state.loop = EventLoop()
+    state.loop.call_soon_threadsafe(run_all)
+    state.loop.run_forever()
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+            "min_time": min_time,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold):
+    """Print per-case changes against a baseline results document.
+
+    Args:
+        baseline: Results document of the reference run
+        current: Results document of this run
+        threshold: Slowdown in percent reported as a regression
+
+    Returns:
+        Names of the cases that regressed
+    """
+    regressions = []
+    old_results = baseline.get("results", {})
+    print(f"\nCompared with {baseline.get('meta', {}).get('commit') or 'baseline'} "
+          f"(regression threshold {threshold:g}%):")
+    for case, result in current["results"].items():
+        old = old_results.get(case)
+        if "error" in result:
+            print(f"{case:<60} {'ERROR':>12}  {result['error']}")
+            continue
+        if old is None or "error" in old:
+            print(f"{case:<60} {'new':>12}")
+            continue
+        change = (result["us_per_call"] - old["us_per_call"]) / old["us_per_call"] * 100
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(case)
+        elif change < -threshold:
+            flag = "  faster"
+        print(f"{case:<60} {old['us_per_call']:>10.3f} -> {result['us_per_call']:.3f} us"
+              f" ({change:+.1f}%){flag}")
+    return regressions
+
+
+def load(path):
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def save(path, document):
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(document, file, indent=2)
+        file.write("\n")
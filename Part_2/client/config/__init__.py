@@ -3,6 +3,11 @@ from .config import (
     DISCOVERY_TIMEOUT,
     DISCOVERY_PREFIX,
     DISCOVERY_RETRY_INTERVAL,
+    STATUS_POLL_INTERVAL,
+    HISTORY_FETCH_LIMIT,
+    TRACE_FILE,
+    PROTOCOL_VERSION,
+    WIRE_ENCODINGS,
     ENV_HOST,
     ENV_PORT,
     USE_ENV_OVERRIDE,
@@ -27,6 +32,11 @@ __all__ = [
     "DISCOVERY_TIMEOUT",
     "DISCOVERY_PREFIX",
     "DISCOVERY_RETRY_INTERVAL",
+    "STATUS_POLL_INTERVAL",
+    "HISTORY_FETCH_LIMIT",
+    "TRACE_FILE",
+    "PROTOCOL_VERSION",
+    "WIRE_ENCODINGS",
     "ENV_HOST",
     "ENV_PORT",
     "USE_ENV_OVERRIDE",
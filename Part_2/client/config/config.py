@@ -15,6 +15,23 @@ DISCOVERY_TIMEOUT = 10
 DISCOVERY_PREFIX = "LOTP_SERVER|"
 DISCOVERY_RETRY_INTERVAL = int(os.environ.get("DISCOVERY_RETRY_INTERVAL", "2"))
 
+# Version sent in the LOGIN handshake frame; must match the server's
+PROTOCOL_VERSION = 1
+
+# Wire formats offered at login, most preferred first (server picks one)
+WIRE_ENCODINGS = [name.strip() for name in os.environ.get(
+    "WIRE_ENCODINGS", "binary+zlib,binary,json").split(",") if name.strip()]
+
+# Messages requested per HISTORY page when a chat is first shown
+HISTORY_FETCH_LIMIT = int(os.environ.get("HISTORY_FETCH_LIMIT", "50"))
+
+# Chat latency tracing: path of the JSON-lines trace log (see
+# client.core.tracing); empty turns tracing off
+TRACE_FILE = os.environ.get("TRACE_FILE", "")
+
+# Seconds between STATUS health probes while on the login screen
+STATUS_POLL_INTERVAL = float(os.environ.get("STATUS_POLL_INTERVAL", "2"))
+
 # Server connection configuration with environment variable overrides
 ENV_HOST = os.environ.get("HOST")
 # Default to 9000 if not specified
@@ -1,7 +1,8 @@
-from . import state
-from .protocol import send_json_message, parse_json_message
+from . import state, tracing
+from .protocol import parse_json_message, receive_messages, send_json_message
 from .discovery import (
     find_server,
+    query_server_status,
     restart_discovery,
     server_online,
     start_discovery,
@@ -12,9 +13,12 @@ from .discovery import (
 
 __all__ = [
     "state",
+    "tracing",
     "send_json_message",
     "parse_json_message",
+    "receive_messages",
     "find_server",
+    "query_server_status",
     "restart_discovery",
     "server_online",
     "start_discovery",
@@ -4,6 +4,7 @@ Implements UDP-based broadcast discovery to automatically locate the server
 on the local network, with fallback to environment variables or localhost.
 """
 
+import json
 import os
 import select
 import socket
@@ -158,3 +159,36 @@ def server_online():
         return True
     except Exception:
         return False
+
+
+def query_server_status(host, port, timeout=2.0):
+    """Ask the server for its health status with a one-shot STATUS probe.
+
+    Connects, sends a single STATUS frame, reads the one-line reply and
+    closes, so no connection is kept open while the user sits on the login
+    screen.
+
+    Args:
+        host: Server host
+        port: Server TCP port
+        timeout: Seconds to wait for connect and reply
+
+    Returns:
+        Status data dict (e.g. {"online": True, "users": 3}), or None if unreachable
+    """
+    try:
+        with socket.create_connection((host, port), timeout=timeout) as sock:
+            sock.sendall((json.dumps({"type": "STATUS", "data": {}}) + "\n").encode())
+            reply = b""
+            while b"\n" not in reply:
+                chunk = sock.recv(1024)
+                if not chunk:
+                    break
+                reply += chunk
+    except Exception:
+        return None
+
+    parsed = parse_json_message(reply.split(b"\n", 1)[0].decode(errors="ignore"))
+    if parsed and parsed.get("type") == "STATUS":
+        return parsed.get("data", {})
+    return None
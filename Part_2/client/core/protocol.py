@@ -1,28 +1,29 @@
 """Client-side network protocol utilities for Lord of the Pings.
 
-Provides functions to send and receive JSON-formatted messages over sockets,
-enabling structured communication with the server.
+Provides functions to send and receive messages over sockets, enabling
+structured communication with the server. Messages use newline JSON until the
+server's LOGIN_OK selects another wire format (see common.wire).
 """
 
 import json
 
 from client.core import state
+from common.wire import CODECS, JSON_CODEC
 
 
 def send_json_message(sock, msg_type, data):
-    """Send a JSON-encoded message through the socket.
+    """Send a message through the socket in the session's wire format.
 
     Args:
         sock: Socket to send through
         msg_type: Type/command of the message (e.g., "CHAT", "GAME_MOVE")
-        data: Dictionary of message data to be JSON-encoded
+        data: Dictionary of message data
 
     Raises:
         Exception: On socket errors (logged but not re-raised)
     """
     try:
-        payload = {"type": msg_type, "data": data}
-        sock.sendall((json.dumps(payload) + "\n").encode())
+        sock.sendall(state.wire_codec.encode(msg_type, data))
     except Exception as exc:
         print(f"Error sending JSON message: {exc}")
 
@@ -31,7 +32,7 @@ def parse_json_message(raw_string):
     """Parse a JSON message string.
 
     Args:
-        raw_string: Raw string to parse
+        raw_string: Raw string (or UTF-8 bytes) to parse
 
     Returns:
         Dictionary with parsed JSON, or None if parsing fails
@@ -40,3 +41,37 @@ def parse_json_message(raw_string):
         return json.loads(raw_string)
     except Exception:
         return None
+
+
+def receive_messages(sock, decoder):
+    """Block until the socket has data and return the messages it completed.
+
+    Args:
+        sock: Connected socket to read from
+        decoder: FrameDecoder holding any partial frame from earlier reads
+
+    A LOGIN_OK frame switches the session (state.wire_codec and the
+    decoder's framing) to the encoding it names, starting with the next frame.
+
+    Returns:
+        List of parsed message dictionaries (possibly empty); malformed
+        frames are skipped
+
+    Raises:
+        ConnectionError: If the server closed the connection
+        FrameTooLarge: If the server sent an oversized frame
+        OSError: On socket errors or timeouts
+    """
+    if not decoder.recv_into(sock):
+        raise ConnectionError("server closed the connection")
+    messages = []
+    for frame in decoder.frames():
+        parsed = state.wire_codec.decode(frame, decoder.max_frame_size)
+        if not parsed:
+            continue
+        messages.append(parsed)
+        if parsed.get("type") == "LOGIN_OK":
+            encoding = (parsed.get("data") or {}).get("encoding")
+            state.wire_codec = CODECS.get(encoding, JSON_CODEC)
+            decoder.set_length_prefixed(state.wire_codec.length_prefixed)
+    return messages
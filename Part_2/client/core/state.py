@@ -4,9 +4,19 @@ Maintains global state about server discovery, connection details, and user
 avatars that need to be accessible across multiple modules and screens.
 """
 
+from client.config.paths import AVATARS_DIR
+from common.avatars import AvatarCatalog
+from common.wire import JSON_CODEC
+
+# Wire format of the current server session (switched after LOGIN_OK)
+wire_codec = JSON_CODEC
+
 # Cached avatar assignments for all users (maps username -> avatar filename)
 user_avatars = {}
 
+# Avatar files offered by the picker, rescanned only when the directory changes
+avatar_catalog = AvatarCatalog(AVATARS_DIR)
+
 # Server connection information discovered via broadcast or environment
 HOST = None
 SERVER_PORT = None
@@ -0,0 +1,138 @@
+"""End-to-end latency tracing of chat messages.
+
+When TRACE_FILE is set, every CHAT this client sends carries a "trace"
+object with an id and the send time; the server adds when it read the
+message (server_in) and when it queued it for the recipients (server_out).
+The receiving client stamps when its network thread got the frame and when
+Kivy's Clock ran route_json_message for it, and splits the delay into hops:
+
+- uplink: sender -> server read (network plus the server's read queue)
+- server: server read -> fan-out (dispatch, history write, backplane)
+- downlink: fan-out -> receiver socket (coalescing, slow queues, network)
+- clock_queue: receiver socket -> UI thread (Kivy's Clock backlog)
+- total: sender -> UI thread
+
+Timestamps are integer microseconds of the wall clock, so uplink and
+downlink include the clock offset between machines (run NTP, or trace on
+one host); server and clock_queue are measured on a single clock.
+
+Each traced message is appended to TRACE_FILE as a JSON line, and a
+percentile summary per hop is appended when the client exits.
+"""
+
+import atexit
+import json
+import threading
+import time
+import uuid
+from collections import deque
+
+from client.config import TRACE_FILE
+
+HOPS = ("uplink", "server", "downlink", "clock_queue", "total")
+
+# Most recent samples per hop (milliseconds) for the exit summary
+SAMPLES_KEPT = 10000
+
+_samples = {hop: deque(maxlen=SAMPLES_KEPT) for hop in HOPS}
+_lock = threading.Lock()
+_file = None
+
+
+def enabled():
+    """Return True if this client traces chat messages."""
+    return bool(TRACE_FILE)
+
+
+def now_us():
+    """Wall-clock time in integer microseconds, the unit of every trace field."""
+    return time.time_ns() // 1000
+
+
+def new_trace():
+    """Return the trace object for an outgoing CHAT, or None when tracing is off."""
+    if not TRACE_FILE:
+        return None
+    return {"id": uuid.uuid4().hex[:16], "client_ts": now_us()}
+
+
+def mark_received(msg_obj):
+    """Stamp a traced CHAT as it comes off the socket (network thread)."""
+    if not TRACE_FILE or msg_obj.get("type") != "CHAT":
+        return
+    data = msg_obj.get("data")
+    trace = data.get("trace") if isinstance(data, dict) else None
+    if isinstance(trace, dict):
+        trace["recv"] = now_us()
+
+
+def record(data):
+    """Close the trace of a CHAT being handled on the UI thread and log its hops.
+
+    Args:
+        data: The CHAT message's data, stamped earlier by mark_received()
+    """
+    trace = data.get("trace")
+    if not TRACE_FILE or not isinstance(trace, dict) or "recv" not in trace:
+        return
+    routed = now_us()
+    stamps = [trace.get(field) for field in ("client_ts", "server_in", "server_out")]
+    if not all(isinstance(stamp, int) for stamp in stamps):
+        return
+    client_ts, server_in, server_out = stamps
+    recv = trace["recv"]
+    hops = {
+        "uplink": server_in - client_ts,
+        "server": server_out - server_in,
+        "downlink": recv - server_out,
+        "clock_queue": routed - recv,
+        "total": routed - client_ts,
+    }
+    hops = {hop: value / 1000 for hop, value in hops.items()}
+    for hop, value in hops.items():
+        _samples[hop].append(value)
+    _write({"id": trace.get("id"), "chat_id": data.get("recipient"),
+            "sender": data.get("sender"), "ms": hops})
+
+
+def _percentile(values, fraction):
+    return round(values[min(len(values) - 1, int(fraction * len(values)))], 3)
+
+
+def summary():
+    """Per-hop count and percentiles (milliseconds) of the kept samples."""
+    result = {}
+    for hop in HOPS:
+        values = sorted(_samples[hop])
+        if not values:
+            continue
+        result[hop] = {"count": len(values), "p50": _percentile(values, 0.5),
+                       "p90": _percentile(values, 0.9), "p99": _percentile(values, 0.99),
+                       "max": round(values[-1], 3)}
+    return result
+
+
+def _write(entry):
+    global _file
+    with _lock:
+        try:
+            if _file is None:
+                _file = open(TRACE_FILE, "a", encoding="utf-8", buffering=1)
+                atexit.register(close)
+            _file.write(json.dumps(entry) + "\n")
+        except Exception as exc:
+            print(f"Error writing trace file: {exc}")
+
+
+def close():
+    """Append the per-hop summary and close the trace file."""
+    global _file
+    with _lock:
+        if _file is None:
+            return
+        try:
+            _file.write(json.dumps({"summary": summary()}) + "\n")
+            _file.close()
+        except Exception:
+            pass
+        _file = None
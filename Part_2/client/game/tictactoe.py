@@ -1,7 +1,8 @@
 """Tic-Tac-Toe game implementation for Lord of the Pings.
 
-Contains game logic (TicTacToeGame class) and the game UI screen (GameScreen).
-Handles game state, move validation, win conditions, and networked gameplay.
+Contains the game UI screen (GameScreen); the rules (TicTacToeGame) live in
+common.tictactoe and the server holds the authoritative board. Handles
+display, local input and networked gameplay.
 """
 
 import random
@@ -21,77 +22,7 @@ from kivy.uix.widget import Widget
 from client.config.constants import BASE_BG, DARK_BG2, OTHER_COLOR, OWN_COLOR, TEXT_PRIMARY
 from client.core.protocol import send_json_message
 from client.widgets.styled_button import StyledButton
-
-
-class TicTacToeGame:
-    """Core Tic-Tac-Toe game logic.
-
-    Manages board state, move validation, current player tracking, and win detection.
-    Board is represented as a list of 9 cells (3x3 grid), indexed 0-8.
-    """
-
-    def __init__(self):
-        """Initialize game with empty board and default state."""
-        self.board = [None] * 9
-        self.current_player = "X"
-        self.game_over = False
-        self.winner = None
-        self.move_count = 0
-
-    def is_valid_move(self, cell):
-        """Check if a move is valid for the given cell."""
-        return 0 <= cell < 9 and self.board[cell] is None
-
-    def make_move(self, cell, player):
-        """Make a move on the board.
-
-        Args:
-            cell: Cell index (0-8) to place move
-            player: Player symbol ("X" or "O")
-
-        Returns:
-            True if move was successful, False otherwise
-        """
-        if not self.is_valid_move(cell):
-            return False
-        self.board[cell] = player
-        self.move_count += 1
-        return True
-
-    def get_winner(self):
-        """Determine game state.
-
-        Returns:
-            "X" if X wins, "O" if O wins, "DRAW" if board full, None if ongoing
-        """
-        winning_combos = [
-            [0, 1, 2],
-            [3, 4, 5],
-            [6, 7, 8],
-            [0, 3, 6],
-            [1, 4, 7],
-            [2, 5, 8],
-            [0, 4, 8],
-            [2, 4, 6],
-        ]
-
-        for combo in winning_combos:
-            a, b, c = combo
-            if self.board[a] is not None and self.board[a] == self.board[b] == self.board[c]:
-                return self.board[a]
-
-        if None not in self.board:
-            return "DRAW"
-
-        return None
-
-    def reset(self):
-        """Reset the game to initial state."""
-        self.board = [None] * 9
-        self.current_player = "X"
-        self.game_over = False
-        self.winner = None
-        self.move_count = 0
+from common.tictactoe import TicTacToeGame
 
 
 class GameScreen(Screen):
@@ -201,19 +132,16 @@ class GameScreen(Screen):
         if self.game.make_move(cell, self.player_symbol):
             self.update_board()
 
-            result = self.game.get_winner()
-            if result:
+            if self.game.get_winner():
+                # Block input; the server confirms the result with GAME_END
                 self.game.game_over = True
-                self.send_game_move(cell)
-                self.handle_game_end(result)
-                return
-
-            self.game.current_player = self.opponent_symbol
-            self.update_status()
+            else:
+                self.game.current_player = self.opponent_symbol
+                self.update_status()
             self.send_game_move(cell)
 
     def send_game_move(self, cell):
-        """Send move to opponent through chat."""
+        """Send the played cell to the server, which validates and relays it."""
         if not self.chat_screen:
             return
 
@@ -221,46 +149,24 @@ class GameScreen(Screen):
             send_json_message(
                 self.chat_screen.main_screen.sock,
                 "GAME_MOVE",
-                {
-                    "board": self.game.board,
-                    "current_player": self.game.current_player,
-                    "opponent": self.opponent_name,
-                },
+                {"cell": cell, "opponent": self.opponent_name},
             )
         except Exception:
             pass
 
-    def handle_game_end(self, result):
-        """Handle game end."""
-        if result == "DRAW":
-            self.ids.game_status_label.text = "It's a Tie!"
-            status_msg = "DRAW"
-        elif result == self.player_symbol:
-            self.ids.game_status_label.text = "You Won!"
-            self.player_score += 1
-            status_msg = "WON"
-        else:
-            self.ids.game_status_label.text = "You Lost!"
-            self.opponent_score += 1
-            status_msg = "LOST"
-
-        self.update_score()
-        self.record_result(status_msg)
-
-        self.ids.new_game_btn.opacity = 1
-        self.ids.new_game_btn.disabled = False
-
-        if self.chat_screen:
-            try:
-                send_json_message(
-                    self.chat_screen.main_screen.sock,
-                    "GAME_END",
-                    {"result": result, "opponent": self.opponent_name},
-                )
-            except Exception:
-                pass
+    def request_sync(self):
+        """Ask the server for the authoritative board (answered by GAME_STATE)."""
+        if not self.chat_screen:
+            return
 
-        self.show_game_end_popup(status_msg)
+        try:
+            send_json_message(
+                self.chat_screen.main_screen.sock,
+                "GAME_SYNC",
+                {"opponent": self.opponent_name},
+            )
+        except Exception:
+            pass
 
     def update_board(self):
         """Update board display using X/O images."""
@@ -461,8 +367,8 @@ class GameScreen(Screen):
         close_btn.bind(on_press=popup.dismiss)
         popup.open()
 
-    def receive_opponent_game_end(self, winner_symbol, show_popup=True):
-        """Receive opponent's game end result."""
+    def receive_game_end(self, winner_symbol, show_popup=True):
+        """Apply the game result decided by the server."""
         try:
             self.game.game_over = True
 
@@ -515,21 +421,43 @@ class GameScreen(Screen):
             except Exception:
                 pass
 
-    def receive_opponent_move(self, board_str, current_player):
-        """Receive and process opponent's move."""
+    def receive_move(self, cell, symbol, current_player):
+        """Apply a move delta confirmed by the server.
+
+        The player's own moves come back too and are already on the board.
+        A delta that contradicts the local board triggers a resync.
+        """
         if self.game.game_over:
             return
+        if not isinstance(cell, int) or not 0 <= cell < 9:
+            return
 
-        try:
-            board_str = board_str.replace("None", "None")
-            board_list = eval(board_str)
+        if self.game.board[cell] is None:
+            self.game.board[cell] = symbol
+            self.game.move_count += 1
+        elif self.game.board[cell] != symbol:
+            self.request_sync()
+            return
+        self.game.current_player = current_player
+
+        self.update_board()
+        self.update_status()
 
-            self.game.board = board_list
-            self.game.move_count = sum(
-                1 for cell in board_list if cell is not None)
-            self.game.current_player = current_player
+    def receive_game_state(self, data):
+        """Replace the local game with the server's snapshot (GAME_STATE)."""
+        board = data.get("board")
+        if not isinstance(board, list) or len(board) != 9:
+            return
 
-            self.update_board()
-            self.update_status()
-        except Exception:
-            pass
+        self.game.board = board
+        self.game.move_count = sum(1 for cell in board if cell is not None)
+        self.game.current_player = data.get("current_player", "X")
+        self.game.winner = data.get("winner")
+        self.game.game_over = self.game.winner is not None
+        symbol = data.get("symbol")
+        if symbol in ("X", "O"):
+            self.player_symbol = symbol
+            self.opponent_symbol = "O" if symbol == "X" else "X"
+
+        self.update_board()
+        self.update_status()
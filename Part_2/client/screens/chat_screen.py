@@ -1,6 +1,6 @@
 """Chat screen for Lord of the Pings client.
 
-Manages display and sending of messages (general chat or private messages),
+Manages display and sending of messages (general chat, rooms or private messages),
 game invitations, system notifications, and tic-tac-toe gameplay within
 conversation context. Handles message rendering with avatars and timestamps.
 """
@@ -18,7 +18,7 @@ from kivy.uix.scrollview import ScrollView
 from kivy.uix.screenmanager import Screen
 from kivy.uix.widget import Widget
 
-from client.core import state
+from client.core import state, tracing
 from client.config.constants import ALERT_COLOR, OTHER_COLOR, OWN_COLOR, SYSTEM_COLOR, TEXT_PRIMARY, TEXT_HINT
 from client.config.paths import AVATARS_DIR
 from client.core.protocol import send_json_message
@@ -48,14 +48,15 @@ class ChatScreen(Screen):
         """Load and display a specific chat room.
 
         Args:
-            chat_id: ID of the chat ("general" or username for private)
+            chat_id: ID of the chat ("general", "#room" or username for private)
             main_screen: Reference to the main screen for context
         """
         self.chat_id = chat_id
         self.main_screen = main_screen
         self.has_pending_invite = False
 
-        if chat_id != "general" and main_screen:
+        is_private = chat_id != "general" and not chat_id.startswith("#")
+        if is_private and main_screen:
             record = main_screen.game_records.get(
                 chat_id, {"wins": 0, "losses": 0})
             self.wins = record.get("wins", 0)
@@ -80,7 +81,6 @@ class ChatScreen(Screen):
             main_screen.username, avatar_source)
         self.ids.user_bubble_widget.on_press_callback = self.main_screen.open_avatar_picker
 
-        is_private = chat_id != "general"
         self.ids.invite_container.opacity = 1 if is_private else 0
         self.ids.invite_container.disabled = not is_private
         if is_private:
@@ -125,7 +125,7 @@ class ChatScreen(Screen):
 
     def update_invite_stats(self):
         """Refresh the win/loss display for this private chat."""
-        if not self.main_screen or self.chat_id == "general":
+        if not self.main_screen or self.chat_id == "general" or self.chat_id.startswith("#"):
             self.invite_stats_text = ""
             return
         self.invite_stats_text = f"{self.wins}/{self.losses}"
@@ -349,6 +349,8 @@ class ChatScreen(Screen):
         if not text.strip():
             return
         self.ids.message_input.text = ""
+        if text.strip().startswith("/") and self.run_command(text.strip()):
+            return
 
         if self.chat_id not in self.main_screen.chats:
             self.main_screen.chats[self.chat_id] = {
@@ -361,16 +363,16 @@ class ChatScreen(Screen):
         self.add_message_bubble(self.main_screen.username,
                                 text.strip(), is_own=True, kind="chat")
 
+        data = {
+            "sender": self.main_screen.username,
+            "recipient": self.chat_id,
+            "text": text.strip(),
+        }
+        trace = tracing.new_trace()
+        if trace is not None:
+            data["trace"] = trace
         try:
-            send_json_message(
-                self.main_screen.sock,
-                "CHAT",
-                {
-                    "sender": self.main_screen.username,
-                    "recipient": self.chat_id,
-                    "text": text.strip(),
-                },
-            )
+            send_json_message(self.main_screen.sock, "CHAT", data)
         except Exception:
             self.main_screen.on_disconnected()
 
@@ -427,13 +429,39 @@ class ChatScreen(Screen):
         if self.ids.chat_box.height > self.ids.chat_scroll.height:
             self.ids.chat_scroll.scroll_y = 0
 
+    def run_command(self, text):
+        """Handle room commands typed into the message box.
+
+        Supported: /join <room>, /create <room>, /leave [room], /rooms.
+
+        Returns:
+            True if text was a command (and must not be sent as a message)
+        """
+        command, _, argument = text.partition(" ")
+        argument = argument.strip()
+        if command == "/join" and argument:
+            msg_type, data = "ROOM_JOIN", {"room": argument}
+        elif command == "/create" and argument:
+            msg_type, data = "ROOM_CREATE", {"room": argument}
+        elif command == "/leave" and (argument or self.chat_id.startswith("#")):
+            msg_type, data = "ROOM_LEAVE", {"room": argument or self.chat_id}
+        elif command == "/rooms":
+            msg_type, data = "ROOM_LIST", {}
+        else:
+            return False
+        try:
+            send_json_message(self.main_screen.sock, msg_type, data)
+        except Exception:
+            self.main_screen.on_disconnected()
+        return True
+
     def go_back(self):
         """Navigate back to the main chat list screen."""
         self.manager.current = "main"
 
     def send_game_invite(self):
         """Send a game invite to the user in this private chat."""
-        if self.chat_id == "general":
+        if self.chat_id == "general" or self.chat_id.startswith("#"):
             return
 
         if self.main_screen:
@@ -4,6 +4,7 @@ Handles server discovery, connection, and user authentication. Performs
 server connectivity checks and manages the initial connection flow.
 """
 
+import json
 import socket
 import threading
 from datetime import datetime
@@ -20,14 +21,17 @@ from kivy.uix.popup import Popup
 from kivy.uix.screenmanager import Screen
 from kivy.uix.textinput import TextInput
 
-from client.core import state
+from client.core import state, tracing
 from client.config.constants import ALERT_COLOR, BASE_BG, DARK_BG2, OWN_COLOR, TEXT_PRIMARY
-from client.core.discovery import stop_discovery, restart_discovery
-from client.core.protocol import parse_json_message
-
-# Global status socket - created when entering login screen, closed when leaving
-_status_socket = None
-_status_socket_connected = False
+from client.config.config import PROTOCOL_VERSION, STATUS_POLL_INTERVAL, WIRE_ENCODINGS
+from client.core.discovery import query_server_status, restart_discovery, stop_discovery
+from client.core.protocol import receive_messages
+from common.framing import FrameDecoder
+from common.wire import JSON_CODEC
+
+# Server health as seen by the STATUS poller - refreshed while on the login screen
+_server_online = False
+_server_status = None
 _status_check_thread = None
 _stop_status_check = False
 
@@ -51,34 +55,27 @@ class LoginScreen(Screen):
         if _status_check_thread is None or not _status_check_thread.is_alive():
             _stop_status_check = False
             _status_check_thread = threading.Thread(
-                target=self.maintain_status_socket, daemon=True)
+                target=self.poll_server_status, daemon=True)
             _status_check_thread.start()
         Clock.schedule_once(lambda dt: setattr(
             self.ids.username_input, "focus", True), 0.2)
 
     def on_leave(self):
-        """Clean up scheduled tasks and stop status socket when leaving login screen."""
+        """Clean up scheduled tasks and stop status polling when leaving login screen."""
         Clock.unschedule(self.check_status)
-        self.stop_status_socket()
+        self.stop_status_polling()
 
-    def _close_status_socket_only(self):
-        """Close the status socket without stopping the monitoring thread.
+    def _reset_server_status(self):
+        """Forget the last probe result so the next poll re-checks the server.
 
-        Used when switching servers to allow reconnection to new address.
+        Used when switching servers so a stale ONLINE state is not shown.
         """
-        global _status_socket, _status_socket_connected
+        global _server_online, _server_status
+        _server_online = False
+        _server_status = None
 
-        # Close socket
-        if _status_socket:
-            try:
-                _status_socket.close()
-            except Exception:
-                pass
-            _status_socket = None
-        _status_socket_connected = False
-
-    def stop_status_socket(self):
-        """Stop the status monitoring socket and thread.
+    def stop_status_polling(self):
+        """Stop the status polling thread.
 
         Used when leaving login screen to completely shut down monitoring.
         """
@@ -86,80 +83,41 @@ class LoginScreen(Screen):
 
         # Signal thread to stop
         _stop_status_check = True
+        self._reset_server_status()
 
-        # Close socket
-        self._close_status_socket_only()
-
-    def maintain_status_socket(self):
-        """Maintain a persistent status socket to monitor server connectivity.
+    def poll_server_status(self):
+        """Periodically probe the server with a one-shot STATUS request.
 
-        Creates ONE socket when server is available and keeps it alive.
-        Only recreates if the socket breaks (server goes down).
+        Each probe opens a short-lived connection that the server answers and
+        closes, so no idle socket is parked on the server while the user is on
+        the login screen.
         """
         import time
-        global _status_socket, _status_socket_connected, _stop_status_check
+        global _server_online, _server_status
 
         while not _stop_status_check:
-            # Only try to create socket if we don't have one
-            if not _status_socket_connected:
-                if state.HOST and state.SERVER_PORT:
-                    try:
-                        sock = socket.socket(
-                            socket.AF_INET, socket.SOCK_STREAM)
-                        sock.settimeout(2.0)
-                        sock.connect((state.HOST, state.SERVER_PORT))
-
-                        # Connection successful - mark as connected
-                        _status_socket = sock
-                        _status_socket_connected = True
-
-                        # Set socket to non-blocking for monitoring
-                        sock.setblocking(False)
-
-                        # Now monitor this socket - it stays alive until server dies
-                        while not _stop_status_check:
-                            # Check if socket was closed externally (e.g., manual override)
-                            if _status_socket is None:
-                                break
-
-                            try:
-                                # Try to peek at socket to see if it's still alive
-                                data = sock.recv(1, socket.MSG_PEEK)
-                                if not data:
-                                    # Socket closed by server
-                                    break
-                            except BlockingIOError:
-                                # No data available, socket still alive
-                                pass
-                            except Exception as e:
-                                # Socket error, connection lost
-                                break
-
-                            time.sleep(0.5)
-
-                        # Socket broke - close and mark as disconnected
-                        self._close_status_socket_only()
-                        # Restart discovery to find server again (unless manual override)
-                        if not state.manual_override_mode:
-                            restart_discovery()
-
-                    except Exception as e:
-                        # Connection failed (server not available)
-                        self._close_status_socket_only()
-                        # Wait longer before retry to reduce SYN packet spam
-                        time.sleep(3)
-                else:
-                    # No server configured yet
-                    time.sleep(0.5)
-            else:
-                # Socket is connected, just wait
+            if not (state.HOST and state.SERVER_PORT):
+                # No server configured yet
                 time.sleep(0.5)
+                continue
+
+            status = query_server_status(state.HOST, state.SERVER_PORT)
+            if status is not None:
+                _server_status = status
+                _server_online = True
+            else:
+                was_online = _server_online
+                self._reset_server_status()
+                # Server went away - restart discovery to find it again (unless manual override)
+                if was_online and not state.manual_override_mode:
+                    restart_discovery()
+
+            time.sleep(STATUS_POLL_INTERVAL)
 
     def check_status(self, _dt):
-        """Check current socket status and update UI."""
-        global _status_socket_connected
+        """Check current server status and update UI."""
         Clock.schedule_once(
-            lambda dt: self.update_label(_status_socket_connected))
+            lambda dt: self.update_label(_server_online))
 
     def update_label(self, online):
         """Update server status label based on connectivity."""
@@ -167,9 +125,12 @@ class LoginScreen(Screen):
             self.ids.server_status_lbl.text = "ONLINE"
             self.ids.server_status_lbl.color = OWN_COLOR
             self.can_login = True
-            # Update server info label with IP and port
+            # Update server info label with IP, port and current load
             if state.HOST and state.SERVER_PORT:
-                self.ids.server_info_lbl.text = f"Server: {state.HOST}:{state.SERVER_PORT}"
+                info = f"Server: {state.HOST}:{state.SERVER_PORT}"
+                if _server_status and "users" in _server_status:
+                    info += f" ({_server_status['users']} online)"
+                self.ids.server_info_lbl.text = info
         else:
             self.ids.server_status_lbl.text = "OFFLINE"
             self.ids.server_status_lbl.color = ALERT_COLOR
@@ -485,8 +446,8 @@ class LoginScreen(Screen):
 
     def reset_manual_override(self, popup):
         """Clear manual override and restart discovery."""
-        # Close old status socket so it can reconnect to discovered server
-        self._close_status_socket_only()
+        # Forget old status so it is re-probed against the discovered server
+        self._reset_server_status()
 
         state.manual_override_mode = False
         state.manual_override_ip = None
@@ -582,8 +543,8 @@ class LoginScreen(Screen):
 
     def finalize_manual_override(self, ip, port, popup):
         """Finalize manual override after successful connection test."""
-        # Close old status socket so it reconnects to new manual override address
-        self._close_status_socket_only()
+        # Forget old status so it is re-probed against the new manual override address
+        self._reset_server_status()
 
         # Set manual override state
         state.manual_override_mode = True
@@ -635,93 +596,101 @@ class LoginScreen(Screen):
 
         self.ids.error_label.text = ""
 
-        # Check if status socket is connected (server is online)
-        global _status_socket_connected
-        if not _status_socket_connected:
+        # Check the last health probe (server is online)
+        if not _server_online:
             self.show_server_offline_popup()
             return
 
         app = App.get_running_app()
-        prebuffer = b""
+        decoder = FrameDecoder()
+        initial = []
         try:
-            # Drop the status socket so the next connect is the real login socket
-            self._close_status_socket_only()
-
-            # Connect to server and send username
+            # Connect to server and send the versioned LOGIN handshake frame
             app.sock = socket.create_connection(
                 (state.HOST, state.SERVER_PORT), timeout=2.0
             )
-            # Send username with a newline to guarantee the server reads it immediately
-            app.sock.sendall((username + "\n").encode())
-            app.sock.settimeout(0.4)
+            state.wire_codec = JSON_CODEC
+            login_frame = {"type": "LOGIN", "data": {
+                "version": PROTOCOL_VERSION, "username": username,
+                "encodings": WIRE_ENCODINGS}}
+            app.sock.sendall((json.dumps(login_frame) + "\n").encode())
+
+            # The server answers LOGIN_OK / LOGIN_REJECTED immediately
+            while not initial:
+                initial = receive_messages(app.sock, decoder)
 
             # Receive initial messages (user list, avatars)
-            chunks = []
+            app.sock.settimeout(0.4)
             while True:
                 try:
-                    chunk = app.sock.recv(1024)
-                    if not chunk:
-                        break
-                    chunks.append(chunk)
-                except socket.timeout:
+                    initial += receive_messages(app.sock, decoder)
+                except (socket.timeout, ConnectionError):
                     break
-            prebuffer = b"".join(chunks)
             app.sock.settimeout(None)
         except Exception as exc:
             self.show_server_offline_popup()
             print("Connection error:", exc)
             return
 
-        # Check for username conflict
-        if prebuffer:
-            premsg = prebuffer.decode(errors="ignore").strip()
-            if "Username already taken" in premsg:
-                try:
-                    app.sock.close()
-                except Exception:
-                    pass
-                app.sock = None
+        reply = initial.pop(0)
+        if reply.get("type") != "LOGIN_OK":
+            try:
+                app.sock.close()
+            except Exception:
+                pass
+            app.sock = None
+            reason = reply.get("data", {}).get("reason")
+            if reason == "USERNAME_TAKEN":
                 self.show_username_taken_popup()
-                return
+            elif reply.get("type") == "LOGIN_REJECTED":
+                self.ids.error_label.text = reply.get(
+                    "data", {}).get("text", "Login rejected")
+            else:
+                self.show_server_offline_popup()
+            return
 
         # Initialize main screen with connection and user data
         main = self.manager.get_screen("main")
         main.reset_chat_data()
         main.username = username
         main.sock = app.sock
+        main.decoder = decoder
 
         # Parse initial messages from server
         userlist_names = []
-        if prebuffer:
-            buffer_str = premsg
-            while "\n" in buffer_str:
-                line, buffer_str = buffer_str.split("\n", 1)
-                line = line.strip()
-                if not line:
-                    continue
-
-                parsed = parse_json_message(line)
-                if parsed:
-                    msg_type = parsed.get("type", "")
-                    data = parsed.get("data", {})
-                    if msg_type == "USERLIST":
-                        userlist_names = data.get("users", [])
-                    elif msg_type == "AVATAR":
-                        uname = data.get("username", "")
-                        avatar = data.get("avatar", "")
-                        if uname and avatar:
-                            state.user_avatars[uname] = avatar
-                    elif msg_type == "SYSTEM":
-                        pass
-
-            if userlist_names:
-                Clock.schedule_once(
-                    lambda dt: main.update_user_buttons(userlist_names), 0.1)
-
-        if not userlist_names:
-            Clock.schedule_once(lambda dt: main.update_user_buttons([]), 0.1)
+        later = []
+        for parsed in initial:
+            msg_type = parsed.get("type", "")
+            data = parsed.get("data", {})
+            if msg_type == "USERLIST":
+                userlist_names = data.get("users", [])
+            elif msg_type == "AVATAR":
+                uname = data.get("username", "")
+                avatar = data.get("avatar", "")
+                if uname and avatar:
+                    state.user_avatars[uname] = avatar
+            elif msg_type == "AVATARS":
+                state.user_avatars.update(data.get("avatars") or {})
+            else:
+                later.append(parsed)
+
+        Clock.schedule_once(
+            lambda dt: main.update_user_buttons(userlist_names), 0.1)
+
+        # Chats and notices that arrived with the login burst are newer than
+        # general_seq, so the history backfill will not bring them back; route
+        # them like live messages, queued before anything the listener reads
+        for parsed in later:
+            tracing.mark_received(parsed)
+            Clock.schedule_once(
+                lambda dt, msg=parsed: main.route_json_message(msg))
 
         stop_discovery()
         # Start background thread to listen for incoming messages
         threading.Thread(target=main.listen_to_server, daemon=True).start()
+
+        # Fetch the general chat messages sent before this login
+        general_seq = reply.get("data", {}).get("general_seq")
+        if isinstance(general_seq, int) and general_seq > 0:
+            main.request_history("general", before=general_seq + 1)
         self.manager.current = "main"
@@ -23,11 +23,13 @@ from kivy.uix.screenmanager import Screen
 from kivy.uix.scrollview import ScrollView
 from kivy.uix.widget import Widget
 
-from client.core import state
+from client.core import state, tracing
+from client.config.config import HISTORY_FETCH_LIMIT
 from client.config.constants import ALERT_COLOR, BASE_BG, DARK_BG, DARK_BG2, OTHER_COLOR, OWN_COLOR, TEXT_PRIMARY
 from client.core.discovery import restart_discovery
 from client.config.paths import AVATARS_DIR
-from client.core.protocol import parse_json_message, send_json_message
+from client.core.protocol import receive_messages, send_json_message
+from common.framing import FrameDecoder
 from client.widgets.avatar_button import AvatarButton
 
 
@@ -159,6 +161,7 @@ class MainScreen(Screen):
     username = StringProperty("")
     drawer_open = BooleanProperty(False)
     sock = None
+    decoder = None
     user_initiated_disconnect = False
 
     def toggle_drawer(self):
@@ -178,6 +181,7 @@ class MainScreen(Screen):
     def reset_chat_data(self):
         self.chats = {}
         self.online_users = []
+        self.joined_rooms = []
         self.game_records = {}
         self.ids.chats_container.clear_widgets()
         self.ids.user_list.clear_widgets()
@@ -207,16 +211,14 @@ class MainScreen(Screen):
         super().__init__(**kwargs)
         self.chats = {}
         self.online_users = []
+        self.joined_rooms = []
         self.game_records = {}
 
     def on_kv_post(self, base_widget):
         self.ids.user_bubble_widget.on_press_callback = self.open_avatar_picker
 
     def open_avatar_picker(self):
-        try:
-            avatars = [f.name for f in AVATARS_DIR.glob("*.png")]
-        except Exception:
-            avatars = []
+        avatars = state.avatar_catalog.names()
 
         if not avatars or not self.username:
             return
@@ -243,7 +245,7 @@ class MainScreen(Screen):
                      name=filename: self._select_avatar(name))
             grid.add_widget(btn)
 
-        for avatar in sorted(avatars):
+        for avatar in avatars:
             add_avatar_button(avatar)
 
         scroll = ScrollView(size_hint=(1, 1))
@@ -317,23 +319,53 @@ class MainScreen(Screen):
         if closer:
             Clock.schedule_once(closer, 0)
 
+    def request_history(self, chat_id, before=None):
+        """Ask the server for the page of chat_id's history older than before."""
+        self.chats.setdefault(chat_id, {"messages": [], "unread": 0})[
+            "history_requested"] = True
+        data = {"chat_id": chat_id, "limit": HISTORY_FETCH_LIMIT}
+        if before is not None:
+            data["before"] = before
+        try:
+            if self.sock:
+                send_json_message(self.sock, "HISTORY", data)
+        except Exception:
+            self.on_disconnected()
+
+    def merge_history(self, data):
+        """Prepend a HISTORY page to a chat, skipping messages already shown."""
+        chat_id = data.get("chat_id", "")
+        if not chat_id:
+            return
+        chat = self.chats.setdefault(chat_id, {"messages": [], "unread": 0})
+        known = {m["seq"] for m in chat["messages"] if "seq" in m}
+        older = [
+            {"username": m.get("sender", ""), "text": m.get("text", ""),
+             "is_own": m.get("sender") == self.username, "kind": "chat",
+             "seq": m["seq"]}
+            for m in data.get("messages", [])
+            if "seq" in m and m["seq"] not in known
+        ]
+        if not older:
+            return
+        chat["messages"] = older + chat["messages"]
+        try:
+            chat_screen = self.manager.get_screen("chat")
+            if self.manager.current == "chat" and chat_screen.chat_id == chat_id:
+                chat_screen.refresh_messages()
+        except Exception:
+            pass
+
     def listen_to_server(self):
-        buffer = ""
+        # Continue with the login decoder so bytes read after LOGIN_OK are not lost
+        decoder = self.decoder or FrameDecoder()
+        self.decoder = None
         try:
             while True:
-                data = self.sock.recv(1024)
-                if not data:
-                    break
-                buffer += data.decode()
-                while "\n" in buffer:
-                    message, buffer = buffer.split("\n", 1)
-                    message = message.strip()
-                    if not message:
-                        continue
-                    parsed = parse_json_message(message)
-                    if parsed:
-                        Clock.schedule_once(
-                            lambda dt, msg=parsed: self.route_json_message(msg))
+                for parsed in receive_messages(self.sock, decoder):
+                    tracing.mark_received(parsed)
+                    Clock.schedule_once(
+                        lambda dt, msg=parsed: self.route_json_message(msg))
         except Exception:
             self.on_disconnected()
 
@@ -369,23 +401,42 @@ class MainScreen(Screen):
                         pass
                 return
 
+            if msg_type == "AVATARS":
+                # Snapshot of every user's avatar (after a slow-connection catch-up)
+                state.user_avatars.update(data.get("avatars") or {})
+                Clock.schedule_once(lambda dt: self.update_current_user_avatar())
+                Clock.schedule_once(
+                    lambda dt: self.update_user_buttons(self.online_users))
+                Clock.schedule_once(lambda dt: self.update_chat_cards())
+                return
+
+            if msg_type == "HISTORY":
+                self.merge_history(data)
+                return
+
             if msg_type == "AVATAR_ERROR":
                 Clock.schedule_once(lambda dt: self.show_avatar_error_popup())
                 return
 
             if msg_type == "CHAT":
+                tracing.record(data)
                 sender = data.get("sender", "")
                 recipient = data.get("recipient", "general")
                 text = data.get("text", "")
                 is_self = sender == self.username
-                chat_id = "general" if recipient == "general" else (
-                    sender if not is_self else recipient)
+                if recipient == "general" or recipient.startswith("#"):
+                    chat_id = recipient
+                else:
+                    chat_id = sender if not is_self else recipient
                 if chat_id not in self.chats:
                     self.chats[chat_id] = {"messages": [], "unread": 0}
                 if is_self:
                     return
-                self.chats[chat_id]["messages"].append(
-                    {"username": sender, "text": text, "is_own": False, "kind": "chat"})
+                message = {"username": sender, "text": text,
+                           "is_own": False, "kind": "chat"}
+                if "seq" in data:
+                    message["seq"] = data["seq"]
+                self.chats[chat_id]["messages"].append(message)
                 try:
                     chat_screen = self.manager.get_screen("chat")
                     if self.manager.current == "chat" and chat_screen.chat_id == chat_id:
@@ -402,23 +453,53 @@ class MainScreen(Screen):
                 return
 
             if msg_type == "SYSTEM":
-                text = data.get("text", "")
-                chat_id = data.get("chat_id", "general")
-                if chat_id not in self.chats:
-                    self.chats[chat_id] = {"messages": [], "unread": 0}
-                self.chats[chat_id]["messages"].append(
-                    {"username": "SYSTEM", "text": text, "is_own": False, "kind": "system"})
+                self.show_system_message(
+                    data.get("chat_id", "general"), data.get("text", ""))
+                return
+
+            if msg_type == "ROOM_JOINED":
+                room = data.get("room", "")
+                if not room:
+                    return
+                if room not in self.joined_rooms:
+                    self.joined_rooms.append(room)
+                chat = self.chats.setdefault(room, {"messages": [], "unread": 0})
+                seq = data.get("seq")
+                if not chat.get("history_requested") and isinstance(seq, int):
+                    if seq > 0:
+                        self.request_history(room, before=seq + 1)
+                    chat["history_requested"] = True
+                # Without a seq (the server cannot tell) open_chat fetches the newest page
+                self.show_system_message(
+                    room, "Members: " + ", ".join(data.get("members", [])))
+                self.open_chat(room)
+                return
+
+            if msg_type == "ROOM_LEFT":
+                room = data.get("room", "")
+                if room in self.joined_rooms:
+                    self.joined_rooms.remove(room)
                 try:
                     chat_screen = self.manager.get_screen("chat")
-                    if self.manager.current == "chat" and chat_screen.chat_id == chat_id:
-                        chat_screen.add_system_message(text)
-                        Clock.schedule_once(
-                            lambda dt: chat_screen.scroll_to_bottom(), 0.05)
-                    else:
-                        self.chats[chat_id]["unread"] += 1
+                    if self.manager.current == "chat" and chat_screen.chat_id == room:
+                        self.manager.current = "main"
                 except Exception:
-                    self.chats[chat_id]["unread"] += 1
-                self.update_chat_cards()
+                    pass
+                self.remove_chat(room)
+                return
+
+            if msg_type == "ROOM_LIST":
+                listing = ", ".join(
+                    f"{r.get('room')} ({r.get('members')})" for r in data.get("rooms", []))
+                chat_id = "general"
+                try:
+                    chat_screen = self.manager.get_screen("chat")
+                    if self.manager.current == "chat" and chat_screen.chat_id:
+                        chat_id = chat_screen.chat_id
+                except Exception:
+                    pass
+                self.show_system_message(
+                    chat_id, f"Rooms: {listing}" if listing else "No rooms yet - /join <name> creates one")
                 return
 
             if msg_type == "GAME_INVITE":
@@ -444,13 +525,21 @@ class MainScreen(Screen):
                 return
 
             if msg_type == "GAME_MOVE":
-                board = data.get("board", [])
-                current_player = data.get("current_player", "X")
                 try:
                     game_screen = self.manager.get_screen("game")
-                    if game_screen and hasattr(game_screen, "receive_opponent_move"):
-                        game_screen.receive_opponent_move(
-                            str(board), current_player)
+                    if game_screen and hasattr(game_screen, "receive_move"):
+                        game_screen.receive_move(
+                            data.get("cell"), data.get("symbol"),
+                            data.get("current_player", "X"))
+                except Exception:
+                    pass
+                return
+
+            if msg_type == "GAME_STATE":
+                try:
+                    game_screen = self.manager.get_screen("game")
+                    if game_screen and hasattr(game_screen, "receive_game_state"):
+                        game_screen.receive_game_state(data)
                 except Exception:
                     pass
                 return
@@ -459,8 +548,8 @@ class MainScreen(Screen):
                 result = data.get("result", "DRAW")
                 try:
                     game_screen = self.manager.get_screen("game")
-                    if game_screen and hasattr(game_screen, "receive_opponent_game_end"):
-                        game_screen.receive_opponent_game_end(
+                    if game_screen and hasattr(game_screen, "receive_game_end"):
+                        game_screen.receive_game_end(
                             result, show_popup=True)
                 except Exception:
                     pass
@@ -576,6 +665,24 @@ class MainScreen(Screen):
         except Exception as exc:
             print(f"Error routing JSON message: {exc}")
 
+    def show_system_message(self, chat_id, text):
+        """Append a SYSTEM line to a chat and show it if that chat is open."""
+        if chat_id not in self.chats:
+            self.chats[chat_id] = {"messages": [], "unread": 0}
+        self.chats[chat_id]["messages"].append(
+            {"username": "SYSTEM", "text": text, "is_own": False, "kind": "system"})
+        try:
+            chat_screen = self.manager.get_screen("chat")
+            if self.manager.current == "chat" and chat_screen.chat_id == chat_id:
+                chat_screen.add_system_message(text)
+                Clock.schedule_once(
+                    lambda dt: chat_screen.scroll_to_bottom(), 0.05)
+            else:
+                self.chats[chat_id]["unread"] += 1
+        except Exception:
+            self.chats[chat_id]["unread"] += 1
+        self.update_chat_cards()
+
     def update_user_buttons(self, names):
         previous_users = set(self.online_users)
         self.online_users = [n for n in names if n and n != self.username]
@@ -620,6 +727,8 @@ class MainScreen(Screen):
         container.clear_widgets()
         general_card = self.create_chat_card("General Chat", "general")
         container.add_widget(general_card)
+        for room in self.joined_rooms:
+            container.add_widget(self.create_chat_card(room, room))
         private_chats = [
             user for user in self.online_users if user in self.chats]
         if private_chats:
@@ -652,6 +761,11 @@ class MainScreen(Screen):
         if chat_id not in self.chats:
             self.chats[chat_id] = {"messages": [], "unread": 0}
         self.chats[chat_id]["unread"] = 0
+        if not self.chats[chat_id].get("history_requested"):
+            # Only messages with a sequence number are here yet, so fetch
+            # everything older than the first of them
+            seqs = [m["seq"] for m in self.chats[chat_id]["messages"] if "seq" in m]
+            self.request_history(chat_id, min(seqs) if seqs else None)
         self.update_chat_cards()
         chat_screen = self.manager.get_screen("chat")
         chat_screen.load_chat(chat_id, self)
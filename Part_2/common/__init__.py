@@ -0,0 +1,15 @@
+from .avatars import AvatarCatalog
+from .framing import DEFAULT_MAX_FRAME_SIZE, FrameDecoder, FrameTooLarge
+from .wire import BINARY_CODEC, CODECS, COMPRESSED_BINARY_CODEC, JSON_CODEC, negotiate
+
+__all__ = [
+    "AvatarCatalog",
+    "BINARY_CODEC",
+    "CODECS",
+    "COMPRESSED_BINARY_CODEC",
+    "DEFAULT_MAX_FRAME_SIZE",
+    "FrameDecoder",
+    "FrameTooLarge",
+    "JSON_CODEC",
+    "negotiate",
+]
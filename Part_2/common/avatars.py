@@ -0,0 +1,94 @@
+"""Avatar catalog shared by the Lord of the Pings client and server.
+
+The avatar images live in client/assets/avatars. Instead of globbing the
+directory on every login, avatar change and picker popup, the catalog keeps
+the file names in memory (a sorted tuple for listing, a frozenset for O(1)
+validation) and rescans only when the directory's mtime changes - adding,
+removing or renaming a file updates it. The mtime itself is checked at most
+every `check_interval` seconds, so hot paths make no disk calls at all;
+reload() rescans immediately.
+"""
+
+import random
+import threading
+import time
+from pathlib import Path
+
+# Seconds between checks of the directory mtime
+DEFAULT_CHECK_INTERVAL = 5.0
+
+
+class AvatarCatalog:
+    """In-memory list of the avatar files in one directory."""
+
+    def __init__(self, directory, pattern="*.png", check_interval=DEFAULT_CHECK_INTERVAL):
+        """Create the catalog; the directory is scanned on first use.
+
+        Args:
+            directory: Directory holding the avatar images
+            pattern: Glob pattern of the avatar files
+            check_interval: Minimum seconds between mtime checks (0 checks every call)
+        """
+        self.directory = Path(directory)
+        self.pattern = pattern
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        # (sorted names, frozenset of names) - replaced as a whole, so readers
+        # never see a half-updated catalog
+        self._snapshot = ((), frozenset())
+        self._mtime = None
+        self._checked_at = None
+
+    def _current(self):
+        """Return the snapshot, rescanning first if the directory changed."""
+        now = time.monotonic()
+        checked_at = self._checked_at
+        if checked_at is not None and now - checked_at < self.check_interval:
+            return self._snapshot
+        with self._lock:
+            if self._checked_at is checked_at:
+                self._refresh(force=False)
+                self._checked_at = now
+        return self._snapshot
+
+    def _refresh(self, force):
+        try:
+            mtime = self.directory.stat().st_mtime_ns
+        except OSError:
+            # Directory missing: the catalog is empty until it appears
+            self._snapshot = ((), frozenset())
+            self._mtime = None
+            return
+        if not force and mtime == self._mtime:
+            return
+        try:
+            names = sorted(path.name for path in self.directory.glob(self.pattern))
+        except OSError:
+            names = []
+        self._snapshot = (tuple(names), frozenset(names))
+        self._mtime = mtime
+
+    def reload(self):
+        """Rescan the directory now, whatever its mtime."""
+        with self._lock:
+            self._refresh(force=True)
+            self._checked_at = time.monotonic()
+
+    def names(self):
+        """Return the avatar file names, sorted.
+
+        Returns:
+            Tuple of file names (e.g. "avatar_1.png"), empty if none found
+        """
+        return self._current()[0]
+
+    def __contains__(self, name):
+        return name in self._current()[1]
+
+    def __len__(self):
+        return len(self._current()[0])
+
+    def random(self):
+        """Return a random avatar file name, or None if there are none."""
+        names = self._current()[0]
+        return random.choice(names) if names else None
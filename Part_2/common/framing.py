@@ -0,0 +1,162 @@
+"""Incremental stream framing shared by the Lord of the Pings client and server.
+
+TCP delivers a byte stream, so both sides split it back into messages. The
+FrameDecoder reads straight into a reusable bytearray with ``recv_into``,
+scans only the newly arrived bytes for the delimiter and hands out complete
+frames as memoryviews, so a burst of many small messages is processed in
+linear time and a multi-byte UTF-8 character split across two reads is
+reassembled before anything is decoded.
+
+Two framings are supported on the same decoder: newline-delimited frames
+(used for the JSON protocol and the login handshake) and 4-byte big-endian
+length-prefixed frames (used by the binary wire format once negotiated).
+"""
+
+import struct
+
+# Default upper bound for a single frame, delimiter excluded
+DEFAULT_MAX_FRAME_SIZE = 1024 * 1024
+
+# Header of a length-prefixed frame: unsigned 32-bit body length, network order
+LENGTH_PREFIX = struct.Struct("!I")
+
+# Initial buffer size; the buffer only grows while a large frame is in flight
+INITIAL_BUFFER_SIZE = 4096
+
+
+class FrameTooLarge(ValueError):
+    """Raised when the peer sends a frame longer than the configured maximum."""
+
+
+class FrameDecoder:
+    """Split a byte stream into delimiter-terminated or length-prefixed frames.
+
+    Frames yielded by frames() are memoryviews into the internal buffer and
+    are only valid until the next call to recv_into() or feed().
+    """
+
+    def __init__(self, max_frame_size=DEFAULT_MAX_FRAME_SIZE, delimiter=b"\n"):
+        """Create a decoder.
+
+        Args:
+            max_frame_size: Largest accepted frame in bytes (delimiter excluded)
+            delimiter: Byte sequence terminating each frame
+        """
+        self.max_frame_size = max_frame_size
+        self.delimiter = delimiter
+        self._buf = bytearray(INITIAL_BUFFER_SIZE)
+        self._view = memoryview(self._buf)
+        self._start = 0  # first unconsumed byte
+        self._end = 0  # end of received data
+        self._scan = 0  # delimiter search resumes here
+        self.length_prefixed = False
+
+    def set_length_prefixed(self, enabled=True):
+        """Switch framing for all bytes not yet returned as frames.
+
+        Safe to call between two frames yielded by frames(), e.g. right after
+        the frame that negotiated the new format.
+        """
+        self.length_prefixed = enabled
+        self._scan = self._start
+
+    @property
+    def pending(self):
+        """Number of received bytes not yet returned as a frame."""
+        return self._end - self._start
+
+    def _make_room(self):
+        """Ensure there is free space after _end, compacting or growing the buffer."""
+        if self._end < len(self._buf):
+            return
+
+        pending = self._end - self._start
+        limit = self.max_frame_size + max(len(self.delimiter), LENGTH_PREFIX.size)
+        if self._start > 0 and pending < len(self._buf) // 2:
+            # Slide the partial frame to the front; same-size copy, no reallocation
+            self._view[:pending] = self._view[self._start:self._end]
+        else:
+            if pending >= limit:
+                raise FrameTooLarge(
+                    f"frame exceeds {self.max_frame_size} bytes")
+            # Copy into a new buffer instead of resizing, so memoryviews the
+            # caller still holds never block the growth
+            new_buf = bytearray(min(len(self._buf) * 2, limit + INITIAL_BUFFER_SIZE))
+            new_buf[:pending] = self._view[self._start:self._end]
+            self._buf = new_buf
+            self._view = memoryview(new_buf)
+        self._scan -= self._start
+        self._start = 0
+        self._end = pending
+
+    def recv_into(self, sock):
+        """Read whatever the socket has into the buffer.
+
+        Args:
+            sock: Connected socket
+
+        Returns:
+            Number of bytes read; 0 means the peer closed the connection
+
+        Raises:
+            FrameTooLarge: If a partial frame already exceeds the limit
+            OSError: On socket errors (including BlockingIOError)
+        """
+        self._make_room()
+        received = sock.recv_into(self._view[self._end:])
+        self._end += received
+        return received
+
+    def feed(self, data):
+        """Append bytes that were read elsewhere (e.g. during the login handshake)."""
+        data = memoryview(data)
+        while data:
+            self._make_room()
+            count = min(len(data), len(self._buf) - self._end)
+            self._view[self._end:self._end + count] = data[:count]
+            self._end += count
+            data = data[count:]
+
+    def frames(self):
+        """Yield every complete frame received so far as a memoryview.
+
+        Raises:
+            FrameTooLarge: If the unterminated remainder exceeds the limit
+        """
+        delimiter = self.delimiter
+        while True:
+            if self.length_prefixed:
+                if self._end - self._start < LENGTH_PREFIX.size:
+                    break
+                (length,) = LENGTH_PREFIX.unpack_from(self._buf, self._start)
+                if length > self.max_frame_size:
+                    raise FrameTooLarge(
+                        f"frame exceeds {self.max_frame_size} bytes")
+                body_start = self._start + LENGTH_PREFIX.size
+                if self._end - body_start < length:
+                    break
+                frame = self._view[body_start:body_start + length]
+                self._start = self._scan = body_start + length
+                yield frame
+                continue
+
+            index = self._buf.find(delimiter, self._scan, self._end)
+            if index < 0:
+                # Resume next search where this one stopped (minus a partial delimiter)
+                self._scan = max(self._start, self._end - len(delimiter) + 1)
+                break
+            if index - self._start > self.max_frame_size:
+                raise FrameTooLarge(
+                    f"frame exceeds {self.max_frame_size} bytes")
+            frame = self._view[self._start:index]
+            self._start = self._scan = index + len(delimiter)
+            yield frame
+
+        if self._start == self._end:
+            self._start = self._end = self._scan = 0
+            if len(self._buf) > INITIAL_BUFFER_SIZE:
+                # Give back the memory of a large frame once it has been consumed
+                self._buf = bytearray(INITIAL_BUFFER_SIZE)
+                self._view = memoryview(self._buf)
+        elif not self.length_prefixed and self.pending > self.max_frame_size + len(self.delimiter):
+            raise FrameTooLarge(f"frame exceeds {self.max_frame_size} bytes")
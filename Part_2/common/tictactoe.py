@@ -0,0 +1,77 @@
+"""Tic-Tac-Toe rules shared by the Lord of the Pings client and server.
+
+The server keeps the authoritative TicTacToeGame of every running match and
+the client mirrors it for display, so both sides apply moves with the same
+validation and win detection.
+"""
+
+
+class TicTacToeGame:
+    """Core Tic-Tac-Toe game logic.
+
+    Manages board state, move validation, current player tracking, and win detection.
+    Board is represented as a list of 9 cells (3x3 grid), indexed 0-8.
+    """
+
+    def __init__(self):
+        """Initialize game with empty board and default state."""
+        self.board = [None] * 9
+        self.current_player = "X"
+        self.game_over = False
+        self.winner = None
+        self.move_count = 0
+
+    def is_valid_move(self, cell):
+        """Check if a move is valid for the given cell."""
+        return 0 <= cell < 9 and self.board[cell] is None
+
+    def make_move(self, cell, player):
+        """Make a move on the board.
+
+        Args:
+            cell: Cell index (0-8) to place move
+            player: Player symbol ("X" or "O")
+
+        Returns:
+            True if move was successful, False otherwise
+        """
+        if not self.is_valid_move(cell):
+            return False
+        self.board[cell] = player
+        self.move_count += 1
+        return True
+
+    def get_winner(self):
+        """Determine game state.
+
+        Returns:
+            "X" if X wins, "O" if O wins, "DRAW" if board full, None if ongoing
+        """
+        winning_combos = [
+            [0, 1, 2],
+            [3, 4, 5],
+            [6, 7, 8],
+            [0, 3, 6],
+            [1, 4, 7],
+            [2, 5, 8],
+            [0, 4, 8],
+            [2, 4, 6],
+        ]
+
+        for combo in winning_combos:
+            a, b, c = combo
+            if self.board[a] is not None and self.board[a] == self.board[b] == self.board[c]:
+                return self.board[a]
+
+        if None not in self.board:
+            return "DRAW"
+
+        return None
+
+    def reset(self):
+        """Reset the game to initial state."""
+        self.board = [None] * 9
+        self.current_player = "X"
+        self.game_over = False
+        self.winner = None
+        self.move_count = 0
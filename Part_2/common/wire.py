@@ -0,0 +1,384 @@
+"""Wire formats shared by the Lord of the Pings client and server.
+
+Two encodings of the same {"type": ..., "data": {...}} messages exist:
+
+- "json": one JSON object per line. Always used for the login handshake and
+  the STATUS probe, and the fallback when a peer does not offer anything else.
+- "binary": a 4-byte length prefix, a 1-byte message type code and the data
+  fields packed in a fixed per-type order, so the repeated keys
+  ("sender", "recipient", "current_player", ...) never go on the wire.
+
+- "binary+zlib": the binary format where bodies of COMPRESSION_THRESHOLD
+  bytes or more are deflated with a shared preset dictionary, so long
+  pastes and big user lists shrink while short chat lines cost no extra CPU.
+
+The client lists the encodings it supports in its LOGIN frame, the server
+picks one with negotiate() and names it in LOGIN_OK; both sides switch right
+after that frame. Message types or fields not in the schema are still
+carried by the binary codec (as an embedded JSON body or as extra fields), so
+adding a message never requires a new codec version.
+"""
+
+import json
+import zlib
+
+from .framing import DEFAULT_MAX_FRAME_SIZE, LENGTH_PREFIX
+
+# Message type code -> (type name, data fields in wire order).
+# Codes are part of the protocol: append new entries, never renumber.
+MESSAGE_SCHEMA = {
+    1: ("CHAT", ("sender", "recipient", "text", "seq")),
+    2: ("SYSTEM", ("text", "chat_id")),
+    3: ("USERLIST", ("users",)),
+    4: ("AVATAR", ("username", "avatar")),
+    5: ("AVATAR_ERROR", ()),
+    6: ("SET_AVATAR", ("avatar",)),
+    7: ("GAME_INVITE", ("opponent",)),
+    8: ("GAME_ACCEPTED", ("player", "symbol", "opponent")),
+    9: ("GAME_MOVE", ("cell", "symbol", "current_player", "opponent")),
+    10: ("GAME_END", ("result", "opponent")),
+    11: ("GAME_RESET", ("player", "symbol", "opponent")),
+    12: ("GAME_LEFT", ("player", "opponent")),
+    13: ("HISTORY", ("chat_id", "messages", "has_more", "before", "limit")),
+    14: ("ROOM_CREATE", ("room",)),
+    15: ("ROOM_JOIN", ("room",)),
+    16: ("ROOM_LEAVE", ("room",)),
+    17: ("ROOM_JOINED", ("room", "members", "seq")),
+    18: ("ROOM_LEFT", ("room",)),
+    19: ("ROOM_LIST", ("rooms",)),
+    20: ("GAME_SYNC", ("opponent",)),
+    21: ("GAME_STATE", ("opponent", "board", "current_player", "symbol", "winner")),
+}
+
+# Type code of a message outside the schema; the body is plain JSON
+JSON_FALLBACK_CODE = 0
+
+# Type code of a deflated body; the inflated bytes are a complete binary body
+COMPRESSED_CODE = 255
+
+# Bodies shorter than this are never compressed
+COMPRESSION_THRESHOLD = 512
+
+# Largest body a compressed frame may inflate to when the caller gives no
+# limit; receivers pass their own maximum frame size instead
+MAX_DECOMPRESSED_SIZE = DEFAULT_MAX_FRAME_SIZE
+
+# Preset deflate dictionary: strings that recur in the protocol, most common
+# last (deflate finds matches closest to the data first). Part of the
+# protocol like the type codes - changing it breaks older peers.
+COMPRESSION_DICTIONARY = b"".join((
+    b'{"type": "", "data": {}}',
+    b"GAME_INVITEGAME_ACCEPTEDGAME_MOVEGAME_ENDGAME_RESETGAME_LEFT",
+    b"current_playeropponentsymbolresultboardplayer",
+    b"Username already takenUser not found",
+    b" left the chat joined the chat",
+    b"icons8--64.png-96.png.png",
+    b"usernameavatarsenderrecipienttextchat_idusers",
+    b"general",
+))
+
+# Value tags of the binary encoding
+_ABSENT = 0
+_NONE = 1
+_TRUE = 2
+_FALSE = 3
+_STR = 4
+_INT = 5
+_LIST = 6
+_MAP = 7
+_JSON = 8  # floats and anything else json can represent
+
+_TYPE_CODES = {name: (code, fields) for code, (name, fields) in MESSAGE_SCHEMA.items()}
+_FIELD_SETS = {code: frozenset(fields) for code, (_, fields) in MESSAGE_SCHEMA.items()}
+
+
+class JsonCodec:
+    """Newline-delimited JSON, the original wire format."""
+
+    name = "json"
+    length_prefixed = False
+
+    def encode(self, msg_type, data):
+        """Serialize a message into one newline-terminated JSON frame.
+
+        Args:
+            msg_type: Message type/command identifier
+            data: Dictionary of message data
+
+        Returns:
+            Encoded bytes including the trailing newline
+        """
+        return (json.dumps({"type": msg_type, "data": data}) + "\n").encode()
+
+    def decode(self, frame, max_size=None):
+        """Parse one frame (delimiter already removed).
+
+        Args:
+            frame: Frame bytes
+            max_size: Unused; frames are already bounded by the FrameDecoder
+
+        Returns:
+            Message dictionary, or None if the frame is not valid JSON
+        """
+        try:
+            return json.loads(bytes(frame))
+        except Exception:
+            return None
+
+
+def _write_varint(out, value):
+    """Append an unsigned LEB128 integer."""
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(buf, pos):
+    """Read an unsigned LEB128 integer; returns (value, new_pos)."""
+    result = 0
+    shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _write_bytes(out, tag, raw):
+    out.append(tag)
+    _write_varint(out, len(raw))
+    out += raw
+
+
+def _write_value(out, value):
+    """Append one tagged value."""
+    if value.__class__ is str:
+        _write_bytes(out, _STR, value.encode())
+    elif value is None:
+        out.append(_NONE)
+    elif value is True:
+        out.append(_TRUE)
+    elif value is False:
+        out.append(_FALSE)
+    elif value.__class__ is int:
+        out.append(_INT)
+        # Zigzag so small negative numbers stay short
+        _write_varint(out, value << 1 if value >= 0 else (-value << 1) - 1)
+    elif isinstance(value, (list, tuple)):
+        out.append(_LIST)
+        _write_varint(out, len(value))
+        for item in value:
+            _write_value(out, item)
+    elif isinstance(value, dict) and all(key.__class__ is str for key in value):
+        out.append(_MAP)
+        _write_varint(out, len(value))
+        for key, item in value.items():
+            raw = key.encode()
+            _write_varint(out, len(raw))
+            out += raw
+            _write_value(out, item)
+    else:
+        _write_bytes(out, _JSON, json.dumps(value).encode())
+
+
+def _read_value(buf, pos):
+    """Read one tagged value; returns (value, new_pos)."""
+    tag = buf[pos]
+    pos += 1
+    if tag == _STR:
+        length, pos = _read_varint(buf, pos)
+        return str(buf[pos:pos + length], "utf-8"), pos + length
+    if tag == _NONE or tag == _ABSENT:
+        return None, pos
+    if tag == _TRUE:
+        return True, pos
+    if tag == _FALSE:
+        return False, pos
+    if tag == _INT:
+        value, pos = _read_varint(buf, pos)
+        return (value >> 1) ^ -(value & 1), pos
+    if tag == _LIST:
+        count, pos = _read_varint(buf, pos)
+        items = []
+        for _ in range(count):
+            item, pos = _read_value(buf, pos)
+            items.append(item)
+        return items, pos
+    if tag == _MAP:
+        count, pos = _read_varint(buf, pos)
+        mapping = {}
+        for _ in range(count):
+            length, pos = _read_varint(buf, pos)
+            key = str(buf[pos:pos + length], "utf-8")
+            mapping[key], pos = _read_value(buf, pos + length)
+        return mapping, pos
+    if tag == _JSON:
+        length, pos = _read_varint(buf, pos)
+        return json.loads(bytes(buf[pos:pos + length])), pos + length
+    raise ValueError(f"unknown value tag {tag}")
+
+
+class BinaryCodec:
+    """Length-prefixed frames with a type code and positional fields.
+
+    Body layout: one type code byte, one tagged value per schema field
+    (tag 0 marks a missing field) and a final tagged value holding a map of
+    any fields the schema does not list, or tag 0 if there are none.
+    """
+
+    name = "binary"
+    length_prefixed = True
+
+    def encode(self, msg_type, data):
+        """Serialize a message into one length-prefixed binary frame.
+
+        Args:
+            msg_type: Message type/command identifier
+            data: Dictionary of message data
+
+        Returns:
+            Encoded bytes including the length prefix
+        """
+        out = bytearray(LENGTH_PREFIX.size)
+        schema = _TYPE_CODES.get(msg_type)
+        if schema is None or not isinstance(data, dict):
+            out.append(JSON_FALLBACK_CODE)
+            out += json.dumps({"type": msg_type, "data": data}).encode()
+        else:
+            code, fields = schema
+            out.append(code)
+            present = 0
+            for field in fields:
+                if field in data:
+                    _write_value(out, data[field])
+                    present += 1
+                else:
+                    out.append(_ABSENT)
+            if present < len(data):
+                known = _FIELD_SETS[code]
+                _write_value(out, {key: value for key, value in data.items()
+                                   if key not in known})
+            else:
+                out.append(_ABSENT)
+        LENGTH_PREFIX.pack_into(out, 0, len(out) - LENGTH_PREFIX.size)
+        return bytes(out)
+
+    def decode(self, frame, max_size=None):
+        """Parse one frame body (length prefix already removed).
+
+        Args:
+            frame: Body bytes
+            max_size: Unused; frames are already bounded by the FrameDecoder
+
+        Returns:
+            Message dictionary, or None if the frame is malformed
+        """
+        try:
+            code = frame[0]
+            if code == JSON_FALLBACK_CODE:
+                return json.loads(bytes(frame[1:]))
+            msg_type, fields = MESSAGE_SCHEMA[code]
+            data = {}
+            pos = 1
+            for field in fields:
+                if frame[pos] == _ABSENT:
+                    pos += 1
+                    continue
+                data[field], pos = _read_value(frame, pos)
+            if frame[pos] != _ABSENT:
+                extras, pos = _read_value(frame, pos)
+                data.update(extras)
+            return {"type": msg_type, "data": data}
+        except Exception:
+            return None
+
+
+class CompressedBinaryCodec(BinaryCodec):
+    """Binary codec that deflates large bodies with the shared dictionary.
+
+    A compressed frame is the length prefix, COMPRESSED_CODE and a raw
+    deflate stream of the body the plain binary codec would have sent.
+    Bodies below the threshold, or that do not shrink, are sent unchanged.
+    """
+
+    name = "binary+zlib"
+
+    def __init__(self, threshold=COMPRESSION_THRESHOLD, level=6):
+        """Create the codec.
+
+        Args:
+            threshold: Smallest body size in bytes worth compressing
+            level: zlib compression level
+        """
+        self.threshold = threshold
+        self.level = level
+
+    def encode(self, msg_type, data):
+        """Serialize a message, deflating the body when it is large enough."""
+        frame = super().encode(msg_type, data)
+        body_size = len(frame) - LENGTH_PREFIX.size
+        if body_size < self.threshold:
+            return frame
+        compressor = zlib.compressobj(
+            self.level, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=COMPRESSION_DICTIONARY)
+        compressed = compressor.compress(
+            memoryview(frame)[LENGTH_PREFIX.size:]) + compressor.flush()
+        if len(compressed) + 1 >= body_size:
+            return frame
+        return (LENGTH_PREFIX.pack(len(compressed) + 1)
+                + bytes((COMPRESSED_CODE,)) + compressed)
+
+    def decode(self, frame, max_size=None):
+        """Parse one frame body, inflating it first if it is compressed.
+
+        Args:
+            frame: Body bytes
+            max_size: Largest body a compressed frame may inflate to - the
+                receiver's maximum frame size (default MAX_DECOMPRESSED_SIZE)
+
+        Returns:
+            Message dictionary, or None if the frame is malformed or too large
+        """
+        if len(frame) and frame[0] == COMPRESSED_CODE:
+            try:
+                inflater = zlib.decompressobj(
+                    -zlib.MAX_WBITS, zdict=COMPRESSION_DICTIONARY)
+                frame = inflater.decompress(frame[1:], max_size or MAX_DECOMPRESSED_SIZE)
+            except zlib.error:
+                return None
+            if inflater.unconsumed_tail or not inflater.eof:
+                return None  # truncated, or inflates beyond the limit
+        return super().decode(frame)
+
+
+JSON_CODEC = JsonCodec()
+BINARY_CODEC = BinaryCodec()
+COMPRESSED_BINARY_CODEC = CompressedBinaryCodec()
+
+# Supported encodings by name, in the client's order of preference
+CODECS = {
+    COMPRESSED_BINARY_CODEC.name: COMPRESSED_BINARY_CODEC,
+    BINARY_CODEC.name: BINARY_CODEC,
+    JSON_CODEC.name: JSON_CODEC,
+}
+
+
+def negotiate(offered):
+    """Pick the wire format for a session from the client's offer.
+
+    Args:
+        offered: Encoding names from the LOGIN frame, most preferred first
+            (missing or malformed for clients that predate negotiation)
+
+    Returns:
+        The first offered codec this side supports, or JSON_CODEC
+    """
+    if isinstance(offered, (list, tuple)):
+        for name in offered:
+            codec = CODECS.get(name) if isinstance(name, str) else None
+            if codec is not None:
+                return codec
+    return JSON_CODEC
@@ -0,0 +1,5 @@
+"""Allow starting the server with `python -m server [--headless] [--workers N]`."""
+
+from server.server import main
+
+main()
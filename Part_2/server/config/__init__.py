@@ -2,13 +2,44 @@ from .config import (
     ACCENT_COLOR,
     BACKGROUND_COLOR,
     DISCOVERY_INTERVAL,
+    FEDERATION_HOST,
+    FEDERATION_PORT,
+    FEDERATION_RETRY_INTERVAL,
+    FEDERATION_SECRET,
+    GUI_REFRESH_INTERVAL_MS,
+    HANDSHAKE_TIMEOUT,
+    HISTORY_DIR,
+    HISTORY_HOT_MESSAGES,
+    HISTORY_INDEX_INTERVAL,
+    HISTORY_MAX_OPEN_CHATS,
+    HISTORY_PAGE_LIMIT,
     HOVER_COLOR,
+    LOG_BUFFER_LINES,
+    LOG_FILE,
+    LOG_FILE_BACKUPS,
+    LOG_FILE_MAX_BYTES,
+    MAX_FRAME_SIZE,
+    METRICS_HOST,
+    METRICS_PORT,
+    NODE_ID,
     OTHER_COLOR,
+    OUTBOUND_QUEUE_MAX_BYTES,
+    PEERS,
     PREFERRED_DISCOVERY_PORT,
     PREFERRED_PORT,
+    PROTOCOL_VERSION,
+    RATE_LIMITS,
+    RATE_LIMIT_DEFAULT,
     SERVER_HOST,
     TEXT_COLOR,
     SERVER_PORT_AUTO_FALLBACK,
+    SERVER_WORKERS,
+    SLOW_CONSUMER_CHECK_INTERVAL,
+    SLOW_CONSUMER_MAX_BYTES,
+    SLOW_CONSUMER_POLICY,
+    SLOW_CONSUMER_TIMEOUT,
+    WRITE_COALESCE_BYTES,
+    WRITE_COALESCE_DELAY,
 )
 from .ports import find_available_discovery_port, find_available_port
 
@@ -16,13 +47,44 @@ __all__ = [
     "ACCENT_COLOR",
     "BACKGROUND_COLOR",
     "DISCOVERY_INTERVAL",
+    "FEDERATION_HOST",
+    "FEDERATION_PORT",
+    "FEDERATION_RETRY_INTERVAL",
+    "FEDERATION_SECRET",
+    "GUI_REFRESH_INTERVAL_MS",
+    "HANDSHAKE_TIMEOUT",
+    "HISTORY_DIR",
+    "HISTORY_HOT_MESSAGES",
+    "HISTORY_INDEX_INTERVAL",
+    "HISTORY_MAX_OPEN_CHATS",
+    "HISTORY_PAGE_LIMIT",
     "HOVER_COLOR",
+    "LOG_BUFFER_LINES",
+    "LOG_FILE",
+    "LOG_FILE_BACKUPS",
+    "LOG_FILE_MAX_BYTES",
+    "MAX_FRAME_SIZE",
+    "METRICS_HOST",
+    "METRICS_PORT",
+    "NODE_ID",
     "OTHER_COLOR",
+    "OUTBOUND_QUEUE_MAX_BYTES",
+    "PEERS",
     "PREFERRED_DISCOVERY_PORT",
     "PREFERRED_PORT",
+    "PROTOCOL_VERSION",
+    "RATE_LIMITS",
+    "RATE_LIMIT_DEFAULT",
     "SERVER_HOST",
     "TEXT_COLOR",
     "SERVER_PORT_AUTO_FALLBACK",
+    "SERVER_WORKERS",
+    "SLOW_CONSUMER_CHECK_INTERVAL",
+    "SLOW_CONSUMER_MAX_BYTES",
+    "SLOW_CONSUMER_POLICY",
+    "SLOW_CONSUMER_TIMEOUT",
+    "WRITE_COALESCE_BYTES",
+    "WRITE_COALESCE_DELAY",
     "find_available_discovery_port",
     "find_available_port",
 ]
@@ -5,6 +5,8 @@ Includes GUI theme colors for the server admin interface.
 """
 
 import os
+from pathlib import Path
+
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -15,10 +17,102 @@ PREFERRED_PORT = int(os.environ.get("SERVER_PORT", 9000))
 SERVER_PORT_AUTO_FALLBACK = os.environ.get(
     "SERVER_PORT_AUTO_FALLBACK", "true").lower() == "true"
 
+# Headless worker processes sharing the server port (1 = single process)
+SERVER_WORKERS = int(os.environ.get("SERVER_WORKERS", 1))
+
+# Federation: other servers to link with ("host:port,host:port" of their
+# FEDERATION_PORT), the port peers connect to, and this node's id (default
+# "<local ip>:<server port>"); every node should be reachable from the others
+PEERS = [
+    (host, int(port))
+    for host, _, port in (peer.strip().rpartition(":")
+                          for peer in os.environ.get("PEERS", "").split(","))
+    if host and port.isdigit()
+]
+FEDERATION_HOST = os.environ.get("FEDERATION_HOST", "0.0.0.0")
+FEDERATION_PORT = int(os.environ.get("FEDERATION_PORT", 9100))
+# Shared secret every node must prove in the link handshake; when empty,
+# only connections from the hosts listed in PEERS are accepted
+FEDERATION_SECRET = os.environ.get("FEDERATION_SECRET", "")
+FEDERATION_RETRY_INTERVAL = float(os.environ.get("FEDERATION_RETRY_INTERVAL", 5))
+NODE_ID = os.environ.get("NODE_ID", "")
+
+# Version expected in the LOGIN handshake frame; must match the client's
+PROTOCOL_VERSION = 1
+
+# Seconds a new connection may stay silent before its LOGIN/STATUS frame arrives
+HANDSHAKE_TIMEOUT = float(os.environ.get("HANDSHAKE_TIMEOUT", 10))
+
+# Largest frame (in bytes) accepted from a client before it is disconnected
+MAX_FRAME_SIZE = int(os.environ.get("MAX_FRAME_SIZE", 64 * 1024))
+
+# Hard cap on unsent bytes queued per client before it is dropped; the
+# slow-consumer policy below normally acts long before this backstop
+OUTBOUND_QUEUE_MAX_BYTES = int(os.environ.get("OUTBOUND_QUEUE_MAX_BYTES", 8 * 1024 * 1024))
+
+# Inbound rate limits: a token bucket per client and message type, refilled
+# at `rate` messages per second up to `burst`. RATE_LIMITS="TYPE:rate:burst,..."
+# overrides the per-type budgets below, every other type shares one
+# RATE_LIMIT_DEFAULT bucket, and a rate of 0 turns a limit off
+RATE_LIMITS = {
+    "CHAT": (5.0, 10.0),
+    "GAME_INVITE": (0.5, 3.0),
+    "SET_AVATAR": (0.5, 3.0),
+    "ROOM_CREATE": (1.0, 5.0),
+    "HISTORY": (5.0, 20.0),
+}
+RATE_LIMITS.update(
+    (parts[0], (float(parts[1]), float(parts[-1])))
+    for parts in (entry.strip().split(":")
+                  for entry in os.environ.get("RATE_LIMITS", "").split(","))
+    if len(parts) in (2, 3)
+)
+RATE_LIMIT_DEFAULT = (float(os.environ.get("RATE_LIMIT_DEFAULT_RATE", 20)),
+                      float(os.environ.get("RATE_LIMIT_DEFAULT_BURST", 40)))
+
+# Slow consumers: a client with more than SLOW_CONSUMER_MAX_BYTES of unsent
+# output, or that accepted no bytes for SLOW_CONSUMER_TIMEOUT seconds while
+# output was pending, is evicted; with SLOW_CONSUMER_POLICY=downgrade it
+# first stops receiving broadcasts and gets a summary once it catches up,
+# and is only evicted at twice the thresholds
+SLOW_CONSUMER_MAX_BYTES = int(os.environ.get("SLOW_CONSUMER_MAX_BYTES", 1024 * 1024))
+SLOW_CONSUMER_TIMEOUT = float(os.environ.get("SLOW_CONSUMER_TIMEOUT", 30))
+SLOW_CONSUMER_POLICY = os.environ.get("SLOW_CONSUMER_POLICY", "evict").lower()
+SLOW_CONSUMER_CHECK_INTERVAL = 1  # seconds between stalled-writer checks
+
+# Outbound write coalescing: messages for one client are held for up to
+# WRITE_COALESCE_DELAY seconds (or until WRITE_COALESCE_BYTES are queued) and
+# then written with a single send(); 0 writes on the next event loop turn
+WRITE_COALESCE_DELAY = float(os.environ.get("WRITE_COALESCE_DELAY", 0.002))
+WRITE_COALESCE_BYTES = int(os.environ.get("WRITE_COALESCE_BYTES", 16 * 1024))
+
+# Prometheus metrics endpoint (http://METRICS_HOST:METRICS_PORT/metrics);
+# worker N uses METRICS_PORT + N, and 0 turns the endpoint off
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.environ.get("METRICS_PORT", 9102))
+
 # UDP Discovery broadcast configuration
 PREFERRED_DISCOVERY_PORT = int(os.environ.get("DISCOVERY_PORT", 9001))
 DISCOVERY_INTERVAL = 2  # seconds between broadcasts
 
+# Server log: recent lines shown in the admin log pane; every line goes to a rotating file
+LOG_BUFFER_LINES = int(os.environ.get("LOG_BUFFER_LINES", 2000))
+LOG_FILE = os.environ.get(
+    "LOG_FILE", str(Path(__file__).resolve().parents[1] / "logs" / "server.log"))
+LOG_FILE_MAX_BYTES = int(os.environ.get("LOG_FILE_MAX_BYTES", 1_000_000))
+LOG_FILE_BACKUPS = int(os.environ.get("LOG_FILE_BACKUPS", 5))
+
+# Chat history: append-only per-chat logs with a sparse offset index
+HISTORY_DIR = os.environ.get(
+    "HISTORY_DIR", str(Path(__file__).resolve().parents[1] / "history"))
+HISTORY_HOT_MESSAGES = int(os.environ.get("HISTORY_HOT_MESSAGES", 200))  # per chat, kept in memory
+HISTORY_INDEX_INTERVAL = int(os.environ.get("HISTORY_INDEX_INTERVAL", 64))  # records per index entry
+HISTORY_MAX_OPEN_CHATS = int(os.environ.get("HISTORY_MAX_OPEN_CHATS", 256))
+HISTORY_PAGE_LIMIT = int(os.environ.get("HISTORY_PAGE_LIMIT", 100))  # max records per HISTORY reply
+
+# Server admin GUI refresh period (queued log/user list updates are applied once per frame)
+GUI_REFRESH_INTERVAL_MS = int(os.environ.get("GUI_REFRESH_INTERVAL_MS", 100))
+
 # Server admin GUI theme colors
 BACKGROUND_COLOR = "#0E1020"
 ACCENT_COLOR = "#4E8AFF"
@@ -1,12 +1,43 @@
-from . import state
-from .avatars import get_random_avatar, list_available_avatars
-from .protocol import broadcast_json, parse_json_message, send_json_message
+from . import backplane, events, federation, games, history, metrics, ratelimit, rooms, state
+from .connection import ClientConnection
+from .event_loop import EventLoop
+from .avatars import (
+    get_random_avatar,
+    is_available_avatar,
+    list_available_avatars,
+    reload_avatars,
+)
+from .protocol import (
+    broadcast_json,
+    close_after_flush,
+    encode_json_message,
+    parse_json_message,
+    queue_bytes,
+    read_messages,
+    send_json_message,
+)
 
 __all__ = [
+    "backplane",
+    "events",
+    "federation",
+    "games",
+    "history",
+    "metrics",
+    "ratelimit",
+    "rooms",
     "state",
+    "ClientConnection",
+    "EventLoop",
     "get_random_avatar",
+    "is_available_avatar",
     "list_available_avatars",
+    "reload_avatars",
     "broadcast_json",
+    "close_after_flush",
+    "encode_json_message",
     "parse_json_message",
+    "queue_bytes",
+    "read_messages",
     "send_json_message",
 ]
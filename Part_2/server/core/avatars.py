@@ -1,16 +1,20 @@
 """Avatar management for Lord of the Pings server.
 
 Provides utilities to load and select random avatars from the client assets
-directory for new users joining the chat.
+directory for new users joining the chat. The file names are kept in an
+in-memory AvatarCatalog that only rescans the directory when it changes.
 """
 
-import random
 from pathlib import Path
 
+from common.avatars import AvatarCatalog
+
 # Point to the client's avatar assets from the server side.
 AVATARS_DIR = Path(__file__).resolve(
 ).parents[2] / "client" / "assets" / "avatars"
 
+AVATAR_CATALOG = AvatarCatalog(AVATARS_DIR)
+
 
 def get_random_avatar():
     """Get a random avatar filename from available avatars.
@@ -18,11 +22,7 @@ def get_random_avatar():
     Returns:
         Random avatar filename (e.g., "avatar_1.png"), or None if none found
     """
-    try:
-        avatars = [p.name for p in AVATARS_DIR.glob("*.png")]
-        return random.choice(avatars) if avatars else None
-    except Exception:
-        return None
+    return AVATAR_CATALOG.random()
 
 
 def list_available_avatars():
@@ -31,7 +31,21 @@ def list_available_avatars():
     Returns:
         List of avatar filenames, empty list if directory not found
     """
-    try:
-        return [p.name for p in AVATARS_DIR.glob("*.png")]
-    except Exception:
-        return []
+    return list(AVATAR_CATALOG.names())
+
+
+def is_available_avatar(avatar_name):
+    """Check if an avatar filename exists, without touching the disk.
+
+    Args:
+        avatar_name: Avatar filename sent by a client
+
+    Returns:
+        True if the avatar is in the catalog
+    """
+    return isinstance(avatar_name, str) and avatar_name in AVATAR_CATALOG
+
+
+def reload_avatars():
+    """Rescan the avatars directory now (e.g. after deploying new images)."""
+    AVATAR_CATALOG.reload()
@@ -0,0 +1,330 @@
+"""Local pub/sub backplane for running the server as several processes.
+
+In worker mode (`--workers N`) the server starts N processes that all
+listen on the same TCP port (SO_REUSEPORT lets the kernel spread new
+connections over them), so JSON parsing and fan-out use N cores instead of
+one. Each worker only owns its own sockets; everything another worker must
+know travels as an "op" frame over a Unix socket to a small hub running in
+the parent process, which forwards it to the other workers (or to the one
+named in "to"). No external broker is involved.
+
+Frames are newline-delimited JSON objects {"op", "from", "to"?, "data"},
+where "from" and "to" are worker numbers. Ops used by the chat server:
+
+- JOIN / LEAVE / AVATAR / USERS: presence, so every worker knows which
+  usernames are online on which worker
+- DELIVER: one message for a user connected to the addressed worker
+- CHAT: a chat message; the hub assigns its sequence number and appends it
+  to the chat history (the hub is the only history writer), then sends it
+  to every worker, or only to the one in "to" for private messages
+- HISTORY: a history page request, answered by the hub with a DELIVER
+- NOTICE: a room SYSTEM line; GAME: a move mirrored to the opponent's worker
+- HELLO / WELCOME / NODE_DOWN: worker membership, sent by the hub
+
+Federated servers (server.core.federation) exchange the same ops over TCP
+peer links instead of a hub; there every node keeps its own history.
+"""
+
+import json
+import os
+import socket
+
+from common.framing import FrameDecoder, FrameTooLarge
+from server.core import events, history, state
+from server.core.connection import ClientConnection
+from server.core.event_loop import EventLoop
+
+# Largest backplane frame; HISTORY pages and USERS snapshots can be big
+MAX_OP_SIZE = 16 * 1024 * 1024
+
+# Worker number (worker mode) or node id (federation) of this process
+node_id = None
+
+# HubLink in worker mode, federation.PeerMesh when linked to other servers,
+# None for a standalone server
+transport = None
+
+# Newest sequence number seen per history key (general and rooms), kept
+# from CHAT ops because workers never open the history files themselves
+latest_seqs = {}
+
+_handlers = {}
+
+
+def encode_op(op, data, origin=None, to=None):
+    """Serialize one backplane frame."""
+    frame = {"op": op, "from": origin, "data": data}
+    if to is not None:
+        frame["to"] = to
+    return (json.dumps(frame, ensure_ascii=False) + "\n").encode()
+
+
+def open_link(sock, address):
+    """Wrap a backplane socket in a ClientConnection with a larger frame limit."""
+    sock.setblocking(False)
+    conn = ClientConnection(sock, address)
+    conn.decoder = FrameDecoder(MAX_OP_SIZE)
+    return conn
+
+
+def queue_op(loop, conn, payload, writer):
+    """Queue a frame on a backplane link.
+
+    The link is internal, so it is not bounded by OUTBOUND_QUEUE_MAX_BYTES:
+    dropping an op would leave the processes with different views.
+    """
+    conn.outbox.append(payload)
+    conn.queued_bytes += len(payload)
+    loop.add_writer(conn.sock, writer)
+
+
+def read_ops(conn):
+    """Read from a backplane link and parse every complete op frame.
+
+    Returns:
+        List of (raw_line, frame) pairs, or None if the link closed
+    """
+    try:
+        if not conn.decoder.recv_into(conn.sock):
+            return None
+    except (BlockingIOError, InterruptedError):
+        return []
+    except (OSError, FrameTooLarge):
+        return None
+    ops = []
+    for raw in conn.decoder.frames():
+        raw = bytes(raw)
+        try:
+            frame = json.loads(raw)
+        except ValueError:
+            continue
+        if isinstance(frame, dict):
+            ops.append((raw + b"\n", frame))
+    return ops
+
+
+# ---------------------------------------------------------------------------
+# Chat server side
+
+
+def is_active():
+    """Return True if this server shares its users with other processes or nodes."""
+    return transport is not None
+
+
+def history_on_hub():
+    """Return True in worker mode, where the hub sequences and stores chat history."""
+    return isinstance(transport, HubLink)
+
+
+def subscribe(op, handler):
+    """Call handler(data, origin_node) on the event loop for every `op` frame."""
+    _handlers[op] = handler
+
+
+def publish(op, data, node=None):
+    """Send an op to every other process/node, or only to `node`.
+
+    Does nothing on a standalone server. Must run on the event loop thread.
+    """
+    if transport is not None:
+        transport.send(encode_op(op, data, node_id, node), node)
+
+
+def dispatch(op, data, origin):
+    """Run the handler subscribed to an op received from `origin`."""
+    handler = _handlers.get(op)
+    if handler is None:
+        return
+    try:
+        handler(data, origin)
+    except Exception as exc:
+        events.emit(events.LOG, f"Error handling backplane {op}: {exc}")
+
+
+def _on_welcome(data, _origin):
+    latest_seqs.update(data.get("seqs", {}))
+
+
+class HubLink:
+    """A worker's connection to the hub in the parent process."""
+
+    def __init__(self, path):
+        """Connect to the hub's Unix socket and start reading ops.
+
+        Args:
+            path: Filesystem path of the hub's Unix socket
+        """
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(path)
+        self.conn = open_link(sock, path)
+        state.loop.add_reader(sock, self._read)
+
+    def send(self, payload, _node):
+        # The hub does the routing, so every frame goes the same way
+        queue_op(state.loop, self.conn, payload, self._write_ready)
+
+    def _write_ready(self, sock):
+        try:
+            if self.conn.flush():
+                state.loop.remove_writer(sock)
+        except OSError:
+            state.loop.remove_writer(sock)
+
+    def _read(self, sock):
+        ops = read_ops(self.conn)
+        if ops is None:
+            events.emit(events.LOG, "[ERROR] Lost the backplane hub, stopping worker")
+            state.loop.unregister(sock)
+            state.loop.stop()
+            return
+        for _raw, frame in ops:
+            dispatch(frame.get("op"), frame.get("data") or {}, frame.get("from"))
+
+
+def connect(path, node):
+    """Join the hub at `path` as worker `node` (call after state.loop is set).
+
+    Args:
+        path: Filesystem path of the hub's Unix socket
+        node: Worker number of this process
+    """
+    global transport, node_id
+    node_id = node
+    subscribe("WELCOME", _on_welcome)
+    transport = HubLink(path)
+    publish("HELLO", {})
+
+
+# ---------------------------------------------------------------------------
+# Hub side (parent process)
+
+
+class BackplaneHub:
+    """Unix-socket hub forwarding ops between the worker processes."""
+
+    def __init__(self, path):
+        """Bind the hub socket so workers can connect as soon as they start.
+
+        Args:
+            path: Filesystem path for the Unix socket
+        """
+        self.path = path
+        self.loop = EventLoop()
+        self.links = {}  # socket -> ClientConnection (username holds the worker number)
+        self.nodes = {}  # worker number -> socket
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(path)
+        self.server.listen()
+        self.server.setblocking(False)
+        self.loop.add_reader(self.server, self._accept)
+
+    def run(self):
+        """Forward ops until stop() is called."""
+        self.loop.run_forever()
+
+    def stop(self):
+        self.loop.stop()
+
+    def close(self):
+        """Close every link and remove the socket file."""
+        for sock in list(self.links):
+            sock.close()
+        self.server.close()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+    def _accept(self, server):
+        try:
+            sock, _ = server.accept()
+        except (BlockingIOError, InterruptedError):
+            return
+        self.links[sock] = open_link(sock, self.path)
+        self.loop.add_reader(sock, self._read)
+
+    def _write_ready(self, sock):
+        conn = self.links.get(sock)
+        try:
+            if conn is None or conn.flush():
+                self.loop.remove_writer(sock)
+        except OSError:
+            self.loop.remove_writer(sock)
+
+    def _send(self, sock, payload):
+        conn = self.links.get(sock)
+        if conn is not None:
+            queue_op(self.loop, conn, payload, self._write_ready)
+
+    def _send_all(self, payload, exclude=None):
+        for sock in self.nodes.values():
+            if sock is not exclude:
+                self._send(sock, payload)
+
+    def _drop(self, sock):
+        conn = self.links.pop(sock)
+        self.loop.unregister(sock)
+        sock.close()
+        node = conn.username
+        if node is not None and self.nodes.get(node) is sock:
+            del self.nodes[node]
+            events.emit(events.LOG, f"[backplane] worker {node} left")
+            self._send_all(encode_op("NODE_DOWN", {"node": node}))
+
+    def _read(self, sock):
+        conn = self.links.get(sock)
+        if conn is None:
+            return
+        ops = read_ops(conn)
+        if ops is None:
+            self._drop(sock)
+            return
+        for raw, frame in ops:
+            try:
+                self._dispatch(sock, conn, raw, frame)
+            except Exception as exc:
+                events.emit(events.LOG, f"[backplane] error handling {frame.get('op')}: {exc}")
+
+    def _dispatch(self, sock, conn, raw, frame):
+        """Handle the hub's own ops and forward everything else."""
+        op = frame.get("op")
+        origin = frame.get("from")
+        data = frame.get("data") or {}
+
+        if op == "HELLO":
+            conn.username = origin
+            self.nodes[origin] = sock
+            events.emit(events.LOG, f"[backplane] worker {origin} joined")
+            self._send(sock, encode_op("WELCOME", {"seqs": {
+                history.GENERAL_CHAT: history.latest_seq(history.GENERAL_CHAT)}}))
+            # The others answer with USERS so the newcomer learns who is online
+            self._send_all(raw, exclude=sock)
+            return
+
+        if op == "CHAT":
+            record = history.record_message(
+                data["key"], data["sender"], data["recipient"], data["text"])
+            data["seq"] = record["seq"]
+            payload = encode_op("CHAT", data, origin)
+            target = self.nodes.get(frame.get("to"))
+            if target is not None:
+                self._send(target, payload)
+            else:
+                self._send_all(payload)
+            return
+
+        if op == "HISTORY":
+            page = history.history_page(
+                data["key"], data["chat_id"], data.get("before"), data["limit"])
+            self._send(sock, encode_op("DELIVER", {
+                "to": data["username"], "type": "HISTORY", "data": page}))
+            return
+
+        to = frame.get("to")
+        if to is not None:
+            target = self.nodes.get(to)
+            if target is not None:
+                self._send(target, raw)
+        else:
+            self._send_all(raw, exclude=sock)
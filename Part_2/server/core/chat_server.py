@@ -0,0 +1,1018 @@
+"""Networking core of the Lord of the Pings chat server.
+
+Owns the event loop, client login and message routing, and the discovery
+broadcast. It has no GUI dependency: user-visible activity is reported
+through server.core.events so the admin window and the headless console
+runner can both observe it.
+
+In worker mode several processes run this module side by side, and
+federated servers link several nodes; whatever concerns users of another
+process or node goes through server.core.backplane.
+"""
+
+import json
+import socket
+import time
+
+from server.config import (
+    DISCOVERY_INTERVAL,
+    FEDERATION_PORT,
+    HANDSHAKE_TIMEOUT,
+    HISTORY_PAGE_LIMIT,
+    METRICS_HOST,
+    METRICS_PORT,
+    NODE_ID,
+    PEERS,
+    PREFERRED_DISCOVERY_PORT,
+    PREFERRED_PORT,
+    PROTOCOL_VERSION,
+    SERVER_HOST,
+    SLOW_CONSUMER_CHECK_INTERVAL,
+    SERVER_PORT_AUTO_FALLBACK,
+    find_available_discovery_port,
+    find_available_port,
+)
+from server.core import (
+    backplane, events, federation, games, history, metrics, ratelimit, rooms, state)
+from server.core.avatars import get_random_avatar, is_available_avatar
+from server.core.connection import ClientConnection
+from server.core.event_loop import EventLoop
+from common.framing import FrameTooLarge
+from common.wire import negotiate
+from server.core.protocol import (
+    avatar_snapshot,
+    broadcast_json,
+    check_slow_consumers,
+    close_after_flush,
+    read_messages,
+    send_json_message,
+)
+
+
+def get_local_ip():
+    """Resolve a best-effort local IP used for outbound traffic."""
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            s.connect(("8.8.8.8", 80))
+            return s.getsockname()[0]
+    except Exception:
+        try:
+            return socket.gethostbyname(socket.gethostname())
+        except Exception:
+            return "127.0.0.1"
+
+
+def log(text):
+    """Report a server log line to every subscribed front-end."""
+    events.emit(events.LOG, text)
+
+
+def update_user_list():
+    """Notify front-ends that the set of online users changed."""
+    events.emit(events.USERS_CHANGED)
+
+
+def update_server_info_label():
+    """Notify front-ends that host, server port or discovery port changed."""
+    events.emit(events.SERVER_INFO)
+
+
+def broadcast_user_list():
+    """Broadcast the current user list to all connected clients."""
+    with state.clients_lock:
+        usernames = list(state.clients.values())
+    usernames.extend(state.remote_users)
+    broadcast_json("USERLIST", {"users": usernames})
+
+
+def broadcast_avatars():
+    """Broadcast all avatars to all clients."""
+    for username, avatar in state.user_avatars.items():
+        if avatar:
+            broadcast_json("AVATAR", {"username": username, "avatar": avatar})
+
+
+def broadcast_avatars_to_client(client_socket):
+    """Send all current avatars to a specific new client.
+
+    The snapshot is one AVATARS message rather than an AVATAR per online
+    user, so a login costs one frame however many users are online.
+    """
+    try:
+        send_json_message(client_socket, "AVATARS", {"avatars": avatar_snapshot()})
+    except Exception:
+        pass
+
+
+def broadcast_new_user_avatar(username):
+    """Broadcast only the new user's avatar to existing clients."""
+    avatar = state.user_avatars.get(username)
+    if avatar:
+        broadcast_json("AVATAR", {"username": username, "avatar": avatar})
+
+
+def handle_avatar_change(username, avatar_name, client_socket):
+    """Process and validate avatar change request from a client.
+
+    Verifies avatar exists in available avatars, updates server state,
+    and broadcasts the change to all connected clients.
+
+    Args:
+        username: Username of the client changing avatar
+        avatar_name: Name of the avatar file to switch to
+        client_socket: Socket of the requesting client
+    """
+    if not is_available_avatar(avatar_name):
+        try:
+            send_json_message(client_socket, "AVATAR_ERROR", {})
+        except Exception:
+            disconnect_client(client_socket)
+        return
+
+    with state.clients_lock:
+        state.user_avatars[username] = avatar_name
+    broadcast_json("AVATAR", {"username": username, "avatar": avatar_name})
+    backplane.publish("AVATAR", {"username": username, "avatar": avatar_name})
+
+
+def deliver(username, msg_type, data):
+    """Send a message to a user wherever it is connected.
+
+    Users of this process get it queued directly; in worker mode a user of
+    another worker gets it through a backplane DELIVER.
+
+    Returns:
+        True if the user is online
+    """
+    target_socket = state.get_client_socket(username)
+    if target_socket is not None:
+        send_json_message(target_socket, msg_type, data)
+        return True
+    node = state.remote_users.get(username)
+    if node is None:
+        return False
+    backplane.publish("DELIVER", {"to": username, "type": msg_type, "data": data}, node=node)
+    return True
+
+
+def latest_seq(key):
+    """Newest history sequence number of a chat, or None if this worker cannot tell."""
+    if backplane.history_on_hub():
+        return backplane.latest_seqs.get(key)
+    return history.latest_seq(key)
+
+
+def read_trace(client_socket, trace):
+    """Keep the client's fields of a CHAT trace and stamp when the server read it.
+
+    Traces let clients split a message's latency into hops (see
+    client.core.tracing); timestamps are integer microseconds.
+
+    Returns:
+        The trace to pass along, or None if the message is not traced
+    """
+    if not isinstance(trace, dict):
+        return None
+    conn = state.connections.get(client_socket)
+    client_ts = trace.get("client_ts")
+    return {
+        "id": str(trace.get("id", ""))[:64],
+        "client_ts": client_ts if isinstance(client_ts, int) else None,
+        "server_in": (conn.received_at if conn is not None else time.time_ns()) // 1000,
+    }
+
+
+def post_chat(author, key, sender, recipient, text, trace=None):
+    """Store a chat message in its history and deliver it.
+
+    In worker mode the hub stores the message and hands it back (with its
+    sequence number) to every worker that has recipients. Federated nodes
+    store and deliver it locally and pass it on; each peer stores its own
+    copy. Private messages only go to the recipient's worker or node.
+
+    Args:
+        author: Username of the connection that sent the message; its own
+            socket is skipped
+        key: History key of the chat
+        sender: Sender name shown to the recipients
+        recipient: "general", a room or a username
+        text: Message text
+        trace: Trace fields from read_trace(), or None
+    """
+    message = {"author": author, "key": key, "sender": sender,
+               "recipient": recipient, "text": text}
+    if trace is not None:
+        message["trace"] = trace
+    private = recipient != "general" and not rooms.is_room_id(recipient)
+    node = state.remote_users.get(recipient) if private else None
+    if backplane.history_on_hub():
+        if private and node is None:
+            node = backplane.node_id
+        backplane.publish("CHAT", message, node=node)
+        return
+    if node is not None or not private:
+        backplane.publish("CHAT", message, node=node)
+    message["seq"] = history.record_message(key, sender, recipient, text)["seq"]
+    deliver_chat(message)
+
+
+def deliver_chat(message):
+    """Queue a stored chat message for the recipients connected to this process."""
+    recipient = message["recipient"]
+    data = {"sender": message["sender"], "recipient": recipient,
+            "text": message["text"], "seq": message["seq"]}
+    trace = message.get("trace")
+    if trace is not None:
+        data["trace"] = dict(trace, server_out=time.time_ns() // 1000)
+    author_socket = state.get_client_socket(message["author"])
+    if recipient == "general":
+        broadcast_json("CHAT", data, sender_socket=author_socket)
+    elif rooms.is_room_id(recipient):
+        broadcast_json("CHAT", data, sender_socket=author_socket,
+                       recipients=rooms.get_members(recipient))
+    else:
+        target_socket = state.get_client_socket(recipient)
+        if target_socket is not None:
+            send_json_message(target_socket, "CHAT", data)
+
+
+def room_notice(room, text, sender_socket=None):
+    """Send a SYSTEM line to the members of a room on every worker."""
+    broadcast_json("SYSTEM", {"text": text, "chat_id": room},
+                   sender_socket=sender_socket, recipients=rooms.get_members(room))
+    backplane.publish("NOTICE", {"room": room, "text": text})
+
+
+def mirror_game(action, player, opponent, **fields):
+    """Replay a game session change on the opponent's worker (worker mode only)."""
+    node = state.remote_users.get(opponent)
+    if node is not None:
+        backplane.publish("GAME", dict(fields, action=action, player=player,
+                                       opponent=opponent), node=node)
+
+
+def send_private(sender_socket, target_username, message, trace=None):
+    """Send a private message to a specific user.
+
+    Routes a message from one client to another by finding the target socket
+    and sending the message. Notifies sender if target is not found. Delivered
+    messages are appended to the pair's history.
+
+    Args:
+        sender_socket: Socket of the sending client
+        target_username: Username of the recipient
+        message: Message text to send
+        trace: Trace fields from read_trace(), or None
+    """
+    sender_name = state.clients.get(sender_socket, "unknown")
+
+    if not state.is_online(target_username):
+        try:
+            send_json_message(sender_socket, "SYSTEM", {
+                              "text": f"User {target_username} not found", "chat_id": "general"})
+        except Exception:
+            disconnect_client(sender_socket)
+        return
+
+    post_chat(sender_name, history.chat_key(sender_name, target_username),
+              sender_name, target_username, message, trace)
+
+
+def room_usernames(room):
+    """Return the sorted usernames of a room's members."""
+    return sorted(filter(None, (state.clients.get(sock) for sock in rooms.get_members(room))))
+
+
+def join_chat_room(client_socket, username, name, create=False):
+    """Handle ROOM_JOIN / ROOM_CREATE: add a client to a room.
+
+    The joiner gets ROOM_JOINED with the member list and the room's newest
+    history sequence number; the other members get a SYSTEM notice.
+
+    Args:
+        client_socket: Socket of the joining client
+        username: Username of the joining client
+        name: Requested room name, with or without the leading '#'
+        create: True for ROOM_CREATE, which fails if the room already exists
+    """
+    room = rooms.normalize_room_name(name)
+    if room is None:
+        send_json_message(client_socket, "SYSTEM", {
+                          "text": f"Invalid room name: {name}", "chat_id": "general"})
+        return
+    if create and rooms.room_exists(room):
+        send_json_message(client_socket, "SYSTEM", {
+                          "text": f"Room {room} already exists", "chat_id": "general"})
+        return
+
+    if rooms.join_room(room, client_socket):
+        log(f"[#] {username} joined {room}")
+        room_notice(room, f"{username} joined {room}", sender_socket=client_socket)
+    send_json_message(client_socket, "ROOM_JOINED", {
+        "room": room,
+        "members": room_usernames(room),
+        "seq": latest_seq(history.chat_key(username, room)),
+    })
+
+
+def leave_chat_room(client_socket, username, name):
+    """Handle ROOM_LEAVE: remove a client from a room and tell the rest."""
+    room = rooms.normalize_room_name(name)
+    if room is None or not rooms.leave_room(room, client_socket):
+        return
+    log(f"[#] {username} left {room}")
+    send_json_message(client_socket, "ROOM_LEFT", {"room": room})
+    room_notice(room, f"{username} left {room}")
+
+
+def send_room_message(sender_socket, sender, room, text, trace=None):
+    """Store a room message and queue it for the room's members only."""
+    if not rooms.is_member(room, sender_socket):
+        send_json_message(sender_socket, "SYSTEM", {
+                          "text": f"You are not in {room}", "chat_id": "general"})
+        return
+    post_chat(state.clients.get(sender_socket), history.chat_key(sender, room),
+              sender, room, text, trace)
+
+
+def disconnect_client(client_socket):
+    """Disconnect a client and clean up all related resources.
+
+    Removes client from active connections and rooms, closes socket, cleans
+    up avatar data, and broadcasts disconnect notification to remaining clients.
+
+    Args:
+        client_socket: Socket of the client to disconnect
+    """
+    state.loop.unregister(client_socket)
+    conn = state.connections.pop(client_socket, None)
+    if conn is not None:
+        state.loop.cancel_timer(conn.handshake_timer)
+        state.loop.cancel_timer(conn.flush_timer)
+    username = state.unregister_client(client_socket)
+    left_rooms = rooms.leave_all_rooms(client_socket)
+    try:
+        client_socket.close()
+    except Exception:
+        pass
+    if username:
+        # Set when another worker won a duplicate login (see on_remote_join)
+        taken_over = username in state.remote_users
+        if not taken_over:
+            state.user_avatars.pop(username, None)
+        games.end_sessions_for(username)
+        log(f"[-] {username} disconnected")
+        for room in left_rooms:
+            room_notice(room, f"{username} left {room}")
+        if taken_over:
+            # Still online on the other worker: no LEAVE, no "left the chat",
+            # and the user list the clients hold stays correct as it is
+            update_user_list()
+            return
+        backplane.publish("LEAVE", {"username": username})
+        broadcast_json(
+            "SYSTEM", {"text": f"{username} left the chat", "chat_id": "general"})
+        update_user_list()
+        broadcast_user_list()
+
+
+def handle_json_message(client_socket, username, msg_obj):
+    """Process incoming JSON messages from a connected client.
+
+    Routes different message types (CHAT, GAME_INVITE, GAME_MOVE, etc.) to
+    appropriate handlers. Manages peer-to-peer communication and game state.
+
+    Args:
+        client_socket: Socket of the sending client
+        username: Username of the client
+        msg_obj: Parsed JSON message object with 'type' and 'data' fields
+    """
+    try:
+        msg_type = msg_obj.get("type", "")
+        data = msg_obj.get("data", {})
+
+        if msg_type == "CHAT":
+            # The sender is always the logged-in user; data["sender"] is ignored
+            recipient = data.get("recipient", "general")
+            text = data.get("text", "")
+            trace = read_trace(client_socket, data.get("trace"))
+
+            if recipient == "general":
+                post_chat(username, history.GENERAL_CHAT, username, "general", text, trace)
+            elif rooms.is_room_id(recipient):
+                send_room_message(client_socket, username, recipient, text, trace)
+            else:
+                send_private(client_socket, recipient, text, trace)
+
+        elif msg_type == "HISTORY":
+            send_history(client_socket, username, data)
+
+        elif msg_type in ("ROOM_JOIN", "ROOM_CREATE"):
+            join_chat_room(client_socket, username, data.get("room"),
+                           create=msg_type == "ROOM_CREATE")
+
+        elif msg_type == "ROOM_LEAVE":
+            leave_chat_room(client_socket, username, data.get("room"))
+
+        elif msg_type == "ROOM_LIST":
+            send_json_message(client_socket, "ROOM_LIST", {
+                "rooms": [{"room": room, "members": count}
+                          for room, count in rooms.list_rooms()]})
+
+        elif msg_type == "SET_AVATAR":
+            avatar_name = data.get("avatar", "")
+            if avatar_name:
+                handle_avatar_change(username, avatar_name, client_socket)
+
+        elif msg_type == "GAME_INVITE":
+            opponent = data.get("opponent", "")
+            if opponent and opponent != username:
+                games.invite(username, opponent)
+                deliver(opponent, "GAME_INVITE", {"opponent": username})
+
+        elif msg_type == "GAME_ACCEPTED":
+            player = data.get("player", username)
+            symbol = data.get("symbol", "X")
+            opponent = data.get("opponent", "")
+            # Only the invited user can start the match
+            if opponent and games.accept_invite(opponent, username):
+                games.start_session(username, symbol, opponent)
+                mirror_game("start", username, opponent, symbol=symbol)
+                deliver(opponent, "GAME_ACCEPTED", {"player": player, "symbol": symbol})
+
+        elif msg_type == "GAME_MOVE":
+            handle_game_move(client_socket, username, data)
+
+        elif msg_type == "GAME_SYNC":
+            send_game_state(client_socket, username, data.get("opponent", ""))
+
+        elif msg_type == "GAME_RESET":
+            player = data.get("player", username)
+            symbol = data.get("symbol", "X")
+            opponent = data.get("opponent", "")
+            # A rematch restarts a running match; it cannot create one
+            if opponent and games.get_session(username, opponent) is not None:
+                games.start_session(username, symbol, opponent)
+                mirror_game("start", username, opponent, symbol=symbol)
+                deliver(opponent, "GAME_RESET", {"player": player, "symbol": symbol})
+
+        elif msg_type == "GAME_LEFT":
+            player = data.get("player", username)
+            opponent = data.get("opponent", "")
+            if opponent:
+                games.end_session(username, opponent)
+                mirror_game("end", username, opponent)
+                deliver(opponent, "GAME_LEFT", {"player": player})
+
+    except Exception as exc:
+        log(f"Error handling JSON message from {username}: {exc}")
+
+
+def handle_game_move(client_socket, username, data):
+    """Validate a GAME_MOVE against the authoritative board and fan out the delta.
+
+    Both players get GAME_MOVE {cell, symbol, current_player, opponent}; when
+    the move decides the game both also get GAME_END. A rejected move
+    resynchronizes the sender with a full GAME_STATE.
+
+    Args:
+        client_socket: Socket of the moving player
+        username: Username of the moving player
+        data: Move data with 'cell' (0-8) and 'opponent'
+    """
+    opponent = data.get("opponent", "")
+    session = games.get_session(username, opponent)
+    if session is None:
+        send_json_message(client_socket, "GAME_LEFT", {"player": opponent})
+        return
+
+    cell = data.get("cell")
+    symbol = session.play(username, cell)
+    if symbol is None:
+        send_game_state(client_socket, username, opponent)
+        return
+
+    mirror_game("move", username, opponent, cell=cell)
+    game = session.game
+    for player, other in ((username, opponent), (opponent, username)):
+        deliver(player, "GAME_MOVE", {
+            "cell": cell, "symbol": symbol,
+            "current_player": game.current_player, "opponent": other})
+        if game.game_over:
+            deliver(player, "GAME_END", {"result": game.winner, "opponent": other})
+
+
+def send_game_state(client_socket, username, opponent):
+    """Answer GAME_SYNC (or a rejected move) with the full game snapshot."""
+    session = games.get_session(username, opponent)
+    if session is None:
+        send_json_message(client_socket, "GAME_STATE", {
+                          "opponent": opponent, "board": None})
+        return
+    send_json_message(client_socket, "GAME_STATE", session.state_for(username))
+
+
+def send_history(client_socket, username, data):
+    """Answer a HISTORY request with one page of a chat's stored messages.
+
+    Args:
+        client_socket: Socket of the requesting client
+        username: Username of the requesting client
+        data: Request data with 'chat_id' and optional 'before' (sequence
+            number, exclusive) and 'limit'
+    """
+    chat_id = data.get("chat_id")
+    if not isinstance(chat_id, str) or not chat_id:
+        return
+    if rooms.is_room_id(chat_id) and not rooms.is_member(chat_id, client_socket):
+        return
+    before = data.get("before")
+    if not isinstance(before, int):
+        before = None
+    limit = data.get("limit")
+    if not isinstance(limit, int) or limit < 1:
+        limit = HISTORY_PAGE_LIMIT
+    key = history.chat_key(username, chat_id)
+    limit = min(limit, HISTORY_PAGE_LIMIT)
+    if backplane.history_on_hub():
+        # The hub owns the history files and answers with a DELIVER
+        backplane.publish("HISTORY", {"username": username, "chat_id": chat_id,
+                                      "key": key, "before": before, "limit": limit})
+        return
+    send_json_message(client_socket, "HISTORY",
+                      history.history_page(key, chat_id, before, limit))
+
+
+def reject_login(conn, reason, text):
+    """Refuse a handshake with LOGIN_REJECTED and close once it is sent.
+
+    Args:
+        conn: ClientConnection being rejected
+        reason: Machine-readable reason code (e.g. "USERNAME_TAKEN")
+        text: Human-readable explanation
+    """
+    send_json_message(conn.sock, "LOGIN_REJECTED", {
+                      "reason": reason, "text": text})
+    close_after_flush(conn.sock)
+
+
+def complete_login(conn, data):
+    """Register a client from its LOGIN frame.
+
+    Checks the protocol version, rejects empty or duplicate usernames,
+    assigns a random avatar, confirms with LOGIN_OK and announces the new
+    user to everyone else. LOGIN_OK names the wire format picked from the
+    client's 'encodings' offer; it is the last JSON frame of the session
+    when another format was chosen. 'general_seq' tells the client where
+    the general chat history ends at the moment it joined.
+
+    Args:
+        conn: ClientConnection of the logging-in client
+        data: LOGIN frame data with 'version', 'username' and optional 'encodings'
+    """
+    client_socket = conn.sock
+    if data.get("version") != PROTOCOL_VERSION:
+        reject_login(conn, "VERSION_MISMATCH",
+                     f"Server speaks protocol version {PROTOCOL_VERSION}")
+        return
+
+    username = str(data.get("username", "")).strip()
+    if not username:
+        reject_login(conn, "INVALID_USERNAME", "Username must not be empty")
+        return
+    if rooms.is_room_id(username):
+        # '#name' chat ids are rooms
+        reject_login(conn, "INVALID_USERNAME", "Username must not start with '#'")
+        return
+
+    if username in state.remote_users or not state.register_client(client_socket, username):
+        reject_login(conn, "USERNAME_TAKEN", "Username already taken")
+        return
+    conn.username = username
+    avatar = get_random_avatar()
+    state.user_avatars[username] = avatar
+
+    codec = negotiate(data.get("encodings"))
+    send_json_message(client_socket, "LOGIN_OK", {
+        "username": username, "avatar": avatar, "version": PROTOCOL_VERSION,
+        "encoding": codec.name, "general_seq": latest_seq(history.GENERAL_CHAT)})
+    conn.use_codec(codec)
+
+    log(f"[+] {username} joined from {conn.address}")
+    broadcast_json(
+        "SYSTEM", {"text": f"{username} joined the chat", "chat_id": "general"})
+    update_user_list()
+    broadcast_user_list()
+    broadcast_avatars_to_client(client_socket)
+    broadcast_new_user_avatar(username)
+    backplane.publish("JOIN", {"username": username, "avatar": avatar})
+
+
+def handle_handshake(conn, parsed):
+    """Classify a new connection by its first frame.
+
+    A STATUS frame is a health probe, a LOGIN frame starts a chat session;
+    anything else is rejected straight away.
+
+    Args:
+        conn: ClientConnection that has not logged in yet
+        parsed: First frame received on the connection, parsed (None if not JSON)
+    """
+    state.loop.cancel_timer(conn.handshake_timer)
+    conn.handshake_timer = None
+
+    msg_type = parsed.get("type") if isinstance(parsed, dict) else None
+    if msg_type == "STATUS":
+        answer_status_request(conn)
+    elif msg_type == "LOGIN":
+        complete_login(conn, parsed.get("data") or {})
+    else:
+        reject_login(conn, "BAD_HANDSHAKE",
+                     "Expected a LOGIN or STATUS frame")
+
+
+def expire_handshake(client_socket):
+    """Drop a connection that did not send its handshake frame in time."""
+    conn = state.connections.get(client_socket)
+    if conn is not None and not conn.logged_in and not conn.closing:
+        disconnect_client(client_socket)
+
+
+def answer_status_request(conn):
+    """Reply to a STATUS health probe with liveness and load, then close.
+
+    Args:
+        conn: ClientConnection that sent the probe
+    """
+    send_json_message(conn.sock, "STATUS", {
+        "online": True,
+        "users": len(state.clients) + len(state.remote_users),
+        "connections": len(state.connections),
+    })
+    close_after_flush(conn.sock)
+
+
+def throttle(conn, msg_type, msg_obj):
+    """Apply the sender's rate limit to one message before it is dispatched.
+
+    A dropped message is answered with a single SYSTEM notice per throttled
+    streak, in the chat the message was meant for.
+
+    Args:
+        conn: ClientConnection that sent the message
+        msg_type: The message's type
+        msg_obj: Parsed message object
+
+    Returns:
+        True if the message must be dropped
+    """
+    allowed, notify = ratelimit.allow(conn, msg_type)
+    if allowed:
+        return False
+    metrics.THROTTLED.inc(msg_type)
+    if notify:
+        log(f"[WARN] Throttling {msg_type} from {conn.username}")
+        data = msg_obj.get("data")
+        chat_id = data.get("recipient") if isinstance(data, dict) else None
+        send_json_message(conn.sock, "SYSTEM", {
+            "text": "You are sending too fast, some messages were not delivered",
+            "chat_id": chat_id if isinstance(chat_id, str) and chat_id else "general"})
+    return True
+
+
+def handle_client_data(client_socket):
+    """Read available data from a client socket and dispatch complete frames.
+
+    Called by the event loop whenever the socket is readable. The first frame
+    of a connection is its handshake (LOGIN or STATUS); every following frame
+    is a message in the negotiated wire format. Frames above MAX_FRAME_SIZE
+    drop the connection.
+
+    Args:
+        client_socket: Readable client socket
+    """
+    conn = state.connections.get(client_socket)
+    if conn is None:
+        return
+    try:
+        messages = read_messages(conn)
+        if messages is None:
+            disconnect_client(client_socket)
+            return
+        conn.received_at = time.time_ns()
+
+        for raw, parsed in messages:
+            if conn.closing or client_socket not in state.connections:
+                break
+
+            if not conn.logged_in:
+                handle_handshake(conn, parsed)
+                continue
+
+            if isinstance(parsed, dict):
+                msg_type = parsed.get("type")
+                if not isinstance(msg_type, str):
+                    msg_type = ""
+                metrics.MESSAGES_IN.inc(msg_type)
+                if throttle(conn, msg_type, parsed):
+                    continue
+                started = time.perf_counter()
+                handle_json_message(client_socket, conn.username, parsed)
+                metrics.HANDLER_SECONDS.observe(time.perf_counter() - started, msg_type)
+            else:
+                log(
+                    f"[WARN] Dropping malformed message from {conn.username}: {raw[:80]!r}")
+    except FrameTooLarge:
+        log(f"[WARN] Oversized frame from {conn.username or conn.address}, disconnecting")
+        disconnect_client(client_socket)
+    except OSError:
+        disconnect_client(client_socket)
+
+
+def accept_client(server_socket):
+    """Accept a pending connection and hand it to the event loop.
+
+    Args:
+        server_socket: Listening socket reported readable by the loop
+    """
+    try:
+        client_socket, address = server_socket.accept()
+    except (BlockingIOError, InterruptedError):
+        return
+    client_socket.setblocking(False)
+    # Batching happens in the outbound queue; disable Nagle so a coalesced
+    # write (or a lone game move) goes out immediately
+    try:
+        client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    except OSError:
+        pass
+    conn = ClientConnection(client_socket, address)
+    state.connections[client_socket] = conn
+    metrics.CONNECTIONS_ACCEPTED.inc()
+    state.loop.add_reader(client_socket, handle_client_data)
+    conn.handshake_timer = state.loop.call_later(
+        HANDSHAKE_TIMEOUT, expire_handshake, client_socket)
+
+
+def send_discovery_broadcast(sock):
+    """Broadcast server presence on the local network via UDP.
+
+    Scheduled on the event loop every DISCOVERY_INTERVAL seconds so clients
+    can automatically detect and connect to the server.
+
+    Args:
+        sock: UDP socket with SO_BROADCAST enabled
+    """
+    try:
+        sock.sendto(state.DISCOVERY_MESSAGE.encode(),
+                    ("<broadcast>", state.DISCOVERY_PORT))
+    except Exception:
+        pass
+
+
+def create_discovery_socket():
+    """Create the UDP socket used for discovery broadcasts."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+    # Allow sharing port with client's listening socket
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if hasattr(socket, 'SO_REUSEPORT'):
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    return sock
+
+
+def announce_remote_user(username, avatar, node):
+    """Add a user of another worker to this worker's view of who is online."""
+    if state.get_client_socket(username) is not None:
+        return False
+    known = state.remote_users.get(username)
+    if known is not None and known < node:
+        return False
+    state.remote_users[username] = node
+    state.user_avatars[username] = avatar
+    return True
+
+
+def on_remote_join(data, node):
+    """JOIN op: a user logged in on another worker."""
+    username = data["username"]
+    local_socket = state.get_client_socket(username)
+    if local_socket is not None:
+        # Two workers accepted the same name at once; the lower worker keeps it
+        if node < backplane.node_id:
+            log(f"[WARN] {username} also logged in on worker {node}, dropping it here")
+            state.remote_users[username] = node
+            state.user_avatars[username] = data.get("avatar")
+            conn = state.connections.get(local_socket)
+            if conn is not None:
+                conn.abort()
+        return
+    if not announce_remote_user(username, data.get("avatar"), node):
+        return
+    broadcast_json(
+        "SYSTEM", {"text": f"{username} joined the chat", "chat_id": "general"})
+    update_user_list()
+    broadcast_user_list()
+    broadcast_new_user_avatar(username)
+
+
+def forget_remote_user(username):
+    """Remove a user of another worker and tell the local clients it left."""
+    state.remote_users.pop(username, None)
+    state.user_avatars.pop(username, None)
+    games.end_sessions_for(username)
+    broadcast_json(
+        "SYSTEM", {"text": f"{username} left the chat", "chat_id": "general"})
+
+
+def on_remote_leave(data, node):
+    """LEAVE op: a user of another worker disconnected."""
+    username = data["username"]
+    if state.remote_users.get(username) != node:
+        return
+    forget_remote_user(username)
+    update_user_list()
+    broadcast_user_list()
+
+
+def on_remote_avatar(data, node):
+    """AVATAR op: a user of another worker picked a new avatar."""
+    username = data["username"]
+    if state.remote_users.get(username) == node:
+        state.user_avatars[username] = data["avatar"]
+        broadcast_json("AVATAR", {"username": username, "avatar": data["avatar"]})
+
+
+def on_node_hello(_data, node):
+    """HELLO op: a worker (re)started; send it the users online here."""
+    with state.clients_lock:
+        usernames = list(state.clients.values())
+    backplane.publish("USERS", {"users": {
+        username: state.user_avatars.get(username) for username in usernames}}, node=node)
+
+
+def on_remote_users(data, node):
+    """USERS op: snapshot of another worker's users, answering our HELLO.
+
+    Users remembered for that worker but missing from the snapshot left
+    while the link was down.
+    """
+    users = data.get("users", {})
+    gone = [username for username, owner in state.remote_users.items()
+            if owner == node and username not in users]
+    for username in gone:
+        forget_remote_user(username)
+    added = [username for username, avatar in users.items()
+             if announce_remote_user(username, avatar, node)]
+    if added or gone:
+        update_user_list()
+        broadcast_user_list()
+        for username in added:
+            broadcast_new_user_avatar(username)
+
+
+def on_node_down(data, _origin):
+    """NODE_DOWN op: a worker died; its users are gone."""
+    node = data.get("node")
+    gone = [username for username, owner in state.remote_users.items() if owner == node]
+    for username in gone:
+        forget_remote_user(username)
+    if gone:
+        log(f"[-] Node {node} went down with {len(gone)} user(s)")
+        update_user_list()
+        broadcast_user_list()
+
+
+def on_deliver(data, _origin):
+    """DELIVER op: a message for a user connected to this worker."""
+    target_socket = state.get_client_socket(data.get("to"))
+    if target_socket is not None:
+        if data["type"] == "GAME_INVITE":
+            # The invitee answers on this worker, so the invite is checked here
+            games.invite(data["data"].get("opponent"), data["to"])
+        send_json_message(target_socket, data["type"], data["data"])
+
+
+def on_chat(data, _origin):
+    """CHAT op: a chat message from another worker or node, to be delivered here.
+
+    Messages relayed by the hub already carry their sequence number; a
+    federated node stores its own copy first.
+    """
+    recipient = data["recipient"]
+    if "seq" not in data:
+        data["seq"] = history.record_message(
+            data["key"], data["sender"], recipient, data["text"])["seq"]
+    elif recipient == "general" or rooms.is_room_id(recipient):
+        backplane.latest_seqs[data["key"]] = data["seq"]
+    deliver_chat(data)
+
+
+def on_notice(data, _origin):
+    """NOTICE op: a SYSTEM line for a room's members on this worker."""
+    room = data["room"]
+    broadcast_json("SYSTEM", {"text": data["text"], "chat_id": room},
+                   recipients=rooms.get_members(room))
+
+
+def on_game(data, _origin):
+    """GAME op: keep the local copy of a cross-worker match in step."""
+    action = data["action"]
+    player, opponent = data["player"], data["opponent"]
+    if action == "start":
+        games.start_session(player, data["symbol"], opponent)
+    elif action == "move":
+        session = games.get_session(player, opponent)
+        if session is not None:
+            session.play(player, data["cell"])
+    elif action == "end":
+        games.end_session(player, opponent)
+
+
+BACKPLANE_HANDLERS = {
+    "HELLO": on_node_hello,
+    "USERS": on_remote_users,
+    "NODE_DOWN": on_node_down,
+    "JOIN": on_remote_join,
+    "LEAVE": on_remote_leave,
+    "AVATAR": on_remote_avatar,
+    "DELIVER": on_deliver,
+    "CHAT": on_chat,
+    "NOTICE": on_notice,
+    "GAME": on_game,
+}
+
+
+def server_thread(port=None, node=None, backplane_path=None):
+    """Main server thread - initialize and run the TCP chat server.
+
+    Finds available ports for the server and discovery, creates a listening
+    socket and runs the event loop that multiplexes every client connection
+    and the discovery broadcast on this single thread. With PEERS set the
+    server also links with the other federated nodes.
+
+    Args:
+        port: Worker mode - TCP port shared (SO_REUSEPORT) with the other workers
+        node: Worker mode - number of this worker; only worker 0 sends discovery
+        backplane_path: Worker mode - Unix socket of the backplane hub
+    """
+    # Initialize port configurations
+    if port is None:
+        state.SERVER_PORT = find_available_port(
+            PREFERRED_PORT, allow_fallback=SERVER_PORT_AUTO_FALLBACK)
+        if state.SERVER_PORT is None:
+            log(
+                f"[ERROR] Could not find available port starting from {PREFERRED_PORT}")
+            return
+    else:
+        state.SERVER_PORT = port
+
+    discovery = not node
+    if discovery:
+        state.DISCOVERY_PORT = find_available_discovery_port(
+            PREFERRED_DISCOVERY_PORT,
+        )
+        if state.DISCOVERY_PORT is None:
+            log(
+                f"[ERROR] Could not find available discovery port starting from {PREFERRED_DISCOVERY_PORT}")
+            return
+
+        state.BROADCAST_IP = get_local_ip()
+        discovery_data = {"port": state.SERVER_PORT, "ip": state.BROADCAST_IP}
+        if PEERS:
+            discovery_data["node"] = NODE_ID or f"{state.BROADCAST_IP}:{state.SERVER_PORT}"
+        state.DISCOVERY_MESSAGE = json.dumps(
+            {"type": "DISCOVERY", "data": discovery_data})
+
+    server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if port is not None:
+        server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    server_socket.bind((SERVER_HOST, state.SERVER_PORT))
+    server_socket.listen(socket.SOMAXCONN)
+    server_socket.setblocking(False)
+
+    state.loop = EventLoop()
+    state.loop.add_reader(server_socket, accept_client)
+    state.loop.call_every(SLOW_CONSUMER_CHECK_INTERVAL, check_slow_consumers)
+    if METRICS_PORT:
+        metrics.start(METRICS_HOST, METRICS_PORT + (node or 0))
+    if discovery:
+        state.loop.call_every(DISCOVERY_INTERVAL,
+                              send_discovery_broadcast, create_discovery_socket())
+    if backplane_path is not None or PEERS:
+        for op, handler in BACKPLANE_HANDLERS.items():
+            backplane.subscribe(op, handler)
+    if backplane_path is not None:
+        backplane.connect(backplane_path, node)
+    elif PEERS:
+        try:
+            federation.start(NODE_ID or f"{get_local_ip()}:{state.SERVER_PORT}",
+                             FEDERATION_PORT, PEERS)
+        except OSError as exc:
+            log(f"[ERROR] Could not listen for federation peers on port {FEDERATION_PORT}: {exc}")
+
+    update_server_info_label()
+    log(f"[*] Server listening on {SERVER_HOST}:{state.SERVER_PORT}")
+
+    state.loop.run_forever()
@@ -0,0 +1,131 @@
+"""Per-connection bookkeeping for the Lord of the Pings server.
+
+Each accepted TCP socket gets a ClientConnection that carries the data the
+event loop needs between reads and writes: the peer address, the logged-in
+username (None until the LOGIN frame arrives), the frame decoder holding
+partially received input, the negotiated wire codec and a bounded queue of
+encoded messages waiting to be written.
+"""
+
+import socket
+import time
+from collections import deque
+
+from common.framing import FrameDecoder
+from common.wire import JSON_CODEC
+from server.config import MAX_FRAME_SIZE, OUTBOUND_QUEUE_MAX_BYTES
+
+# Upper bound of bytes joined into a single send() call
+MAX_WRITE_BATCH = 64 * 1024
+
+
+class ClientConnection:
+    """State for one accepted client socket."""
+
+    def __init__(self, sock, address):
+        """Track a freshly accepted socket.
+
+        Args:
+            sock: Accepted client socket (non-blocking)
+            address: Tuple (host, port) of the connecting client
+        """
+        self.sock = sock
+        self.address = address
+        self.username = None
+        self.decoder = FrameDecoder(MAX_FRAME_SIZE)
+        self.codec = JSON_CODEC
+        self.outbox = deque()
+        self.queued_bytes = 0
+        self.flush_timer = None
+        self.closing = False
+        self.handshake_timer = None
+        self.rate_buckets = {}  # message type -> ratelimit.TokenBucket
+        self.received_at = 0  # time.time_ns() of the last read, for message traces
+        # time.monotonic() of the last write progress (or of queueing into an empty outbox)
+        self.last_write = time.monotonic()
+        # Slow consumer downgraded to point-to-point messages only, and the
+        # number of broadcasts it missed since
+        self.degraded = False
+        self.skipped = 0
+
+    @property
+    def logged_in(self):
+        """True once the client has completed the LOGIN handshake."""
+        return self.username is not None
+
+    def use_codec(self, codec):
+        """Switch both directions of the connection to a negotiated wire format.
+
+        Args:
+            codec: Codec from common.wire
+        """
+        self.codec = codec
+        self.decoder.set_length_prefixed(codec.length_prefixed)
+
+    def enqueue(self, payload):
+        """Queue encoded bytes for the writer.
+
+        Args:
+            payload: Bytes to send
+
+        Returns:
+            True if queued, False if it would exceed OUTBOUND_QUEUE_MAX_BYTES
+        """
+        # Bounded by bytes, not messages: a login snapshot is many small frames
+        if self.queued_bytes + len(payload) > OUTBOUND_QUEUE_MAX_BYTES:
+            return False
+        if not self.outbox:
+            self.last_write = time.monotonic()
+        self.outbox.append(payload)
+        self.queued_bytes += len(payload)
+        return True
+
+    def flush(self):
+        """Write as much queued output as the socket accepts without blocking.
+
+        Queued messages are joined into one buffer of up to MAX_WRITE_BATCH
+        bytes per send(), so a burst costs one syscall and usually one TCP
+        segment instead of one per message.
+
+        Returns:
+            True once the outbound queue is empty
+
+        Raises:
+            OSError: If the peer is gone
+        """
+        outbox = self.outbox
+        while outbox:
+            if len(outbox) > 1 and len(outbox[0]) < MAX_WRITE_BATCH:
+                parts = [outbox.popleft()]
+                size = len(parts[0])
+                while outbox and size + len(outbox[0]) <= MAX_WRITE_BATCH:
+                    size += len(outbox[0])
+                    parts.append(outbox.popleft())
+                outbox.appendleft(b"".join(parts))
+            chunk = outbox[0]
+            try:
+                sent = self.sock.send(chunk)
+            except (BlockingIOError, InterruptedError):
+                return False
+            self.queued_bytes -= sent
+            if sent:
+                self.last_write = time.monotonic()
+            if sent < len(chunk):
+                outbox[0] = memoryview(chunk)[sent:]
+                return False
+            outbox.popleft()
+        return True
+
+    def stalled_for(self, now):
+        """Seconds the socket has accepted nothing while output was waiting."""
+        return now - self.last_write if self.outbox else 0.0
+
+    def abort(self):
+        """Shut the socket down so the read side reports EOF and cleanup runs."""
+        self.closing = True
+        self.outbox.clear()
+        self.queued_bytes = 0
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
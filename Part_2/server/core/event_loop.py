@@ -0,0 +1,193 @@
+"""Single-threaded socket event loop for the Lord of the Pings server.
+
+Multiplexes every client socket, the listening socket and periodic jobs
+(such as the discovery broadcast) on one ``selectors`` loop, so the server
+no longer needs an OS thread per connected client.
+"""
+
+import heapq
+import itertools
+import selectors
+import socket
+import threading
+import time
+import traceback
+from collections import deque
+
+from server.core import events
+
+
+class EventLoop:
+    """Minimal selector-based reactor with timers and thread-safe callbacks.
+
+    Sockets are registered together with callbacks that are invoked when the
+    socket becomes readable or, while output is pending, writable. Timers
+    are kept in a heap and ``call_soon_threadsafe`` lets other threads
+    (e.g. the admin GUI) hand work over to the loop thread.
+    """
+
+    def __init__(self):
+        """Create the selector, timer heap and wake-up channel."""
+        self.selector = selectors.DefaultSelector()
+        self._timers = []
+        self._timer_ids = itertools.count()
+        self._ready = deque()
+        self._running = False
+        self._thread_id = None
+
+        # Socket pair used to interrupt select() when work is posted from another thread
+        self._wakeup_recv, self._wakeup_send = socket.socketpair()
+        self._wakeup_recv.setblocking(False)
+        self._wakeup_send.setblocking(False)
+        self.add_reader(self._wakeup_recv, self._drain_wakeup)
+
+    def _update(self, sock, reader, writer):
+        """Register, modify or unregister sock so its interest matches the callbacks."""
+        mask = (selectors.EVENT_READ if reader else 0) | (
+            selectors.EVENT_WRITE if writer else 0)
+        try:
+            key = self.selector.get_key(sock)
+        except (KeyError, ValueError):
+            key = None
+        if key is None:
+            if mask:
+                self.selector.register(sock, mask, (reader, writer))
+        elif mask:
+            self.selector.modify(sock, mask, (reader, writer))
+        else:
+            self.selector.unregister(sock)
+
+    def _callbacks(self, sock):
+        """Return the (reader, writer) callbacks currently registered for sock."""
+        try:
+            return self.selector.get_key(sock).data
+        except (KeyError, ValueError):
+            return None, None
+
+    def add_reader(self, sock, callback):
+        """Invoke callback(sock) whenever the socket becomes readable."""
+        _reader, writer = self._callbacks(sock)
+        self._update(sock, callback, writer)
+
+    def add_writer(self, sock, callback):
+        """Invoke callback(sock) whenever the socket becomes writable."""
+        reader, _writer = self._callbacks(sock)
+        self._update(sock, reader, callback)
+
+    def remove_writer(self, sock):
+        """Stop waiting for writability on sock."""
+        reader, writer = self._callbacks(sock)
+        if writer is not None:
+            self._update(sock, reader, None)
+
+    def remove_reader(self, sock):
+        """Stop waiting for readability on sock."""
+        reader, writer = self._callbacks(sock)
+        if reader is not None:
+            self._update(sock, None, writer)
+
+    def unregister(self, sock):
+        """Stop watching a socket entirely. Unknown or closed sockets are ignored."""
+        try:
+            self.selector.unregister(sock)
+        except (KeyError, ValueError):
+            pass
+
+    def call_later(self, delay, callback, *args):
+        """Schedule callback(*args) to run on the loop after delay seconds.
+
+        Returns:
+            Timer handle that can be passed to cancel_timer()
+        """
+        handle = [time.monotonic() + delay, next(self._timer_ids), callback, args]
+        heapq.heappush(self._timers, handle)
+        return handle
+
+    def call_every(self, interval, callback, *args):
+        """Run callback(*args) now and then every interval seconds."""
+
+        def tick():
+            try:
+                callback(*args)
+            finally:
+                self.call_later(interval, tick)
+
+        return self.call_later(0, tick)
+
+    def cancel_timer(self, handle):
+        """Cancel a timer returned by call_later()."""
+        if handle is not None:
+            handle[2] = None
+
+    def call_soon_threadsafe(self, callback, *args):
+        """Queue callback(*args) for the loop thread from any thread."""
+        self._ready.append((callback, args))
+        if threading.get_ident() != self._thread_id:
+            try:
+                self._wakeup_send.send(b"\0")
+            except OSError:
+                pass
+
+    def in_loop_thread(self):
+        """Return True when called from the thread running the loop."""
+        return threading.get_ident() == self._thread_id
+
+    def _safe_call(self, callback, *args):
+        """Run a callback, logging and surviving any exception it raises."""
+        try:
+            callback(*args)
+        except Exception:
+            name = getattr(callback, "__qualname__", repr(callback))
+            events.emit(events.LOG, f"[ERROR] Unhandled exception in {name}:\n"
+                                    f"{traceback.format_exc().rstrip()}")
+
+    def _drain_wakeup(self, sock):
+        """Discard wake-up bytes; the queued callbacks run in run_forever()."""
+        try:
+            while sock.recv(4096):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+
+    def _next_timeout(self):
+        """Seconds until the next timer fires, or None to block indefinitely."""
+        if self._ready:
+            return 0
+        while self._timers and self._timers[0][2] is None:
+            heapq.heappop(self._timers)
+        if not self._timers:
+            return None
+        return max(0.0, self._timers[0][0] - time.monotonic())
+
+    def _run_timers(self):
+        """Run every timer whose deadline has passed."""
+        now = time.monotonic()
+        while self._timers and self._timers[0][0] <= now:
+            _deadline, _tid, callback, args = heapq.heappop(self._timers)
+            if callback is not None:
+                self._safe_call(callback, *args)
+
+    def _run_ready(self):
+        """Run callbacks posted through call_soon_threadsafe()."""
+        for _ in range(len(self._ready)):
+            callback, args = self._ready.popleft()
+            self._safe_call(callback, *args)
+
+    def run_forever(self):
+        """Dispatch socket events, timers and posted callbacks until stop()."""
+        self._thread_id = threading.get_ident()
+        self._running = True
+        while self._running:
+            events = self.selector.select(self._next_timeout())
+            for key, mask in events:
+                reader, writer = key.data
+                if mask & selectors.EVENT_READ and reader is not None:
+                    self._safe_call(reader, key.fileobj)
+                if mask & selectors.EVENT_WRITE and writer is not None:
+                    self._safe_call(writer, key.fileobj)
+            self._run_timers()
+            self._run_ready()
+
+    def stop(self):
+        """Ask the loop to exit after the current iteration."""
+        self.call_soon_threadsafe(setattr, self, "_running", False)
@@ -0,0 +1,42 @@
+"""Observer hooks between the Lord of the Pings networking core and its front-ends.
+
+The networking core never talks to a user interface directly. It emits named
+events (log lines, user list changes, server info updates) and whichever
+front-end is running - the customtkinter admin window or the headless console
+logger - subscribes to the ones it cares about.
+"""
+
+import threading
+
+# Event names emitted by the networking core
+LOG = "log"
+USERS_CHANGED = "users_changed"
+SERVER_INFO = "server_info"
+
+_subscribers = {}
+_subscribers_lock = threading.Lock()
+
+
+def subscribe(event, callback):
+    """Register callback(*args) to be called whenever event is emitted.
+
+    Args:
+        event: Event name (LOG, USERS_CHANGED or SERVER_INFO)
+        callback: Callable invoked with the event's arguments
+    """
+    with _subscribers_lock:
+        _subscribers.setdefault(event, []).append(callback)
+
+
+def emit(event, *args):
+    """Notify every subscriber of event. Subscriber errors are ignored.
+
+    Args:
+        event: Event name
+        *args: Arguments passed to each subscriber
+    """
+    for callback in _subscribers.get(event, ()):
+        try:
+            callback(*args)
+        except Exception:
+            pass
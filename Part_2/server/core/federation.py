@@ -0,0 +1,336 @@
+"""Federation of several Lord of the Pings servers over TCP peer links.
+
+Each node is a normal server with its own clients, discovery broadcast and
+chat history. Nodes listed in PEERS are linked with one TCP connection per
+pair, and the links carry the same ops the worker backplane uses (see
+server.core.backplane), so users connected to different nodes share one
+user list and one general chat, and can message and play each other.
+
+Unlike worker mode there is no hub: ops go straight to the peer named in
+"to" or to every peer, and each node stores the chat messages it sees in
+its own history. A node that restarts is dropped by its peers (its users go
+offline) and re-linked on the next retry; users of the other nodes stay
+connected throughout.
+
+A link is trusted only after its HELLO checks out. Without a secret, only
+connections from the hosts in PEERS are accepted. With FEDERATION_SECRET
+set, each end sends a random nonce in its HELLO, and both derive a link key
+from the secret, both nonces and "<dialer node>-><accepting node>". Each
+end proves the key for its own role in AUTH, so the secret never crosses
+the wire and an answer obtained on one link is useless on any other.
+From then on every op travels in a SEALED frame carrying a per-direction
+sequence number and an HMAC under the link key, so nobody can inject,
+replay or reorder ops on an established link. Ops arriving on a link before
+it is trusted are ignored.
+"""
+
+import errno
+import hashlib
+import hmac
+import json
+import secrets
+import socket
+
+from server.config import FEDERATION_HOST, FEDERATION_RETRY_INTERVAL, FEDERATION_SECRET
+from server.core import backplane, events, state
+
+# Seconds a peer may stay unlinked before its users are dropped; covers the
+# duplicate link closed when two nodes dial each other, and quick reconnects
+LINK_GRACE_PERIOD = 2.0
+
+
+def log(text):
+    events.emit(events.LOG, text)
+
+
+class PeerMesh:
+    """The TCP links of this node to every other federated node."""
+
+    def __init__(self, node, port, peers):
+        """Listen for peers and start dialing the configured ones.
+
+        Args:
+            node: Id of this node
+            port: TCP port peers connect to
+            peers: List of (host, port) of the other nodes' peer ports
+        """
+        self.node = node
+        self.peers = peers
+        self.links = {}  # socket -> ClientConnection (username holds the peer's node id)
+        self.dialed = {}  # socket -> (host, port) for links this node opened
+        self.by_node = {}  # node id -> socket of the link in use
+        self.address_nodes = {}  # (host, port) -> node id learned from its HELLO
+        self.nonces = {}  # socket -> nonce this node sent in its HELLO
+        self.sessions = {}  # socket -> LinkSession once the peer's HELLO arrived (secret set)
+        self.peer_ips = _resolve_hosts(host for host, _port in peers)
+
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind((FEDERATION_HOST, port))
+        self.server.listen()
+        self.server.setblocking(False)
+        state.loop.add_reader(self.server, self._accept)
+        state.loop.call_every(FEDERATION_RETRY_INTERVAL, self._dial_missing)
+
+    def send(self, payload, node):
+        """Queue an encoded op for one peer, or for all peers if node is None."""
+        if node is None:
+            targets = list(self.by_node.values())
+        else:
+            target = self.by_node.get(node)
+            targets = [target] if target is not None else []
+        for sock in targets:
+            session = self.sessions.get(sock)
+            frame = session.seal(payload) if session is not None else payload
+            backplane.queue_op(state.loop, self.links[sock], frame, self._write_ready)
+
+    def _add_link(self, sock, address):
+        conn = backplane.open_link(sock, address)
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except OSError:
+            pass
+        self.links[sock] = conn
+        nonce = self.nonces[sock] = secrets.token_hex(16)
+        state.loop.add_reader(sock, self._read)
+        # Queued now, written as soon as the (possibly pending) connect completes
+        self._queue(sock, "HELLO", {"nonce": nonce})
+
+    def _queue(self, sock, op, data):
+        backplane.queue_op(state.loop, self.links[sock], backplane.encode_op(op, data, self.node),
+                           self._write_ready)
+
+    def _accept(self, server):
+        try:
+            sock, address = server.accept()
+        except (BlockingIOError, InterruptedError):
+            return
+        if not FEDERATION_SECRET and address[0] not in self.peer_ips:
+            log(f"[federation] refused link from {address[0]} (not in PEERS)")
+            sock.close()
+            return
+        self._add_link(sock, address)
+
+    def _dial_missing(self):
+        """Timer callback: connect to every configured peer not linked yet."""
+        dialing = set(self.dialed.values())
+        for address in self.peers:
+            if address in dialing or self.address_nodes.get(address) in self.by_node:
+                continue
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setblocking(False)
+            try:
+                result = sock.connect_ex(address)
+            except OSError:
+                result = errno.EHOSTUNREACH
+            if result not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK):
+                sock.close()
+                continue
+            self.dialed[sock] = address
+            self._add_link(sock, address)
+
+    def _write_ready(self, sock):
+        conn = self.links.get(sock)
+        try:
+            if conn is None or conn.flush():
+                state.loop.remove_writer(sock)
+        except OSError:
+            self._drop(sock)
+
+    def _read(self, sock):
+        conn = self.links.get(sock)
+        if conn is None:
+            return
+        ops = backplane.read_ops(conn)
+        if ops is None:
+            self._drop(sock)
+            return
+        for _raw, frame in ops:
+            op = frame.get("op")
+            if sock not in self.links:
+                break
+            data = frame.get("data")
+            if not isinstance(data, dict):
+                data = {}
+            if op == "HELLO":
+                self._on_hello(sock, conn, frame.get("from"), data)
+            elif op == "AUTH":
+                self._on_auth(sock, conn, data)
+            elif conn.username is None:
+                continue
+            elif FEDERATION_SECRET:
+                self._on_sealed(sock, conn, frame)
+            else:
+                # Trust the link's identity, not the frame's "from"
+                backplane.dispatch(op, data, conn.username)
+
+    def _on_sealed(self, sock, conn, frame):
+        """Verify and dispatch one op of an authenticated link; drop the link on a bad frame."""
+        inner = self.sessions[sock].open(frame)
+        if inner is None:
+            log(f"[federation] bad frame from {conn.username}, dropping the link")
+            self._drop(sock)
+            return
+        data = inner.get("data")
+        backplane.dispatch(inner.get("op"), data if isinstance(data, dict) else {},
+                           conn.username)
+
+    def _dialer(self, sock, node):
+        return self.node if sock in self.dialed else node
+
+    def _on_hello(self, sock, conn, node, data):
+        """Check a peer's HELLO; with a secret, answer its nonce and await AUTH."""
+        nonce = data.get("nonce")
+        if (not isinstance(node, str) or node == self.node or conn.username is not None
+                or sock in self.sessions or not isinstance(nonce, str)):
+            self._drop(sock)
+            return
+        if not FEDERATION_SECRET:
+            self._bind(sock, conn, node)
+            return
+        session = self.sessions[sock] = LinkSession(
+            sock in self.dialed, self.node, self.nonces[sock], node, nonce)
+        self._queue(sock, "AUTH", {"mac": session.proof(session.role)})
+
+    def _on_auth(self, sock, conn, data):
+        """Trust a link once the peer proved the link key for its own role."""
+        session = self.sessions.get(sock)
+        mac = data.get("mac")
+        if (session is None or session.authenticated or not isinstance(mac, str)
+                or not hmac.compare_digest(mac, session.proof(session.peer_role))):
+            log(f"[federation] refused link from {conn.address[0]} (authentication failed)")
+            self._drop(sock)
+            return
+        session.authenticated = True
+        self._bind(sock, conn, session.peer_node)
+
+    def _bind(self, sock, conn, node):
+        """Bind a link to the peer's node id, keeping one link per peer."""
+        if sock in self.dialed:
+            self.address_nodes[self.dialed[sock]] = node
+        existing = self.by_node.get(node)
+        if existing is not None and existing is not sock:
+            # Both sides dialed: keep the link opened by the smaller node id,
+            # so the two ends agree; a link from the same dialer is a reconnect
+            if self._dialer(existing, node) < self._dialer(sock, node):
+                self._drop(sock)
+                return
+            self.links[existing].username = None
+            self._drop(existing)
+        conn.username = node
+        self.by_node[node] = sock
+        if existing is None:
+            log(f"[federation] linked with {node} ({conn.address[0]})")
+        # Answered with USERS, which also replaces whatever this node
+        # remembered about the peer's users from before a reconnect
+        backplane.dispatch("HELLO", {}, node)
+
+    def _drop(self, sock):
+        conn = self.links.pop(sock, None)
+        self.dialed.pop(sock, None)
+        self.nonces.pop(sock, None)
+        self.sessions.pop(sock, None)
+        state.loop.unregister(sock)
+        try:
+            sock.close()
+        except OSError:
+            pass
+        node = conn.username if conn is not None else None
+        if node is not None and self.by_node.get(node) is sock:
+            del self.by_node[node]
+            state.loop.call_later(LINK_GRACE_PERIOD, self._node_gone, node)
+
+    def _node_gone(self, node):
+        """Timer callback: drop a peer's users unless it was linked again."""
+        if node not in self.by_node:
+            log(f"[federation] lost link with {node}")
+            backplane.dispatch("NODE_DOWN", {"node": node}, None)
+
+
+class LinkSession:
+    """Key and sequence numbers of one link authenticated with FEDERATION_SECRET."""
+
+    def __init__(self, dialer, node, nonce, peer_node, peer_nonce):
+        """Derive the link key from the secret and the whole handshake.
+
+        Args:
+            dialer: True if this node opened the link
+            node: Id of this node
+            nonce: Nonce this node sent in its HELLO
+            peer_node: Node id the peer claimed in its HELLO
+            peer_nonce: Nonce the peer sent in its HELLO
+        """
+        self.role, self.peer_role = ("dialer", "acceptor") if dialer else ("acceptor", "dialer")
+        self.peer_node = peer_node
+        if dialer:
+            transcript = f"{nonce}:{peer_nonce}:{node}->{peer_node}"
+        else:
+            transcript = f"{peer_nonce}:{nonce}:{peer_node}->{node}"
+        self.key = _hmac(FEDERATION_SECRET.encode(), b"lotp-federation-link:" + transcript.encode())
+        self.authenticated = False
+        self.send_seq = 0
+        self.recv_seq = 0
+
+    def proof(self, role):
+        """AUTH value showing knowledge of the link key for one side's role."""
+        return _hmac(self.key, f"auth:{role}".encode()).hex()
+
+    def seal(self, payload):
+        """Wrap an encoded op frame in a SEALED frame for this link."""
+        body = payload.rstrip(b"\n")
+        seq = self.send_seq
+        self.send_seq += 1
+        mac = _hmac(self.key, f"{self.role}:{seq}:".encode() + body).hex()
+        return backplane.encode_op("SEALED", {"seq": seq, "mac": mac, "body": body.decode()})
+
+    def open(self, frame):
+        """Verify a SEALED frame from the peer and return the op frame inside it.
+
+        Returns:
+            The inner op frame, or None if the frame is not the next valid one
+        """
+        data = frame.get("data")
+        if frame.get("op") != "SEALED" or not isinstance(data, dict):
+            return None
+        seq, mac, body = data.get("seq"), data.get("mac"), data.get("body")
+        if seq != self.recv_seq or not isinstance(mac, str) or not isinstance(body, str):
+            return None
+        body = body.encode()
+        expected = _hmac(self.key, f"{self.peer_role}:{seq}:".encode() + body).hex()
+        if not hmac.compare_digest(mac, expected):
+            return None
+        self.recv_seq += 1
+        try:
+            inner = json.loads(body)
+        except ValueError:
+            return None
+        return inner if isinstance(inner, dict) else None
+
+
+def _hmac(key, message):
+    return hmac.new(key, message, hashlib.sha256).digest()
+
+
+def _resolve_hosts(hosts):
+    """Return every IP address the PEERS host names resolve to."""
+    addresses = set()
+    for host in hosts:
+        try:
+            for info in socket.getaddrinfo(host, None, socket.AF_INET, socket.SOCK_STREAM):
+                addresses.add(info[4][0])
+        except OSError:
+            log(f"[federation] could not resolve peer {host}")
+    return addresses
+
+
+def start(node, port, peers):
+    """Link this server with its peers (call after state.loop is set).
+
+    Args:
+        node: Id of this node, unique in the federation
+        port: TCP port peers connect to
+        peers: List of (host, port) of the other nodes
+    """
+    backplane.node_id = node
+    backplane.transport = PeerMesh(node, port, peers)
+    log(f"[federation] node {node} accepting peers on port {port}")
@@ -0,0 +1,135 @@
+"""Server-authoritative Tic-Tac-Toe sessions for Lord of the Pings.
+
+Each running match between two users is a GameSession keyed by the pair of
+usernames. Clients only send the index of the cell they play; the session
+validates the move against its own board, so both players always see the
+same game and a reconnecting client can be resynchronized from it. A match
+only starts when the accepting user was actually invited by its opponent.
+"""
+
+from common.tictactoe import TicTacToeGame
+
+# (username, username) sorted -> GameSession
+sessions = {}
+
+# (inviter, invitee) of the GAME_INVITEs not answered yet
+invites = set()
+
+
+def _pair(first, second):
+    return tuple(sorted((first, second)))
+
+
+class GameSession:
+    """One match: the board plus which symbol each player holds."""
+
+    def __init__(self, player, symbol, opponent):
+        """Start a fresh game.
+
+        Args:
+            player: Username playing `symbol`
+            symbol: "X" or "O"
+            opponent: Username playing the other symbol
+        """
+        self.game = TicTacToeGame()
+        self.symbols = {}
+        self.assign(player, symbol, opponent)
+
+    def assign(self, player, symbol, opponent):
+        """Reset the board and hand out symbols for the next game."""
+        symbol = "O" if symbol == "O" else "X"
+        self.symbols = {player: symbol, opponent: "O" if symbol == "X" else "X"}
+        self.game.reset()
+
+    def opponent_of(self, username):
+        return next((name for name in self.symbols if name != username), None)
+
+    def play(self, username, cell):
+        """Apply a move if it is legal.
+
+        Args:
+            username: Player making the move
+            cell: Cell index 0-8
+
+        Returns:
+            The symbol placed, or None if the move was rejected
+        """
+        game = self.game
+        symbol = self.symbols.get(username)
+        if game.game_over or symbol is None or symbol != game.current_player:
+            return None
+        # bool is an int subclass; True/False are not cell indexes
+        if type(cell) is not int or not game.make_move(cell, symbol):
+            return None
+        game.winner = game.get_winner()
+        if game.winner:
+            game.game_over = True
+        else:
+            game.current_player = "O" if symbol == "X" else "X"
+        return symbol
+
+    def state_for(self, username):
+        """Full snapshot of the game from one player's point of view."""
+        game = self.game
+        return {
+            "opponent": self.opponent_of(username),
+            "board": list(game.board),
+            "current_player": game.current_player,
+            "symbol": self.symbols.get(username),
+            "winner": game.winner,
+        }
+
+
+def invite(inviter, invitee):
+    """Remember that `inviter` asked `invitee` to play."""
+    invites.add((inviter, invitee))
+
+
+def accept_invite(inviter, invitee):
+    """Consume a pending invite.
+
+    Returns:
+        True if `inviter` had invited `invitee`
+    """
+    try:
+        invites.remove((inviter, invitee))
+    except KeyError:
+        return False
+    return True
+
+
+def start_session(player, symbol, opponent):
+    """Start (or restart) the match between two players and return it."""
+    key = _pair(player, opponent)
+    session = sessions.get(key)
+    if session is None:
+        session = sessions[key] = GameSession(player, symbol, opponent)
+    else:
+        session.assign(player, symbol, opponent)
+    return session
+
+
+def get_session(player, opponent):
+    """Return the match between two players, or None."""
+    return sessions.get(_pair(player, opponent))
+
+
+def end_session(player, opponent):
+    """Forget the match between two players."""
+    sessions.pop(_pair(player, opponent), None)
+
+
+def end_sessions_for(username):
+    """Forget every match and pending invite a (disconnecting) user takes part in.
+
+    Returns:
+        Usernames of the opponents whose match was dropped
+    """
+    invites.difference_update([pair for pair in invites if username in pair])
+    opponents = []
+    for key in [key for key in sessions if username in key]:
+        session = sessions.pop(key)
+        opponent = session.opponent_of(username)
+        if opponent:
+            opponents.append(opponent)
+    return opponents
@@ -0,0 +1,283 @@
+"""Persistent chat history for the Lord of the Pings server.
+
+Every chat (general, each room and each private pair) gets an append-only JSON-lines
+log on disk. Each record carries a per-chat sequence number, and a sparse
+index file stores the byte offset of every HISTORY_INDEX_INTERVAL-th record,
+so any page of older messages is served with one seek and a short
+sequential read. The last HISTORY_HOT_MESSAGES records of each open chat
+are also kept in memory, so late joiners asking for recent context never
+touch the disk.
+"""
+
+import json
+import time
+from bisect import bisect_right
+from collections import OrderedDict, deque
+from itertools import islice
+from pathlib import Path
+from urllib.parse import quote
+
+from server.config import (
+    HISTORY_DIR,
+    HISTORY_HOT_MESSAGES,
+    HISTORY_INDEX_INTERVAL,
+    HISTORY_MAX_OPEN_CHATS,
+)
+
+GENERAL_CHAT = "general"
+
+
+class ChatLog:
+    """Append-only message log of one chat with a sparse offset index."""
+
+    def __init__(self, path, hot_messages=HISTORY_HOT_MESSAGES,
+                 index_interval=HISTORY_INDEX_INTERVAL):
+        """Open a chat log, loading its index and recent tail if it exists.
+
+        Args:
+            path: Path of the .jsonl log; the index lives next to it as .idx
+            hot_messages: Number of recent records kept in memory
+            index_interval: Records between two index entries
+        """
+        self.path = Path(path)
+        self.index_path = self.path.with_suffix(".idx")
+        self.index_interval = index_interval
+        self.tail = deque(maxlen=hot_messages)
+        self.next_seq = 1
+        self.size = 0
+        self._index_seqs = []
+        self._index_offsets = []
+        self._file = None
+        self._index_file = None
+        try:
+            self._load()
+        except OSError:
+            pass
+
+    def _load(self):
+        """Recover next_seq, the index and the hot tail from disk."""
+        if not self.path.exists():
+            return
+        self.size = self.path.stat().st_size
+
+        try:
+            with open(self.index_path, "rb") as index_file:
+                for line in index_file:
+                    seq, offset = (int(part) for part in line.split())
+                    if offset >= self.size:
+                        break
+                    self._index_seqs.append(seq)
+                    self._index_offsets.append(offset)
+        except (OSError, ValueError):
+            pass
+        rebuild = not self._index_seqs
+        if rebuild:
+            self._index_seqs, self._index_offsets = [], []
+
+        # Start far enough back to refill the tail; this pass also finds the
+        # end of the log and re-creates index entries lost in a crash
+        entries_back = -(-self.tail.maxlen // self.index_interval) + 1
+        first = max(0, len(self._index_offsets) - entries_back)
+        offset = self._index_offsets[first] if self._index_offsets else 0
+        missing = []
+        end = offset
+        for record, line_offset, end in self._scan(offset):
+            seq = record["seq"]
+            if self._is_index_point(seq) and (
+                    not self._index_seqs or seq > self._index_seqs[-1]):
+                self._index_seqs.append(seq)
+                self._index_offsets.append(line_offset)
+                missing.append((seq, line_offset))
+            self.tail.append(record)
+            self.next_seq = seq + 1
+
+        if end < self.size:
+            # Drop a torn final line left by an interrupted write
+            with open(self.path, "r+b") as log_file:
+                log_file.truncate(end)
+            self.size = end
+
+        if rebuild:
+            with open(self.index_path, "w", encoding="ascii") as index_file:
+                index_file.writelines(
+                    f"{seq} {offset}\n" for seq, offset in zip(self._index_seqs, self._index_offsets))
+        elif missing:
+            with open(self.index_path, "a", encoding="ascii") as index_file:
+                index_file.writelines(f"{seq} {offset}\n" for seq, offset in missing)
+
+    def _scan(self, offset):
+        """Yield (record, line_offset, next_offset) for complete lines from offset."""
+        with open(self.path, "rb") as log_file:
+            log_file.seek(offset)
+            for line in log_file:
+                if not line.endswith(b"\n"):
+                    return
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    return
+                yield record, offset, offset + len(line)
+                offset += len(line)
+
+    def _is_index_point(self, seq):
+        return (seq - 1) % self.index_interval == 0
+
+    def append(self, sender, recipient, text):
+        """Assign the next sequence number to a message and persist it.
+
+        A failing disk does not stop the chat: the record is still kept in
+        the in-memory tail.
+
+        Returns:
+            The stored record ({"seq", "ts", "sender", "recipient", "text"})
+        """
+        record = {"seq": self.next_seq, "ts": int(time.time()),
+                  "sender": sender, "recipient": recipient, "text": text}
+        self.next_seq += 1
+        self.tail.append(record)
+
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode()
+        try:
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.path, "ab")
+                self._index_file = open(self.index_path, "a", encoding="ascii")
+            if self._is_index_point(record["seq"]):
+                self._index_seqs.append(record["seq"])
+                self._index_offsets.append(self.size)
+                self._index_file.write(f"{record['seq']} {self.size}\n")
+                self._index_file.flush()
+            self._file.write(line)
+            self._file.flush()
+            self.size += len(line)
+        except OSError:
+            pass
+        return record
+
+    def fetch(self, before=None, limit=50):
+        """Return up to limit records older than a sequence number.
+
+        Args:
+            before: Only records with seq < before (None for the newest)
+            limit: Maximum number of records
+
+        Returns:
+            Tuple (records oldest first, True if older records exist)
+        """
+        if before is None or before > self.next_seq:
+            before = self.next_seq
+        start = max(1, before - limit)
+        if start >= before:
+            return [], False
+
+        if self.tail and self.tail[0]["seq"] <= start:
+            first = start - self.tail[0]["seq"]
+            records = list(islice(self.tail, first, first + before - start))
+        else:
+            records = self._read_range(start, before)
+        return records, start > 1
+
+    def _read_range(self, start, before):
+        """Read records start <= seq < before with one seek and a sequential read."""
+        position = bisect_right(self._index_seqs, start) - 1
+        offset = self._index_offsets[position] if position >= 0 else 0
+        records = []
+        try:
+            for record, _, _ in self._scan(offset):
+                seq = record["seq"]
+                if seq >= before:
+                    break
+                if seq >= start:
+                    records.append(record)
+        except OSError:
+            pass
+        return records
+
+    def close(self):
+        """Close the append handles."""
+        for handle in (self._file, self._index_file):
+            if handle is not None:
+                try:
+                    handle.close()
+                except OSError:
+                    pass
+        self._file = self._index_file = None
+
+
+# chat key -> ChatLog, least recently used first
+_open_logs = OrderedDict()
+
+
+def chat_key(username, chat_id):
+    """Map a client-side chat id to the server's history key.
+
+    Args:
+        username: User asking about the chat
+        chat_id: "general", a room ("#name") or the other participant of a
+            private chat
+
+    Returns:
+        "general", the escaped room name, or a key naming both participants
+        in a fixed order
+    """
+    if chat_id == GENERAL_CHAT:
+        return GENERAL_CHAT
+    if chat_id.startswith("#"):
+        return quote(chat_id, safe="")
+    first, second = sorted((username, chat_id))
+    return f"{quote(first, safe='')}+{quote(second, safe='')}"
+
+
+def get_chat_log(key):
+    """Return the ChatLog for a history key, opening it on first use.
+
+    At most HISTORY_MAX_OPEN_CHATS logs stay open; the least recently used
+    one is closed (and later reloaded from disk) when the limit is reached.
+    """
+    chat_log = _open_logs.get(key)
+    if chat_log is not None:
+        _open_logs.move_to_end(key)
+        return chat_log
+    chat_log = ChatLog(Path(HISTORY_DIR) / f"{key}.jsonl")
+    _open_logs[key] = chat_log
+    while len(_open_logs) > HISTORY_MAX_OPEN_CHATS:
+        _, evicted = _open_logs.popitem(last=False)
+        evicted.close()
+    return chat_log
+
+
+def record_message(key, sender, recipient, text):
+    """Append a chat message to a chat's history and return its record."""
+    return get_chat_log(key).append(sender, recipient, text)
+
+
+def fetch_history(key, before=None, limit=50):
+    """Return (records oldest first, has_more) for a page of a chat's history."""
+    return get_chat_log(key).fetch(before, limit)
+
+
+def history_page(key, chat_id, before=None, limit=50):
+    """Build the data of a HISTORY reply for one page of a chat.
+
+    Args:
+        key: History key of the chat (see chat_key)
+        chat_id: Chat id as the requesting client knows it
+        before: Only records with seq < before (None for the newest)
+        limit: Maximum number of records
+
+    Returns:
+        Dictionary with 'chat_id', 'messages' (oldest first) and 'has_more'
+    """
+    records, has_more = fetch_history(key, before, limit)
+    return {
+        "chat_id": chat_id,
+        "messages": [{"seq": record["seq"], "ts": record["ts"],
+                      "sender": record["sender"], "text": record["text"]}
+                     for record in records],
+        "has_more": has_more,
+    }
+
+
+def latest_seq(key):
+    """Return the sequence number of the newest message in a chat (0 if empty)."""
+    return get_chat_log(key).next_seq - 1
@@ -0,0 +1,76 @@
+"""Asynchronous on-disk spill of the Lord of the Pings server log.
+
+Every log line is handed to a background thread that writes it to a
+size-rotated log file, so the event loop never waits on disk. The only
+in-memory copy is the admin GUI's log pane, which keeps the most recent
+LOG_BUFFER_LINES lines (see server.gui.append_log_lines); a headless server
+keeps none, so a long-running server has flat memory use.
+"""
+
+import logging
+import logging.handlers
+import queue
+from pathlib import Path
+
+from server.config import LOG_FILE, LOG_FILE_BACKUPS, LOG_FILE_MAX_BYTES
+from server.core import events
+
+
+class LogBuffer:
+    """Hands log lines to a background thread writing a rotating log file."""
+
+    def __init__(self, spill_path=LOG_FILE,
+                 max_bytes=LOG_FILE_MAX_BYTES, backups=LOG_FILE_BACKUPS):
+        """Start the file writer thread if spill_path is set.
+
+        Args:
+            spill_path: Log file path, or empty/None to turn the file log off
+            max_bytes: Size at which the log file is rotated
+            backups: Number of rotated files to keep
+        """
+        self._logger = None
+        self._listener = None
+
+        if spill_path:
+            try:
+                path = Path(spill_path)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                file_handler = logging.handlers.RotatingFileHandler(
+                    path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+                file_handler.setFormatter(
+                    logging.Formatter("%(asctime)s %(message)s"))
+            except OSError:
+                return
+
+            # Appends only enqueue; the listener thread performs the disk writes
+            spill_queue = queue.SimpleQueue()
+            self._logger = logging.getLogger("lotp.server")
+            self._logger.setLevel(logging.INFO)
+            self._logger.propagate = False
+            self._logger.addHandler(
+                logging.handlers.QueueHandler(spill_queue))
+            self._listener = logging.handlers.QueueListener(
+                spill_queue, file_handler)
+            self._listener.start()
+
+    def append(self, text):
+        """Queue a log line for the log file."""
+        if self._logger is not None:
+            self._logger.info(text)
+
+    def close(self):
+        """Flush pending lines to disk and stop the writer thread."""
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+
+def attach_log_buffer(spill_path=LOG_FILE):
+    """Create a LogBuffer fed by every events.LOG line and return it.
+
+    Args:
+        spill_path: Log file path (each worker process uses its own)
+    """
+    buffer = LogBuffer(spill_path=spill_path)
+    events.subscribe(events.LOG, buffer.append)
+    return buffer
@@ -0,0 +1,226 @@
+"""Counters and latency histograms for the Lord of the Pings server.
+
+The hot paths (reading frames, dispatching messages, queueing and
+broadcasting) update plain dicts and lists from the event loop thread, so
+recording a sample costs a dict lookup and an add - no locks. The values
+are served in the Prometheus text format by a small HTTP server on its own
+thread (METRICS_HOST:METRICS_PORT/metrics), which only reads them; gauges
+such as queue depths are computed from server.core.state when scraped.
+"""
+
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from server.core import events, state
+
+# Label values kept per metric; more distinct values (e.g. made-up message
+# types) are counted under "other" so a client cannot grow the registry
+MAX_LABEL_VALUES = 64
+
+# Histogram buckets in seconds, from 10 microseconds to 1 second
+LATENCY_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+                   0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+# Histogram buckets for broadcast recipient counts
+FANOUT_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+REGISTRY = []
+
+
+def _label_text(name, value):
+    value = str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+    return f'{name}="{value}"'
+
+
+def _format_number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """A monotonically increasing count, optionally split by one label."""
+
+    kind = "counter"
+
+    def __init__(self, name, help_text, label=None):
+        """Register the counter.
+
+        Args:
+            name: Metric name
+            help_text: HELP line shown to the scraper
+            label: Name of the label the counter is split by, or None
+        """
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.values = {}
+        REGISTRY.append(self)
+
+    def inc(self, label_value=None, amount=1):
+        """Add `amount` to the count of one label value."""
+        values = self.values
+        if label_value not in values and len(values) >= MAX_LABEL_VALUES:
+            label_value = "other"
+        values[label_value] = values.get(label_value, 0) + amount
+
+    def samples(self):
+        for label_value, value in list(self.values.items()):
+            labels = "" if self.label is None else "{" + _label_text(self.label, label_value) + "}"
+            yield f"{self.name}{labels} {_format_number(value)}"
+
+
+class Histogram:
+    """Distribution of observed values, optionally split by one label."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS, label=None):
+        """Register the histogram.
+
+        Args:
+            name: Metric name
+            help_text: HELP line shown to the scraper
+            buckets: Sorted upper bounds of the buckets (+Inf is implied)
+            label: Name of the label the histogram is split by, or None
+        """
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.label = label
+        self.series = {}  # label value -> [per-bucket counts, sum]
+        REGISTRY.append(self)
+
+    def observe(self, value, label_value=None):
+        """Record one sample."""
+        series = self.series.get(label_value)
+        if series is None:
+            if len(self.series) >= MAX_LABEL_VALUES:
+                label_value = "other"
+                series = self.series.get(label_value)
+            if series is None:
+                series = self.series[label_value] = [[0] * (len(self.buckets) + 1), 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def samples(self):
+        for label_value, (counts, total) in list(self.series.items()):
+            prefix = "" if self.label is None else _label_text(self.label, label_value) + ","
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), list(counts)):
+                cumulative += count
+                yield f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}'
+            labels = "{" + prefix.rstrip(",") + "}" if prefix else ""
+            yield f"{self.name}_sum{labels} {_format_number(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class Gauge:
+    """A value computed when the metrics are scraped."""
+
+    kind = "gauge"
+
+    def __init__(self, name, help_text, read):
+        """Register the gauge.
+
+        Args:
+            name: Metric name
+            help_text: HELP line shown to the scraper
+            read: Callable returning the current value
+        """
+        self.name = name
+        self.help_text = help_text
+        self.read = read
+        REGISTRY.append(self)
+
+    def samples(self):
+        yield f"{self.name} {_format_number(self.read())}"
+
+
+def _queues():
+    return [conn for conn in list(state.connections.values()) if conn.logged_in]
+
+
+CONNECTIONS_ACCEPTED = Counter(
+    "lotp_connections_accepted_total", "TCP connections accepted")
+MESSAGES_IN = Counter(
+    "lotp_messages_in_total", "Messages received from clients", "type")
+MESSAGES_OUT = Counter(
+    "lotp_messages_out_total", "Messages queued for clients (one per recipient)", "type")
+BYTES_IN = Counter(
+    "lotp_bytes_in_total", "Bytes read from client sockets")
+BYTES_OUT = Counter(
+    "lotp_bytes_out_total", "Bytes queued for client sockets")
+THROTTLED = Counter(
+    "lotp_throttled_total", "Client messages dropped by the rate limiter", "type")
+SLOW_CONSUMERS = Counter(
+    "lotp_slow_consumers_total", "Slow clients downgraded or evicted", "action")
+HANDLER_SECONDS = Histogram(
+    "lotp_handler_seconds", "Time spent in handle_json_message", label="type")
+BROADCAST_SECONDS = Histogram(
+    "lotp_broadcast_seconds", "Time to encode and queue one broadcast")
+BROADCAST_FANOUT = Histogram(
+    "lotp_broadcast_recipients", "Recipients of one broadcast", FANOUT_BUCKETS)
+
+Gauge("lotp_connections", "Open client connections",
+      lambda: len(state.connections))
+Gauge("lotp_users_online", "Logged-in users on this server",
+      lambda: len(state.clients))
+Gauge("lotp_remote_users_online", "Users on other workers or federated nodes",
+      lambda: len(state.remote_users))
+Gauge("lotp_outbound_queued_bytes", "Unsent bytes queued for all clients",
+      lambda: sum(conn.queued_bytes for conn in _queues()))
+Gauge("lotp_outbound_queued_bytes_max", "Largest unsent backlog of a single client",
+      lambda: max((conn.queued_bytes for conn in _queues()), default=0))
+Gauge("lotp_outbound_queued_messages", "Queued outbound messages for all clients",
+      lambda: sum(len(conn.outbox) for conn in _queues()))
+
+
+def render():
+    """Return every registered metric in the Prometheus text format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.help_text}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        try:
+            lines.extend(metric.samples())
+        except Exception:
+            # A structure changed size mid-read; the next scrape gets it
+            pass
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start(host, port):
+    """Serve /metrics on a daemon thread.
+
+    Args:
+        host: Interface to bind (keep it local; the endpoint has no auth)
+        port: TCP port to listen on
+
+    Returns:
+        The HTTP server, or None if the port could not be bound
+    """
+    try:
+        server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as exc:
+        events.emit(events.LOG, f"[ERROR] Could not serve metrics on {host}:{port}: {exc}")
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    events.emit(events.LOG, f"[*] Metrics on http://{host}:{port}/metrics")
+    return server
@@ -1,53 +1,286 @@
 """Server-side network protocol utilities for Lord of the Pings.
 
-Handles JSON message creation, transmission to single clients or broadcasts,
-and parsing of incoming messages from connected clients.
+Handles message encoding, transmission to single clients or broadcasts,
+and parsing of incoming messages from connected clients. Every connection
+starts in newline JSON and may switch to the binary wire format negotiated
+at login (see common.wire); messages are encoded with the recipient's codec.
+
+Sending never touches the socket directly: messages are appended to the
+recipient's outbound queue and written by the event loop when the socket is
+writable, so a slow receiver can no longer stall everyone else. Messages
+queued within WRITE_COALESCE_DELAY of each other are written together.
+
+A client that stops reading (a suspended laptop) is detected by its unsent
+backlog and by how long its socket has accepted nothing, and is evicted or
+downgraded per SLOW_CONSUMER_POLICY, so its queue cannot grow without bound.
 """
 
 import json
+import time
+
+from common.wire import JSON_CODEC
+from server.config import (
+    SLOW_CONSUMER_MAX_BYTES,
+    SLOW_CONSUMER_POLICY,
+    SLOW_CONSUMER_TIMEOUT,
+    WRITE_COALESCE_BYTES,
+    WRITE_COALESCE_DELAY,
+)
+from server.core import events, metrics, state
+
+
+def _write_ready(sock):
+    """Event loop writer callback - drain the connection's outbound queue."""
+    conn = state.connections.get(sock)
+    if conn is None:
+        state.loop.remove_writer(sock)
+        return
+    try:
+        done = conn.flush()
+    except OSError:
+        conn.abort()
+        state.loop.remove_writer(sock)
+        return
+    if done:
+        state.loop.remove_writer(sock)
+        if conn.closing:
+            conn.abort()
+        elif conn.degraded:
+            _send_catch_up(sock, conn)
+
+
+def _start_writing(sock):
+    """Timer callback - the coalescing window is over, register the writer."""
+    conn = state.connections.get(sock)
+    if conn is None:
+        return
+    conn.flush_timer = None
+    state.loop.add_writer(sock, _write_ready)
+
+
+def _schedule_write(sock):
+    """Arm the writer now or when the coalescing window closes (loop thread only)."""
+    conn = state.connections.get(sock)
+    if conn is None:
+        return
+    if WRITE_COALESCE_DELAY > 0 and conn.queued_bytes < WRITE_COALESCE_BYTES:
+        if conn.flush_timer is None:
+            conn.flush_timer = state.loop.call_later(
+                WRITE_COALESCE_DELAY, _start_writing, sock)
+        return
+    state.loop.cancel_timer(conn.flush_timer)
+    _start_writing(sock)
+
+
+def queue_bytes(sock, payload):
+    """Queue already-encoded bytes for a client and wake its writer.
+
+    A client whose queue is full is shut down; the event loop then runs the
+    normal disconnect cleanup when it sees EOF on the socket.
+
+    Args:
+        sock: Socket of the destination client
+        payload: Encoded bytes to send
+
+    Returns:
+        True if the bytes were queued, False if they were dropped (unknown
+        or closing client, full queue, or evicted as a slow consumer)
+    """
+    conn = state.connections.get(sock)
+    if conn is None or conn.closing:
+        return False
+    if not conn.enqueue(payload):
+        conn.abort()
+        return False
+    if conn.queued_bytes > SLOW_CONSUMER_MAX_BYTES and conn.logged_in:
+        _check_slow_consumer(conn, time.monotonic())
+        if conn.closing:
+            # Evicted: abort() discarded the queue, this payload included
+            return False
+    metrics.BYTES_OUT.inc(amount=len(payload))
+    if state.loop.in_loop_thread():
+        _schedule_write(sock)
+    else:
+        state.loop.call_soon_threadsafe(_schedule_write, sock)
+    return True
+
+
+def _check_slow_consumer(conn, now):
+    """Evict or downgrade a client whose output is piling up.
+
+    Args:
+        conn: Logged-in ClientConnection to check
+        now: Current time.monotonic() value
+    """
+    # A downgraded client gets twice the room before it is evicted
+    factor = 2 if conn.degraded else 1
+    backlog = conn.queued_bytes
+    stalled = conn.stalled_for(now)
+    if backlog <= SLOW_CONSUMER_MAX_BYTES * factor and stalled <= SLOW_CONSUMER_TIMEOUT * factor:
+        return
+    if SLOW_CONSUMER_POLICY == "downgrade" and not conn.degraded:
+        conn.degraded = True
+        conn.skipped = 0
+        metrics.SLOW_CONSUMERS.inc("downgrade")
+        events.emit(events.LOG, f"[WARN] {conn.username} is reading too slowly "
+                                f"({backlog} bytes queued, stalled {stalled:.0f}s), pausing broadcasts")
+        return
+    events.emit(events.LOG, f"[WARN] Evicting slow client {conn.username} "
+                            f"({backlog} bytes queued, stalled {stalled:.0f}s)")
+    metrics.SLOW_CONSUMERS.inc("evict")
+    conn.abort()
+
+
+def check_slow_consumers():
+    """Timer callback: apply the slow-consumer policy to every logged-in client."""
+    now = time.monotonic()
+    for conn in list(state.connections.values()):
+        if conn.logged_in and not conn.closing:
+            _check_slow_consumer(conn, now)
+
+
+def _send_catch_up(sock, conn):
+    """A downgraded client drained its queue: resume broadcasts and summarize what it missed."""
+    conn.degraded = False
+    events.emit(events.LOG, f"[*] {conn.username} caught up, resuming broadcasts")
+    with state.clients_lock:
+        usernames = list(state.clients.values())
+    usernames.extend(state.remote_users)
+    send_json_message(sock, "SYSTEM", {
+        "text": f"Your connection was slow: {conn.skipped} updates were skipped",
+        "chat_id": "general"})
+    send_json_message(sock, "USERLIST", {"users": usernames})
+    send_json_message(sock, "AVATARS", {"avatars": avatar_snapshot()})
+
+
+def avatar_snapshot():
+    """Every known avatar as one username -> filename map (one AVATARS message)."""
+    return {username: avatar for username, avatar in state.user_avatars.items() if avatar}
+
 
-from server.core import state
+def close_after_flush(sock):
+    """Close a client connection once its queued output has been written."""
+    conn = state.connections.get(sock)
+    if conn is not None:
+        conn.closing = True
 
 
 def send_json_message(sock, msg_type, data):
-    """Send a JSON-encoded message to a specific client.
+    """Send a message to a specific client in its negotiated wire format.
 
     Args:
         sock: Socket of the destination client
         msg_type: Message type/command identifier
-        data: Dictionary of message data to be JSON-encoded
+        data: Dictionary of message data
     """
     try:
-        payload = {"type": msg_type, "data": data}
-        sock.sendall((json.dumps(payload) + "\n").encode())
+        conn = state.connections.get(sock)
+        if conn is not None and queue_bytes(sock, conn.codec.encode(msg_type, data)):
+            metrics.MESSAGES_OUT.inc(msg_type)
     except Exception:
         pass
 
 
-def broadcast_json(msg_type, data, sender_socket=None):
-    """Broadcast a JSON message to all clients except the sender.
+def encode_json_message(msg_type, data):
+    """Serialize a message once into the newline-delimited wire format.
 
     Args:
         msg_type: Message type/command identifier
         data: Dictionary of message data to be JSON-encoded
+
+    Returns:
+        Immutable bytes ready to be queued for any number of clients
+    """
+    return JSON_CODEC.encode(msg_type, data)
+
+
+def broadcast_json(msg_type, data, sender_socket=None, recipients=None):
+    """Broadcast a message to all logged-in clients (or a subset) except the sender.
+
+    The message is encoded at most once per wire format in use, and the
+    same bytes object is shared by all recipient queues of that format.
+    Downgraded slow consumers are skipped (see check_slow_consumers).
+
+    Args:
+        msg_type: Message type/command identifier
+        data: Dictionary of message data
         sender_socket: Socket of originating client to exclude, or None
+        recipients: Iterable of sockets to fan out to (e.g. a room's
+            members), or None for every logged-in client
     """
-    payload = {"type": msg_type, "data": data}
-    message = json.dumps(payload) + "\n"
-    with state.clients_lock:
-        for client in list(state.clients.keys()):
-            if client != sender_socket:
-                try:
-                    client.sendall(message.encode())
-                except Exception:
-                    pass
+    started = time.perf_counter()
+    if recipients is None:
+        recipients = state.broadcast_recipients()
+    payloads = {}
+    sent = 0
+    for client in recipients:
+        if client is sender_socket:
+            continue
+        try:
+            conn = state.connections[client]
+            if conn.degraded:
+                conn.skipped += 1
+                continue
+            codec = conn.codec
+            payload = payloads.get(codec)
+            if payload is None:
+                payload = payloads[codec] = codec.encode(msg_type, data)
+            if queue_bytes(client, payload):
+                sent += 1
+        except Exception:
+            pass
+    metrics.MESSAGES_OUT.inc(msg_type, sent)
+    metrics.BROADCAST_FANOUT.observe(sent)
+    metrics.BROADCAST_SECONDS.observe(time.perf_counter() - started)
+
+
+def read_messages(conn):
+    """Read available bytes from a client and parse every completed frame.
+
+    Uses the connection's FrameDecoder, so partial frames (including UTF-8
+    characters split across reads) wait in its buffer for the next call.
+    Frames are decoded lazily with the connection's current codec, so a
+    codec switched while handling one frame applies to the frames after it.
+
+    Args:
+        conn: ClientConnection whose socket is readable
+
+    Returns:
+        Iterable of (raw_bytes, parsed_dict_or_None) tuples, or None if the
+        peer closed. Iterating raises FrameTooLarge if the client exceeds
+        MAX_FRAME_SIZE.
+
+    Raises:
+        OSError: On socket errors
+    """
+    try:
+        received = conn.decoder.recv_into(conn.sock)
+    except (BlockingIOError, InterruptedError):
+        return []
+    if not received:
+        return None
+    metrics.BYTES_IN.inc(amount=received)
+    return _decode_frames(conn)
+
+
+def _decode_frames(conn):
+    """Yield (raw_bytes, parsed) for each complete frame in the decoder."""
+    for frame in conn.decoder.frames():
+        if conn.codec.length_prefixed:
+            raw = bytes(frame)
+        else:
+            raw = bytes(frame).strip()
+            if not raw:
+                continue
+        # Compressed frames may not inflate past the configured frame size either
+        yield raw, conn.codec.decode(raw, conn.decoder.max_frame_size)
 
 
 def parse_json_message(raw_string):
     """Parse incoming JSON message from client.
 
     Args:
-        raw_string: Raw message string to parse
+        raw_string: Raw message to parse (str or UTF-8 bytes)
 
     Returns:
         Parsed dictionary if valid JSON, None otherwise
@@ -0,0 +1,88 @@
+"""Per-client, per-message-type rate limiting for the Lord of the Pings server.
+
+Every connection gets one token bucket per message type it sends. A bucket
+holds up to `burst` tokens and refills at `rate` tokens per second; each
+message takes one token, and a message arriving at an empty bucket is
+dropped before it is dispatched. This keeps one spamming client from
+multiplying into a send per message for every other connected user.
+Budgets come from RATE_LIMITS (per type) and RATE_LIMIT_DEFAULT (all other
+types). All functions run on the event loop thread.
+"""
+
+import time
+
+from server.config import RATE_LIMIT_DEFAULT, RATE_LIMITS
+
+
+class TokenBucket:
+    """A refilling budget of messages."""
+
+    __slots__ = ("rate", "burst", "tokens", "stamp", "notified")
+
+    def __init__(self, rate, burst):
+        """Start with a full bucket.
+
+        Args:
+            rate: Tokens added per second
+            burst: Maximum number of tokens held
+        """
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.stamp = time.monotonic()
+        # True once the client was told it is throttled, until a message passes
+        self.notified = False
+
+    def take(self, now=None):
+        """Spend one token if available.
+
+        Args:
+            now: Current time.monotonic() value (read if omitted)
+
+        Returns:
+            True if the message may pass
+        """
+        if now is None:
+            now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+def limit_for(msg_type):
+    """Return the (rate, burst) budget of a message type, or None if unlimited."""
+    rate, burst = RATE_LIMITS.get(msg_type, RATE_LIMIT_DEFAULT)
+    if rate <= 0:
+        return None
+    return rate, max(burst, 1)
+
+
+def allow(conn, msg_type):
+    """Charge one message of `msg_type` to a connection.
+
+    Args:
+        conn: ClientConnection that sent the message
+        msg_type: The message's "type" field
+
+    Returns:
+        (allowed, notify): whether to dispatch the message, and whether this
+        is the first rejection of a streak so the client should be told
+    """
+    # Types outside RATE_LIMITS share one bucket, so made-up type names
+    # cannot be used to open fresh budgets
+    key = msg_type if msg_type in RATE_LIMITS else None
+    bucket = conn.rate_buckets.get(key)
+    if bucket is None:
+        limit = limit_for(msg_type)
+        if limit is None:
+            return True, False
+        bucket = conn.rate_buckets[key] = TokenBucket(*limit)
+    if bucket.take():
+        bucket.notified = False
+        return True, False
+    notify = not bucket.notified
+    bucket.notified = True
+    return False, notify
@@ -0,0 +1,101 @@
+"""Chat rooms for the Lord of the Pings server.
+
+A room is a named audience ("#team") with its own member set, so messages
+posted to it are queued only for the sockets that joined instead of for
+every connected client. Rooms are created on first join and removed when
+their last member leaves. All functions run on the event loop thread.
+"""
+
+import re
+
+# Room names as they appear in chat ids: '#' followed by 1-32 word characters or '-'
+ROOM_NAME_PATTERN = re.compile(r"#[\w-]{1,32}")
+
+# room name -> set of member sockets
+room_members = {}
+
+# socket -> set of room names the client joined
+member_rooms = {}
+
+
+def is_room_id(chat_id):
+    """Return True if a chat id names a room rather than general or a user."""
+    return isinstance(chat_id, str) and chat_id.startswith("#")
+
+
+def normalize_room_name(name):
+    """Turn user input like 'team' or '#team' into a valid room name.
+
+    Returns:
+        The room name with its leading '#', or None if it is not valid
+    """
+    if not isinstance(name, str):
+        return None
+    name = name.strip()
+    if not name.startswith("#"):
+        name = "#" + name
+    return name if ROOM_NAME_PATTERN.fullmatch(name) else None
+
+
+def room_exists(room):
+    return room in room_members
+
+
+def join_room(room, sock):
+    """Add a client to a room, creating the room if needed.
+
+    Returns:
+        True if the client was added, False if it already was a member
+    """
+    members = room_members.setdefault(room, set())
+    if sock in members:
+        return False
+    members.add(sock)
+    member_rooms.setdefault(sock, set()).add(room)
+    return True
+
+
+def leave_room(room, sock):
+    """Remove a client from a room, deleting the room once it is empty.
+
+    Returns:
+        True if the client was a member
+    """
+    members = room_members.get(room)
+    if members is None or sock not in members:
+        return False
+    members.discard(sock)
+    if not members:
+        del room_members[room]
+    joined = member_rooms.get(sock)
+    if joined is not None:
+        joined.discard(room)
+        if not joined:
+            del member_rooms[sock]
+    return True
+
+
+def leave_all_rooms(sock):
+    """Remove a disconnecting client from every room.
+
+    Returns:
+        Sorted list of the rooms the client was in
+    """
+    joined = sorted(member_rooms.get(sock, ()))
+    for room in joined:
+        leave_room(room, sock)
+    return joined
+
+
+def is_member(room, sock):
+    return sock in room_members.get(room, ())
+
+
+def get_members(room):
+    """Return a snapshot tuple of a room's member sockets (empty if unknown)."""
+    return tuple(room_members.get(room, ()))
+
+
+def list_rooms():
+    """Return [(room, member_count), ...] sorted by room name."""
+    return sorted((room, len(members)) for room, members in room_members.items())
@@ -10,11 +10,80 @@ import threading
 clients = {}
 clients_lock = threading.Lock()
 
-# Maps username to selected avatar filename
+# Reverse index of `clients` (username -> socket) for O(1) message routing
+client_sockets = {}
+
+# Immutable snapshot of logged-in sockets for broadcasts, rebuilt on join/leave
+_recipients = ()
+
+# Maps username to selected avatar filename (includes users on other workers)
 user_avatars = {}
 
+# Worker mode: username -> worker number for users connected to another worker
+remote_users = {}
+
+# Maps socket to ClientConnection for every accepted socket (logged in or not)
+connections = {}
+
+# Event loop driving all client sockets (set by server_thread at startup)
+loop = None
+
 # Server port tracking (will be set by server_thread at startup)
 SERVER_PORT = None
 DISCOVERY_PORT = None
 DISCOVERY_MESSAGE = None
 BROADCAST_IP = None
+
+
+def register_client(sock, username):
+    """Add a logged-in client to both directions of the session registry.
+
+    Args:
+        sock: Socket of the client
+        username: Username requested by the client
+
+    Returns:
+        True if registered, False if the username is already taken
+    """
+    global _recipients
+    with clients_lock:
+        if username in client_sockets:
+            return False
+        clients[sock] = username
+        client_sockets[username] = sock
+        _recipients = tuple(clients)
+        return True
+
+
+def unregister_client(sock):
+    """Remove a client from the session registry.
+
+    Args:
+        sock: Socket of the client
+
+    Returns:
+        Username the socket was registered under, or None
+    """
+    global _recipients
+    with clients_lock:
+        username = clients.pop(sock, None)
+        if username is not None:
+            if client_sockets.get(username) is sock:
+                del client_sockets[username]
+            _recipients = tuple(clients)
+        return username
+
+
+def is_online(username):
+    """Return True if a user is connected to this or (in worker mode) another process."""
+    return username in client_sockets or username in remote_users
+
+
+def get_client_socket(username):
+    """Look up the socket of an online user, or None if not connected."""
+    return client_sockets.get(username)
+
+
+def broadcast_recipients():
+    """Return the cached tuple of logged-in sockets (safe to iterate without the lock)."""
+    return _recipients
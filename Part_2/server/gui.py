@@ -0,0 +1,258 @@
+"""Lord of the Pings - customtkinter admin window for the chat server.
+
+Importing this module builds the window. It observes the networking core
+through server.core.events and never runs network code itself. Events are
+queued by the networking thread and applied on the Tk thread once per frame.
+"""
+
+import queue
+import threading
+from pathlib import Path
+
+import customtkinter as ctk
+
+from server.config import (
+    ACCENT_COLOR,
+    BACKGROUND_COLOR,
+    GUI_REFRESH_INTERVAL_MS,
+    HOVER_COLOR,
+    LOG_BUFFER_LINES,
+    OTHER_COLOR,
+    SERVER_HOST,
+    TEXT_COLOR,
+)
+from server.core import events, state
+from server.core.chat_server import disconnect_client, server_thread
+
+
+# Username -> (button, socket) for the rows currently shown in users_list
+user_buttons = {}
+
+# Pending GUI work posted by the networking thread; drained only on the Tk thread
+_gui_updates = queue.SimpleQueue()
+
+
+def update_user_list():
+    """Diff the online users against the displayed rows and patch the list.
+
+    Only buttons for users that joined or left are created or destroyed.
+    Must run on the Tk thread.
+    """
+    with state.clients_lock:
+        online = {username: sock for sock, username in state.clients.items()}
+
+    for username in list(user_buttons):
+        btn, sock = user_buttons[username]
+        if online.get(username) is not sock:
+            btn.destroy()
+            del user_buttons[username]
+
+    for username, sock in online.items():
+        if username in user_buttons:
+            continue
+        btn = ctk.CTkButton(
+            users_list,
+            text=username,
+            fg_color=ACCENT_COLOR,
+            hover_color=HOVER_COLOR,
+            text_color=TEXT_COLOR,
+            command=lambda s=sock: state.loop.call_soon_threadsafe(
+                disconnect_client, s),
+        )
+        btn.pack(fill="x", padx=5, pady=4)
+        user_buttons[username] = (btn, sock)
+
+
+def update_server_info_label():
+    """Update the server info labels with host, server port, and discovery port."""
+    server_host_label.configure(text=f"Server Host: {SERVER_HOST}")
+    server_port_label.configure(text=f"Server Port: {state.SERVER_PORT}")
+    discovery_port_label.configure(
+        text=f"Discovery Port: {state.DISCOVERY_PORT}")
+    broadcast_ip_label.configure(text=f"Discovery IP: {state.BROADCAST_IP}")
+
+
+def append_log_lines(lines):
+    """Append a batch of lines to the server log textbox in one insert.
+
+    The textbox acts as a ring of LOG_BUFFER_LINES lines: once full, the
+    oldest lines are deleted from the top (they are already in the log file).
+    """
+    lines = lines[-LOG_BUFFER_LINES:]
+    log_box.configure(state="normal")
+    log_box.insert("end", "\n".join(lines) + "\n")
+    # Entries such as tracebacks span several lines, so trim by the
+    # textbox's own line count (the text ends with a newline, hence - 1)
+    shown = int(log_box.index("end-1c").split(".")[0]) - 1
+    if shown > LOG_BUFFER_LINES:
+        log_box.delete("1.0", f"{shown - LOG_BUFFER_LINES + 1}.0")
+    log_box.configure(state="disabled")
+    log_box.see("end")
+
+
+def drain_gui_updates():
+    """Apply all GUI work queued since the last frame, then reschedule.
+
+    Log lines are inserted as one batch and any number of user list changes
+    collapse into a single diff-based refresh.
+    """
+    lines = []
+    users_dirty = False
+    info_dirty = False
+    while True:
+        try:
+            kind, payload = _gui_updates.get_nowait()
+        except queue.Empty:
+            break
+        if kind == events.LOG:
+            lines.append(payload)
+        elif kind == events.USERS_CHANGED:
+            users_dirty = True
+        elif kind == events.SERVER_INFO:
+            info_dirty = True
+
+    try:
+        if info_dirty:
+            update_server_info_label()
+        if users_dirty:
+            update_user_list()
+        if lines:
+            append_log_lines(lines)
+    finally:
+        app.after(GUI_REFRESH_INTERVAL_MS, drain_gui_updates)
+
+
+# ================= GUI =================
+
+ctk.set_appearance_mode("dark")
+ctk.set_default_color_theme("blue")
+
+app = ctk.CTk()
+app.title("Lotp Server")
+app.geometry("700x420")
+app.configure(fg_color=BACKGROUND_COLOR)
+
+# Set window icon
+icon_path = Path(__file__).parent / "assets" / "icons" / "Lotp_Icon_BP.ico"
+try:
+    if icon_path.exists():
+        app.iconbitmap(str(icon_path))
+except Exception:
+    pass
+
+# Server Info Labels
+frame_top = ctk.CTkFrame(app, corner_radius=15,
+                         fg_color=BACKGROUND_COLOR, border_width=0)
+frame_top.pack(fill="x", padx=10, pady=(10, 5))
+
+server_host_frame = ctk.CTkFrame(
+    frame_top, fg_color=OTHER_COLOR, corner_radius=8, border_color=ACCENT_COLOR, border_width=1
+)
+server_host_label = ctk.CTkLabel(
+    server_host_frame, text="", font=("Arial", 11, "bold"), text_color=TEXT_COLOR, fg_color=OTHER_COLOR
+)
+server_host_label.pack(padx=10, pady=10)
+
+server_port_frame = ctk.CTkFrame(
+    frame_top, fg_color=OTHER_COLOR, corner_radius=8, border_color=ACCENT_COLOR, border_width=1
+)
+server_port_label = ctk.CTkLabel(
+    server_port_frame, text="", font=("Arial", 11, "bold"), text_color=TEXT_COLOR, fg_color=OTHER_COLOR
+)
+server_port_label.pack(padx=10, pady=10)
+
+discovery_port_frame = ctk.CTkFrame(
+    frame_top, fg_color=OTHER_COLOR, corner_radius=8, border_color=ACCENT_COLOR, border_width=1
+)
+discovery_port_label = ctk.CTkLabel(
+    discovery_port_frame, text="", font=("Arial", 11, "bold"), text_color=TEXT_COLOR, fg_color=OTHER_COLOR
+)
+discovery_port_label.pack(padx=10, pady=10)
+
+broadcast_ip_frame = ctk.CTkFrame(
+    frame_top, fg_color=OTHER_COLOR, corner_radius=8, border_color=ACCENT_COLOR, border_width=1
+)
+broadcast_ip_label = ctk.CTkLabel(
+    broadcast_ip_frame, text="", font=("Arial", 11, "bold"), text_color=TEXT_COLOR, fg_color=OTHER_COLOR
+)
+broadcast_ip_label.pack(padx=10, pady=10)
+
+# Arrange the four bubbles in two rows: host | discovery IP on top, server port | discovery port below.
+info_frames = [
+    server_host_frame,
+    broadcast_ip_frame,
+    server_port_frame,
+    discovery_port_frame,
+]
+
+
+def layout_info_bubbles(event=None):
+    width = frame_top.winfo_width() or app.winfo_width()
+    cols = 2 if width >= 420 else 1  # keep 2x2 normally; stack if extremely narrow
+    for child in frame_top.grid_slaves():
+        child.grid_forget()
+    frame_top.grid_columnconfigure(
+        tuple(range(cols)), weight=1, uniform="cols")
+    frame_top.grid_rowconfigure((0, 1, 2, 3), weight=1)
+    for idx, frame in enumerate(info_frames):
+        row = idx // cols
+        col = idx % cols
+        frame.grid(row=row, column=col, padx=5, pady=5, sticky="nsew")
+
+
+frame_top.bind("<Configure>", layout_info_bubbles)
+layout_info_bubbles()
+
+# Layout
+body_frame = ctk.CTkFrame(app, fg_color=BACKGROUND_COLOR, border_width=0)
+body_frame.pack(fill="both", expand=True, padx=10, pady=10)
+body_frame.grid_columnconfigure(0, weight=1, minsize=180)
+body_frame.grid_columnconfigure(1, weight=2)
+body_frame.grid_rowconfigure(0, weight=1)
+
+frame_left = ctk.CTkFrame(body_frame, corner_radius=15,
+                          fg_color=OTHER_COLOR, border_color=ACCENT_COLOR, border_width=1)
+frame_left.grid(row=0, column=0, sticky="nsew", padx=(0, 8), pady=0)
+
+frame_right = ctk.CTkFrame(
+    body_frame, corner_radius=15, fg_color=OTHER_COLOR, border_color=ACCENT_COLOR, border_width=1)
+frame_right.grid(row=0, column=1, sticky="nsew", padx=(8, 0), pady=0)
+
+# Online Users
+label_users = ctk.CTkLabel(frame_left, text="Online Users", font=(
+    "Arial", 16, "bold"), text_color=TEXT_COLOR)
+label_users.pack(pady=(10, 5))
+
+users_list = ctk.CTkScrollableFrame(
+    frame_left, height=300, fg_color=BACKGROUND_COLOR)
+users_list.pack(fill="both", expand=True, padx=5, pady=5)
+
+# Log
+label_log = ctk.CTkLabel(frame_right, text="Server Log", font=(
+    "Arial", 16, "bold"), text_color=TEXT_COLOR)
+label_log.pack(pady=(10, 5))
+
+log_box = ctk.CTkTextbox(
+    frame_right,
+    state="disabled",
+    corner_radius=10,
+    fg_color=BACKGROUND_COLOR,
+    text_color=TEXT_COLOR,
+    border_color=ACCENT_COLOR,
+    border_width=1,
+)
+log_box.pack(fill="both", expand=True, padx=10, pady=10)
+
+# Event callbacks run on the networking thread, so they only enqueue work
+events.subscribe(events.LOG, lambda text: _gui_updates.put((events.LOG, text)))
+events.subscribe(events.USERS_CHANGED,
+                 lambda: _gui_updates.put((events.USERS_CHANGED, None)))
+events.subscribe(events.SERVER_INFO,
+                 lambda: _gui_updates.put((events.SERVER_INFO, None)))
+
+
+def main():
+    """Start the networking core in a background thread and run the window."""
+    threading.Thread(target=server_thread, daemon=True).start()
+    app.after(GUI_REFRESH_INTERVAL_MS, drain_gui_updates)
+    app.mainloop()
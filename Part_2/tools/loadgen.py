@@ -0,0 +1,408 @@
+"""Headless load generator for the Lord of the Pings server.
+
+Simulates many chat users over the real protocol (newline JSON, LOGIN
+handshake) with asyncio, without Kivy or any GUI dependency. Each user
+sends CHAT messages at a configurable rate to general chat, a room or a
+random online user, and pairs of users play Tic-Tac-Toe games back to
+back. Outgoing chat messages carry a trace (see client.core.tracing), so
+every delivery measures its end-to-end latency on the generator's clock.
+
+At the end a report shows throughput, delivery latency percentiles, game
+move round trips and error counts; --json writes it to a file so runs can
+be compared.
+
+Usage (from Part_2, with the server running):
+    python -m tools.loadgen --users 500 --duration 60 --rate 0.5
+
+Thousands of users need as many file descriptors (`ulimit -n`). The
+server's rate limits (RATE_LIMITS) apply to simulated users as well.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+# Allow running as `python loadgen.py` inside the tools folder.
+if __package__ in (None, ""):
+    ROOT = Path(__file__).resolve().parent.parent
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+    __package__ = "tools"
+
+from client.config import PROTOCOL_VERSION
+
+# Largest line accepted from the server (USERLIST grows with the user count)
+MAX_LINE = 16 * 1024 * 1024
+
+# Latency histogram resolution: bucket bounds grow by 2% per bucket
+BUCKET_GROWTH = math.log(1.02)
+
+
+def now_us():
+    return time.time_ns() // 1000
+
+
+class LatencyHistogram:
+    """Log-bucketed latency distribution in microseconds (2% resolution).
+
+    Deliveries can reach millions per run, so samples are counted per
+    bucket instead of being kept.
+    """
+
+    def __init__(self):
+        self.buckets = Counter()
+        self.count = 0
+        self.max = 0
+
+    def record(self, micros):
+        micros = max(int(micros), 1)
+        self.buckets[int(math.log(micros) / BUCKET_GROWTH)] += 1
+        self.count += 1
+        if micros > self.max:
+            self.max = micros
+
+    def percentile(self, fraction):
+        """Upper bound (ms) of the bucket holding the given fraction of samples."""
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return round(min(math.exp((bucket + 1) * BUCKET_GROWTH), self.max) / 1000, 3)
+        return round(self.max / 1000, 3)
+
+    def summary(self):
+        return {"count": self.count,
+                "p50_ms": self.percentile(0.5),
+                "p90_ms": self.percentile(0.9),
+                "p99_ms": self.percentile(0.99),
+                "max_ms": round(self.max / 1000, 3) if self.count else None}
+
+
+class Stats:
+    """Counters shared by every simulated user."""
+
+    def __init__(self):
+        self.sent = Counter()
+        self.received = Counter()
+        self.errors = Counter()
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.online = 0
+        self.logged_in = 0
+        self.games_finished = 0
+        self.delivery = LatencyHistogram()
+        self.server_time = LatencyHistogram()
+        self.move_rtt = LatencyHistogram()
+
+
+class SimUser:
+    """One simulated chat client."""
+
+    def __init__(self, index, args, stats, online):
+        self.index = index
+        self.name = f"{args.prefix}{index}"
+        self.args = args
+        self.stats = stats
+        self.online = online  # names of simulated users currently logged in
+        self.rng = random.Random(args.seed * 100003 + index)
+        self.room = f"#{args.prefix}{index % args.rooms}" if args.rooms else None
+        self.writer = None
+        self.opponent = None
+        self.symbol = None
+        self.board = [None] * 9
+        self.move_sent_at = None
+        self.tasks = set()
+
+    def spawn(self, coroutine):
+        """Run a coroutine alongside the reader; cancelled when the user leaves."""
+        task = asyncio.ensure_future(coroutine)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    def send(self, msg_type, data):
+        line = (json.dumps({"type": msg_type, "data": data}) + "\n").encode()
+        self.writer.write(line)
+        self.stats.sent[msg_type] += 1
+        self.stats.bytes_sent += len(line)
+
+    async def run(self, start_at, stop_at):
+        """Connect at `start_at`, chat until `stop_at`, then disconnect."""
+        await asyncio.sleep(max(0.0, start_at - time.monotonic()))
+        stats = self.stats
+        try:
+            reader, self.writer = await asyncio.wait_for(asyncio.open_connection(
+                self.args.host, self.args.port, limit=MAX_LINE), self.args.timeout)
+        except (OSError, asyncio.TimeoutError) as exc:
+            stats.errors[f"connect: {type(exc).__name__}"] += 1
+            return
+        stats.online += 1
+        try:
+            if not await self.login(reader):
+                return
+            self.online.add(self.name)
+            if self.room:
+                self.send("ROOM_JOIN", {"room": self.room})
+            self.spawn(self.chat_loop(stop_at))
+            if self.index < self.args.game_pairs * 2 and self.index % 2 == 0:
+                self.spawn(self.start_game(self.args.ramp))
+            await asyncio.wait_for(self.read_loop(reader), stop_at + self.args.grace - time.monotonic())
+        except asyncio.TimeoutError:
+            pass
+        except (OSError, asyncio.IncompleteReadError, ValueError) as exc:
+            stats.errors[f"connection: {type(exc).__name__}"] += 1
+        finally:
+            self.online.discard(self.name)
+            for task in list(self.tasks):
+                task.cancel()
+            stats.online -= 1
+            self.writer.close()
+
+    async def login(self, reader):
+        self.send("LOGIN", {"version": PROTOCOL_VERSION, "username": self.name,
+                            "encodings": ["json"]})
+        line = await asyncio.wait_for(reader.readline(), self.args.timeout)
+        message = json.loads(line) if line else {}
+        if message.get("type") != "LOGIN_OK":
+            reason = (message.get("data") or {}).get("reason", "closed")
+            self.stats.errors[f"login: {reason}"] += 1
+            return False
+        self.stats.logged_in += 1
+        return True
+
+    async def read_loop(self, reader):
+        stats = self.stats
+        while True:
+            line = await reader.readline()
+            if not line:
+                stats.errors["disconnected by server"] += 1
+                return
+            stats.bytes_received += len(line)
+            message = json.loads(line)
+            msg_type = message.get("type")
+            stats.received[msg_type] += 1
+            self.handle(msg_type, message.get("data") or {})
+
+    def handle(self, msg_type, data):
+        if msg_type == "CHAT":
+            trace = data.get("trace")
+            if isinstance(trace, dict) and isinstance(trace.get("client_ts"), int):
+                received = now_us()
+                self.stats.delivery.record(received - trace["client_ts"])
+                if isinstance(trace.get("server_out"), int) and isinstance(trace.get("server_in"), int):
+                    self.stats.server_time.record(trace["server_out"] - trace["server_in"])
+        elif msg_type == "SYSTEM":
+            text = data.get("text", "")
+            if "too fast" in text:
+                self.stats.errors["throttled"] += 1
+            elif "not found" in text or "not in" in text:
+                self.stats.errors["rejected chat"] += 1
+        elif msg_type == "GAME_INVITE":
+            self.opponent = data.get("opponent")
+            self.new_game("O")
+            self.send("GAME_ACCEPTED", {"player": self.name, "symbol": "O",
+                                        "opponent": self.opponent})
+        elif msg_type in ("GAME_ACCEPTED", "GAME_RESET"):
+            self.new_game("X" if data.get("symbol") == "O" else "O")
+            self.play_if_my_turn("X")
+        elif msg_type == "GAME_MOVE":
+            cell = data.get("cell")
+            if isinstance(cell, int) and 0 <= cell < 9:
+                self.board[cell] = data.get("symbol")
+            if data.get("symbol") == self.symbol and self.move_sent_at is not None:
+                self.stats.move_rtt.record((time.monotonic() - self.move_sent_at) * 1e6)
+                self.move_sent_at = None
+            self.play_if_my_turn(data.get("current_player"))
+        elif msg_type == "GAME_STATE":
+            if isinstance(data.get("board"), list):
+                self.board = data["board"]
+                self.play_if_my_turn(data.get("current_player"))
+        elif msg_type == "GAME_END":
+            self.symbol = None
+            if self.index % 2 == 0:
+                self.stats.games_finished += 1
+                self.spawn(self.start_game(self.args.game_pause))
+        elif msg_type == "GAME_LEFT":
+            self.symbol = None
+
+    def new_game(self, symbol):
+        self.symbol = symbol
+        self.board = [None] * 9
+        self.move_sent_at = None
+
+    def play_if_my_turn(self, current_player):
+        if self.symbol is None or current_player != self.symbol:
+            return
+        free = [cell for cell, mark in enumerate(self.board) if mark is None]
+        if free:
+            self.spawn(self.move(self.rng.choice(free)))
+
+    async def move(self, cell):
+        await asyncio.sleep(self.args.move_delay)
+        if self.symbol is not None:
+            self.move_sent_at = time.monotonic()
+            self.send("GAME_MOVE", {"cell": cell, "opponent": self.opponent})
+
+    async def start_game(self, delay):
+        """Invite (first game) or restart (later games) the paired user."""
+        await asyncio.sleep(delay)
+        opponent = f"{self.args.prefix}{self.index + 1}"
+        if opponent not in self.online:
+            return
+        if self.opponent is None:
+            self.opponent = opponent
+            self.send("GAME_INVITE", {"opponent": opponent})
+        else:
+            self.new_game("X")
+            self.send("GAME_RESET", {"player": self.name, "symbol": "X", "opponent": opponent})
+            self.play_if_my_turn("X")
+
+    async def chat_loop(self, stop_at):
+        args = self.args
+        if args.rate <= 0:
+            return
+        text = "x" * args.text_size
+        while True:
+            await asyncio.sleep(self.rng.expovariate(args.rate))
+            if time.monotonic() >= stop_at:
+                return
+            roll = self.rng.random()
+            if roll < args.private_ratio and len(self.online) > 1:
+                recipient = self.rng.choice(tuple(self.online - {self.name}))
+            elif self.room and roll < args.private_ratio + args.room_ratio:
+                recipient = self.room
+            else:
+                recipient = "general"
+            self.send("CHAT", {"sender": self.name, "recipient": recipient, "text": text,
+                               "trace": {"id": f"{self.name}-{self.stats.sent['CHAT']}",
+                                         "client_ts": now_us()}})
+            await self.writer.drain()
+
+
+def build_report(args, stats, elapsed):
+    chats_sent = stats.sent["CHAT"]
+    deliveries = stats.received["CHAT"]
+    return {
+        "config": {"host": args.host, "port": args.port, "users": args.users,
+                   "duration": args.duration, "rate": args.rate,
+                   "private_ratio": args.private_ratio, "room_ratio": args.room_ratio,
+                   "rooms": args.rooms, "game_pairs": args.game_pairs},
+        "elapsed_s": round(elapsed, 2),
+        "logged_in": stats.logged_in,
+        "chats_sent": chats_sent,
+        "chat_deliveries": deliveries,
+        "chats_sent_per_s": round(chats_sent / elapsed, 1),
+        "deliveries_per_s": round(deliveries / elapsed, 1),
+        "mbytes_sent": round(stats.bytes_sent / 1e6, 3),
+        "mbytes_received": round(stats.bytes_received / 1e6, 3),
+        "delivery_latency": stats.delivery.summary(),
+        "server_time": stats.server_time.summary(),
+        "games_finished": stats.games_finished,
+        "game_move_rtt": stats.move_rtt.summary(),
+        "sent": dict(stats.sent),
+        "received": dict(stats.received),
+        "errors": dict(stats.errors),
+    }
+
+
+def print_report(report):
+    latency = report["delivery_latency"]
+    rtt = report["game_move_rtt"]
+    print(f"\nUsers logged in:   {report['logged_in']} / {report['config']['users']}")
+    print(f"Duration:          {report['elapsed_s']} s")
+    print(f"Chats sent:        {report['chats_sent']} ({report['chats_sent_per_s']}/s)")
+    print(f"Chat deliveries:   {report['chat_deliveries']} ({report['deliveries_per_s']}/s)")
+    print(f"Traffic:           {report['mbytes_sent']} MB out, {report['mbytes_received']} MB in")
+    print(f"Delivery latency:  p50 {latency['p50_ms']} ms, p90 {latency['p90_ms']} ms, "
+          f"p99 {latency['p99_ms']} ms, max {latency['max_ms']} ms")
+    server = report["server_time"]
+    print(f"  in the server:   p50 {server['p50_ms']} ms, p99 {server['p99_ms']} ms")
+    print(f"Games finished:    {report['games_finished']} "
+          f"(move round trip p50 {rtt['p50_ms']} ms, p99 {rtt['p99_ms']} ms)")
+    errors = report["errors"]
+    print("Errors:            " + (", ".join(f"{kind}: {count}" for kind, count in
+                                            sorted(errors.items())) if errors else "none"))
+
+
+async def report_progress(stats, started, interval):
+    last_sent = last_received = 0
+    while True:
+        await asyncio.sleep(interval)
+        sent, received = stats.sent["CHAT"], stats.received["CHAT"]
+        print(f"[{time.monotonic() - started:6.1f}s] online {stats.online:5d}  "
+              f"chats {(sent - last_sent) / interval:8.1f}/s  "
+              f"deliveries {(received - last_received) / interval:9.1f}/s  "
+              f"p99 {stats.delivery.percentile(0.99)} ms  "
+              f"errors {sum(stats.errors.values())}", flush=True)
+        last_sent, last_received = sent, received
+
+
+async def run(args):
+    stats = Stats()
+    online = set()
+    started = time.monotonic()
+    stop_at = started + args.ramp + args.duration
+    users = [SimUser(index, args, stats, online) for index in range(args.users)]
+    progress = asyncio.ensure_future(report_progress(stats, started, args.report_interval))
+    try:
+        await asyncio.gather(*(
+            user.run(started + args.ramp * user.index / max(args.users, 1), stop_at)
+            for user in users))
+    finally:
+        progress.cancel()
+    return build_report(args, stats, time.monotonic() - started)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lord of the Pings load generator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--users", type=int, default=100, help="simulated users")
+    parser.add_argument("--duration", type=float, default=30,
+                        help="seconds of load after the ramp")
+    parser.add_argument("--ramp", type=float, default=5,
+                        help="seconds over which users connect")
+    parser.add_argument("--rate", type=float, default=0.2,
+                        help="chat messages per second per user")
+    parser.add_argument("--private-ratio", type=float, default=0.2,
+                        help="share of messages sent to a random user")
+    parser.add_argument("--room-ratio", type=float, default=0.0,
+                        help="share of messages sent to the user's room (needs --rooms)")
+    parser.add_argument("--rooms", type=int, default=0,
+                        help="rooms the users are spread over")
+    parser.add_argument("--game-pairs", type=int, default=0,
+                        help="pairs of users playing Tic-Tac-Toe continuously")
+    parser.add_argument("--move-delay", type=float, default=0.2,
+                        help="seconds a player waits before each move")
+    parser.add_argument("--game-pause", type=float, default=1.0,
+                        help="seconds between the end of a game and the next")
+    parser.add_argument("--text-size", type=int, default=40, help="characters per message")
+    parser.add_argument("--prefix", default="load", help="username prefix")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=10,
+                        help="seconds allowed for connect and login")
+    parser.add_argument("--grace", type=float, default=2,
+                        help="seconds to keep reading after the last message")
+    parser.add_argument("--report-interval", type=float, default=5)
+    parser.add_argument("--json", metavar="PATH", help="also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        report = asyncio.run(run(args))
+    except KeyboardInterrupt:
+        return
+    print_report(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()